@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# 本地基准, 用法: python benchmark.py [name ...] [--output result.json] [--baseline old.json], 不带 name 时全部运行
+
+import argparse
+import json
+import subprocess
+import time
+import timeit
+from okex import utils
+import ladder
+from price_levels import OrderEntry, PriceLevels
+
+
+def report(name, number, seconds):
+    print('%-40s %10.3f us/op' % (name, seconds / number * 1e6))
+
+
+def summarize(values):
+    values = sorted(values)
+    if not values:
+        return {'count': 0}
+
+    def pct(p):
+        return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+    return {'count': len(values), 'p50_ms': pct(0.5), 'p99_ms': pct(0.99), 'max_ms': values[-1] * 1000}
+
+
+def git_version():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return ''
+
+
+def bench_sign(args, number=100000):
+    secret = 'A' * 32
+    timestamp = '2020-03-11T08:00:00.000Z'
+    path = '/api/swap/v3/orders'
+    body = '{"instrument_id": "BTC-USD-SWAP", "type": "1", "size": "1", "price": "8000"}'
+
+    seconds = timeit.timeit(lambda: utils.sign(utils.pre_hash(timestamp, 'POST', path, str(body)), secret),
+                            number=number)
+    report('sign: utils.sign + pre_hash', number, seconds)
+
+    signer = utils.Signer(secret)
+    assert signer.sign(timestamp, 'POST', path, body) == \
+        utils.sign(utils.pre_hash(timestamp, 'POST', path, body), secret).decode()
+    seconds = timeit.timeit(lambda: signer.sign(timestamp, 'POST', path, body), number=number)
+    report('sign: Signer.sign', number, seconds)
+
+
+def bench_ladder(args, number=50):
+    size_min, size_max = 100, 10000
+    info = {'isActive': True, 'size': 500, 'dealSize': 0}
+    for maker_number in (20, 1000, 5000):
+        market_price = 10000
+        # 价格上移 maker_number / 10 档, 模拟一次盘口跳动后的重新报价
+        shift = max(1, maker_number // 10)
+        lo, hi = ladder.ask_range(market_price - shift, maker_number)
+        sells = PriceLevels('sell', (OrderEntry(p, p, 'sell', 500, 's%d' % p) for p in range(lo, hi + 1)))
+        lo, hi = ladder.bid_range(market_price - shift, maker_number)
+        buys = PriceLevels('buy', (OrderEntry(p, p, 'buy', 500, 'b%d' % p) for p in range(lo, hi + 1)))
+        diff = ladder.diff_ladder(market_price, maker_number, sells, buys, size_min, size_max, lambda o: info)
+        seconds = timeit.timeit(lambda: ladder.diff_ladder(market_price, maker_number, sells, buys,
+                                                           size_min, size_max, lambda o: info), number=number)
+        report('ladder: %d levels, %d actions' % (maker_number, len(diff)), number, seconds)
+
+
+def depth_response(levels=200):
+    # 与 get_depth 返回结构相同的合成数据: [价格, 数量, 强平单数, 订单数]
+    asks = [['%.1f' % (8000 + i * 0.5), str(10 + i % 50), '0', str(1 + i % 7)] for i in range(levels)]
+    bids = [['%.1f' % (7999.5 - i * 0.5), str(10 + i % 40), '0', str(1 + i % 5)] for i in range(levels)]
+    return json.dumps({'asks': asks, 'bids': bids, 'time': '2020-03-11T08:00:00.000Z'}).encode('utf-8')
+
+
+def bench_codec(args, number=2000):
+    # 解析 get_depth 响应和序列化下单 body; --depth-file 可以指定录制的真实响应
+    from okex import codec
+    if args.depth_file:
+        with open(args.depth_file, 'rb') as f:
+            samples = [('recorded', f.read())]
+    else:
+        samples = [('depth %d' % n, depth_response(n)) for n in (20, 200)]
+    order = {'client_oid': 'a1b2c3', 'instrument_id': 'BTC-USD-SWAP', 'type': '1', 'price': '8000.5', 'size': '10',
+             'order_type': '0'}
+    for name in sorted(codec.CODECS):
+        jc = codec.get_codec(name)
+        for label, data in samples:
+            seconds = timeit.timeit(lambda: jc.loads(data), number=number)
+            report('codec %s: loads %s (%d bytes)' % (name, label, len(data)), number, seconds)
+        seconds = timeit.timeit(lambda: jc.dumps(order), number=number * 10)
+        report('codec %s: dumps order' % name, number * 10, seconds)
+
+
+def bench_depth(args, number=2000):
+    # get_depth 响应转成数组, 以及公允价 / 吃单均价 / 深度 / 失衡度的计算耗时
+    from okex import codec, depth
+    data = codec.default_codec().loads(depth_response(200))
+    seconds = timeit.timeit(lambda: depth.parse_depth(data), number=number)
+    report('depth: parse 2 x 200 levels', number, seconds)
+    book = depth.parse_depth(data)
+    size = book.asks.total() / 2
+    for name, fn in (('microprice', book.microprice),
+                     ('vwap to half depth', lambda: book.asks.vwap(size)),
+                     ('size within 10 bps', lambda: book.bids.size_within_bps(10)),
+                     ('imbalance 20 levels', lambda: book.imbalance(levels=20)),
+                     ('imbalance 10 bps', lambda: book.imbalance(bps=10))):
+        seconds = timeit.timeit(fn, number=number * 50)
+        report('depth: %s' % name, number * 50, seconds)
+
+
+class SlowFileHandler(object):
+
+    # 每次写入额外等待 delay 秒, 模拟磁盘抖动 (sleep 会释放 GIL, 与真实 I/O 等待相同)
+    def __init__(self, handler, delay):
+        self.handler = handler
+        self.delay = delay
+
+    def __getattr__(self, name):
+        return getattr(self.handler, name)
+
+    def handle(self, record):
+        time.sleep(self.delay)
+        return self.handler.handle(record)
+
+
+def bench_log(args, number=20000):
+    # 调用线程上一次 logging.info 的耗时: 同步写文件 vs 入队由后台线程写.
+    # burst: 连续写 number 条, 后台线程和调用方争 GIL; tick: 每 10 条后等待 5ms, 接近主循环的写日志节奏;
+    # slow disk: 每次写入多等 1ms
+    import logging
+    import os
+    import tempfile
+    import log
+    root = logging.getLogger()
+    saved = root.handlers[:], root.level
+    message = ('price = %s, order_id = %s', 10000, 'abc')
+
+    def timed(n, pause_every=None):
+        values = []
+        timer = time.perf_counter
+        for i in range(n):
+            start = timer()
+            logging.info(*message)
+            values.append(timer() - start)
+            if pause_every and i % pause_every == pause_every - 1:
+                time.sleep(0.005)
+        return values
+
+    def show(name, values):
+        r = summarize(values)
+        print('%-34s mean %7.2f us  p50 %7.2f us  p99 %8.2f us' %
+              (name, sum(values) / len(values) * 1e6, r['p50_ms'] * 1000, r['p99_ms'] * 1000))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'bench.log')
+        for mode, n, pause_every in (('burst', number, None), ('tick', 2000, 10)):
+            for delay in (0, 0.001):
+                if delay and mode == 'burst':
+                    continue
+                label = mode + (', slow disk' if delay else '')
+                handler = logging.FileHandler(filename)
+                handler.setFormatter(logging.Formatter(log.FORMAT, log.DATE_FORMAT))
+                root.handlers[:] = [SlowFileHandler(handler, delay) if delay else handler]
+                root.setLevel(logging.INFO)
+                show('log: FileHandler (%s)' % label, timed(n, pause_every))
+                handler.close()
+
+                handler = logging.FileHandler(filename)
+                handler.setFormatter(logging.Formatter(log.FORMAT, log.DATE_FORMAT))
+                log.setup(filename, logging.INFO, queue_size=number,
+                          handler=SlowFileHandler(handler, delay) if delay else handler)
+                show('log: queued (%s)' % label, timed(n, pause_every))
+                log.stop()
+                handler.close()
+
+        root.setLevel(logging.WARNING)
+        seconds = timeit.timeit(lambda: logging.info(*message), number=number)
+        report('log: below level', number, seconds)
+    for h in root.handlers[:]:
+        root.removeHandler(h)
+    root.handlers[:], root.level = saved[0], saved[1]
+
+
+def bench_loop(args):
+    # 在模拟撮合上跑完整主循环, 统计各阶段 p50/p99/max; 每个 max_workers 取值各跑一次
+    import simulator
+    import trade
+    runs = []
+    for workers in [int(w) for w in args.workers.split(',')]:
+        path = simulator.PricePath(seed=args.seed)
+        exchange = simulator.Exchange(path, seed=args.seed, latency=args.latency, jitter=args.latency)
+        server = simulator.serve(exchange)
+        url = 'http://%s:%s' % server.server_address
+        service = trade.Kumex(simulator.sim_config(url, maker_number=args.maker_number))
+        phases = {}
+        trade.run(service, ticks=args.ticks, max_workers=workers,
+                  on_phase=lambda name, seconds: phases.setdefault(name, []).append(seconds))
+        server.shutdown()
+        run = {
+            'max_workers': workers,
+            'phases': dict((name, summarize(v)) for name, v in phases.items()),
+            'exchange': exchange.report()
+        }
+        runs.append(run)
+        for name in ('market_price', 'taker', 'active_orders', 'diff', 'cancel', 'make', 'tick'):
+            p = run['phases'].get(name, {})
+            if p.get('count'):
+                print('loop[workers=%d] %-14s p50 %8.3f ms  p99 %8.3f ms  max %8.3f ms' %
+                      (workers, name, p['p50_ms'], p['p99_ms'], p['max_ms']))
+    return {
+        'params': {'ticks': args.ticks, 'seed': args.seed, 'latency': args.latency, 'maker_number': args.maker_number},
+        'runs': runs
+    }
+
+
+def bench_markets(args):
+    # 同一进程内同时报价 n 个合约 (共用连接池、限速和盘口), 观察总下单速率随合约数的变化
+    import simulator
+    import trade
+    runs = []
+    for n in [int(m) for m in args.markets.split(',')]:
+        path = simulator.PricePath(seed=args.seed)
+        exchange = simulator.Exchange(path, seed=args.seed, latency=args.latency, jitter=args.latency)
+        server = simulator.serve(exchange)
+        url = 'http://%s:%s' % server.server_address
+        markets = [{'kumex_symbol': 'SIM%dM' % i} for i in range(n)]
+        services = trade.create_services(simulator.sim_config(url, maker_number=args.maker_number, markets=markets))
+        trade.run_all(services, ticks=args.ticks)
+        server.shutdown()
+        report = exchange.report()
+        runs.append({'markets': n, 'exchange': report})
+        print('markets=%-3d orders/s %8.1f  elapsed %6.2f s  tick-to-quote p50 %.1f ms' %
+              (n, report['orders_per_sec'], report['elapsed'], report['tick_to_quote_ms']['p50'] or 0))
+    return {'params': {'ticks': args.ticks, 'seed': args.seed, 'latency': args.latency}, 'runs': runs}
+
+
+def compare(result, baseline):
+    # 与上一次结果按 (max_workers, 阶段) 对比 p50 / p99
+    old = dict((r['max_workers'], r) for r in baseline.get('loop', {}).get('runs', []))
+    for run in result.get('loop', {}).get('runs', []):
+        prev = old.get(run['max_workers'])
+        if prev is None:
+            continue
+        for name, p in sorted(run['phases'].items()):
+            q = prev['phases'].get(name)
+            if not q or not q.get('count') or not p.get('count'):
+                continue
+            print('compare[workers=%d] %-14s p50 %+7.1f%%  p99 %+7.1f%%' %
+                  (run['max_workers'], name, (p['p50_ms'] / q['p50_ms'] - 1) * 100 if q['p50_ms'] else 0,
+                   (p['p99_ms'] / q['p99_ms'] - 1) * 100 if q['p99_ms'] else 0))
+
+
+BENCHMARKS = {
+    'sign': bench_sign,
+    'ladder': bench_ladder,
+    'log': bench_log,
+    'codec': bench_codec,
+    'depth': bench_depth,
+    'loop': bench_loop,
+    'markets': bench_markets,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('names', nargs='*', help='benchmarks to run: %s (default: all)' % ', '.join(BENCHMARKS))
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.002, help='simulated exchange latency (seconds)')
+    parser.add_argument('--maker-number', type=int, default=20)
+    parser.add_argument('--workers', default='10', help='comma separated max_workers values, e.g. 5,10,20')
+    parser.add_argument('--markets', default='1,2,4', help='comma separated market counts for the markets benchmark')
+    parser.add_argument('--depth-file', help='recorded get_depth response for the codec benchmark')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='previous JSON result to compare against')
+    args = parser.parse_args()
+    unknown = [n for n in args.names if n not in BENCHMARKS]
+    if unknown:
+        parser.error('unknown benchmark: %s (choose from %s)' % (', '.join(unknown), ', '.join(BENCHMARKS)))
+
+    result = {'version': git_version(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    for n in args.names or list(BENCHMARKS):
+        r = BENCHMARKS[n](args)
+        if r is not None:
+            result[n] = r
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(result, json.load(f))
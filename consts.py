@@ -1,8 +1,35 @@
 # global
 CONFIG_FILE = 'config.json'
 LOG_FILE = 'log.log'
+# 日志文件轮转大小和保留个数, 以及后台写日志队列长度 (满了丢弃)
+LOG_MAX_BYTES = 50 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_QUEUE_SIZE = 10000
 TAKER = 'taker'
 MAKER = 'maker'
+# 推送行情超过该秒数未更新则回退到 REST
+FEED_STALE_SECONDS = 5
+# 本地盘口重建失败后的重试间隔 (秒), 指数退避
+BOOK_RESYNC_MIN_DELAY = 0.5
+BOOK_RESYNC_MAX_DELAY = 30
+# KuMEX websocket: 已订阅的 topic 超过该秒数没有消息即视为断流, 断开后按指数退避重连 (秒)
+KUMEX_WS_IDLE_TIMEOUT = 60
+KUMEX_WS_RECONNECT_MIN_DELAY = 1
+KUMEX_WS_RECONNECT_MAX_DELAY = 60
+# 合约元数据 (tick size / lot size) 刷新间隔 (秒)
+INSTRUMENT_TTL = 3600
+# KuMEX 限速: (接口族, 方法, path 前缀, 每秒请求数, 突发容量), 按顺序匹配;
+# 下单和撤单共用一个桶, 排队时撤单优先
+KUMEX_RATE_LIMITS = [
+    ('kumex_trade', None, '/api/v1/orders', 30, 60),
+    ('kumex_market', 'GET', '/api/v1/', 30, 60),
+]
+KUMEX_DEFAULT_RATE_LIMIT = (10, 20)
+# KuMEX 批量下单 / 撤单时每批并发的笔数
+KUMEX_BATCH_LIMIT = 10
+# 随机挂单数量范围 (张)
+SIZE_MIN = 100
+SIZE_MAX = 10000
 
 # okex contract type
 SWAP = 'SWAP'
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# 合约元数据: 最小价格变动、下单数量步长、合约面值, 以及价格/数量的取整;
+# InstrumentRegistry 启动时加载一次, 之后按 TTL 在后台刷新
+
+import logging
+import math
+import threading
+import time
+import consts as c
+
+
+def _decimals(step):
+    # 步长的小数位数, 用于消除浮点误差, 例如 0.05 -> 2
+    s = ('%.10f' % step).rstrip('0')
+    return len(s.split('.')[1]) if '.' in s else 0
+
+
+class Instrument(object):
+
+    __slots__ = ('symbol', 'tick_size', 'lot_size', 'contract_value', 'max_size', 'price_decimals', 'size_decimals')
+
+    def __init__(self, symbol, tick_size=1, lot_size=1, contract_value=1, max_size=None):
+        self.symbol = symbol
+        self.tick_size = float(tick_size)
+        self.lot_size = float(lot_size)
+        self.contract_value = float(contract_value)
+        self.max_size = max_size
+        self.price_decimals = _decimals(self.tick_size)
+        self.size_decimals = _decimals(self.lot_size)
+
+    def to_ticks(self, price):
+        # 价格 -> 整数档位 (向下取整), 挂单梯子按档位计算
+        return int(math.floor(float(price) / self.tick_size + 1e-9))
+
+    def from_ticks(self, ticks):
+        price = round(ticks * self.tick_size, self.price_decimals)
+        return int(price) if self.price_decimals == 0 else price
+
+    def round_price(self, price, side=None):
+        # 买单向下、卖单向上取整到 tick, 保证不会比给定价格更激进; 不传 side 时四舍五入
+        x = float(price) / self.tick_size
+        if side == 'buy':
+            ticks = math.floor(x + 1e-9)
+        elif side == 'sell':
+            ticks = math.ceil(x - 1e-9)
+        else:
+            ticks = round(x)
+        return self.from_ticks(ticks)
+
+    def round_size(self, size):
+        # 向下取整到 lot, 并限制在最大下单量以内
+        lots = int(math.floor(float(size) / self.lot_size + 1e-9))
+        size = round(lots * self.lot_size, self.size_decimals)
+        if self.max_size is not None and size > self.max_size:
+            size = self.max_size
+        return int(size) if self.size_decimals == 0 else size
+
+
+def kumex_instruments(market):
+    # market: kumex.client.Market
+    for d in market.get_contracts_list():
+        yield Instrument(d['symbol'], d.get('tickSize', 1), d.get('lotSize', 1), abs(d.get('multiplier') or 1),
+                         d.get('maxOrderQty'))
+
+
+def okex_instruments(api, *args):
+    # api: SwapAPI / FutureAPI / SpotAPI / OptionAPI, OptionAPI 需要传入 underlying
+    for d in api.get_instruments(*args):
+        lot = d.get('size_increment') or d.get('lot_size') or d.get('trade_increment') or 1
+        yield Instrument(d['instrument_id'], d.get('tick_size', 1), lot, d.get('contract_val') or 1)
+
+
+class InstrumentRegistry(object):
+
+    # loader() 返回 Instrument 列表; 刷新失败时保留上一次的数据
+    def __init__(self, loader, ttl=c.INSTRUMENT_TTL, name='instruments'):
+        self.loader = loader
+        self.ttl = ttl
+        self.name = name
+        self.instruments = {}
+        self.loaded_at = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        try:
+            instruments = dict((i.symbol, i) for i in self.loader())
+        except Exception as e:
+            logging.error('%s refresh failed: %s', self.name, e)
+            return False
+        # 整体替换, 读取方不需要加锁
+        self.instruments = instruments
+        self.loaded_at = time.time()
+        return True
+
+    def get(self, symbol, default=None):
+        return self.instruments.get(symbol, default)
+
+    def _run(self):
+        while not self._stop.wait(self.ttl):
+            self.refresh()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        # 首次加载放在调用线程, 启动后立即可用
+        self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='%s-refresh' % self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# KuMEX 批量下单 / 撤单: v1 接口没有批量下单和按订单ID批量撤单, 这里每 limit 笔一批并发发送,
+# 结果与输入一一对应 (失败或超时的为异常对象); 只撤调用方给出的订单, 不用 cancel all,
+# 以免撤掉手工挂单或其他进程的订单
+
+import logging
+import time
+from concurrent.futures import wait, TimeoutError
+import consts as c
+from okex.batch import chunks
+
+
+def _run(executor, calls, limit, timeout):
+    # calls: [(fn, args)]; 超过 timeout 仍未开始执行的直接取消, 不让过期的请求积压到下一轮
+    results = []
+    deadline_at = time.monotonic() + timeout if timeout is not None else None
+    for batch in chunks(calls, limit):
+        tasks = [executor.submit(fn, *args) for fn, args in batch]
+        wait(tasks, timeout=None if deadline_at is None else max(0, deadline_at - time.monotonic()))
+        for task in tasks:
+            if not task.done():
+                if task.cancel():
+                    logging.warning('任务超时已取消')
+                results.append(TimeoutError())
+            elif task.exception() is not None:
+                results.append(task.exception())
+            else:
+                results.append(task.result())
+    return results
+
+
+def place_orders(trade, symbol, orders, executor, limit=c.KUMEX_BATCH_LIMIT, timeout=None):
+    # trade: kumex.client.Trade; orders: [{'side', 'price', 'size', 'lever'}]
+    # 返回与 orders 一一对应的 {'orderId': ...} 或异常对象
+    calls = [(trade.create_limit_order, (symbol, o['side'], o['lever'], o['size'], o['price'])) for o in orders]
+    return _run(executor, calls, limit, timeout)
+
+
+def cancel_orders(trade, order_ids, executor, limit=c.KUMEX_BATCH_LIMIT, timeout=None):
+    # 返回 {order_id: 结果}, 失败的为异常对象
+    order_ids = list(order_ids)
+    calls = [(trade.cancel_order, (order_id,)) for order_id in order_ids]
+    return dict(zip(order_ids, _run(executor, calls, limit, timeout)))
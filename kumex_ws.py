@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+import consts as c
+
+
+class KumexStream(object):
+
+    # 在后台线程跑 KuMEX websocket, 收到的消息交给 callback(msg) 处理
+    # SDK 断线后自己重连但不会重新订阅, 所以这里带看门狗: SDK 的连接任务结束或被替换, 或者
+    # 某个已订阅的 topic 超过 idle_timeout 秒没有消息时, 关闭连接并退出, 由调用方 (on_exit) 重连
+    def __init__(self, ws_client, topics, callback, private=False, name='kumex-ws', idle_timeout=None):
+        # ws_client: kumex.client.WsToken 实例, 用来申请 websocket token
+        self.ws_client = ws_client
+        self.topics = list(topics)
+        self.callback = callback
+        self.private = private
+        self.name = name
+        self.idle_timeout = idle_timeout
+        self.received = 0
+        self._running = False
+        self._thread = None
+        self._lock = threading.Lock()
+        self._ws = None
+        self._loop = None
+        # topic -> 最后一次收到消息 (或订阅) 的时间
+        self._last = {}
+
+    async def _on_message(self, msg):
+        self.received += 1
+        self._last[msg.get('topic')] = time.monotonic()
+        try:
+            self.callback(msg)
+        except Exception as e:
+            logging.error(e)
+
+    def _check(self, conn, task):
+        # 返回断流原因, None 表示正常; conn / task 为 SDK 的 ConnectWebsocket 及其连接任务
+        if conn._conn is not task:
+            return 'sdk reconnected without subscriptions'
+        if task.done():
+            return 'connection task ended'
+        if self.idle_timeout:
+            now = time.monotonic()
+            with self._lock:
+                topics = list(self.topics)
+            for topic in topics:
+                if now - self._last.get(topic, now) > self.idle_timeout:
+                    return 'no message on %s for %ss' % (topic, self.idle_timeout)
+        return None
+
+    async def _subscribe(self, ws, topic):
+        self._last[topic] = time.monotonic()
+        await ws.subscribe(topic)
+
+    def _thread_main(self, on_exit):
+        # 延迟导入, 没有 websocket 依赖时其余部分依然可用
+        from kumex.ws_client import KumexWsClient
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        async def run():
+            ws = await KumexWsClient.create(loop, self.ws_client, self._on_message, private=self.private)
+            conn = ws._conn
+            task = conn._conn
+            # 连接建立前 add_topic 加入的 topic 在这里一并订阅, 之后加入的由 add_topic 直接订阅
+            with self._lock:
+                self._ws, self._loop = ws, loop
+                topics = list(self.topics)
+            for topic in topics:
+                await self._subscribe(ws, topic)
+            # send_message 在连接 5 秒内没建立时直接丢弃订阅
+            if conn._socket is None:
+                raise Exception('%s: websocket not connected, subscriptions dropped' % self.name)
+            while self._running:
+                await asyncio.sleep(1)
+                reason = self._check(conn, task)
+                if reason is not None:
+                    logging.warning('%s 断流: %s, 重新连接', self.name, reason)
+                    return
+
+        try:
+            loop.run_until_complete(run())
+        except Exception as e:
+            logging.error(e)
+        finally:
+            with self._lock:
+                ws, self._ws, self._loop = self._ws, None, None
+            self._close(loop, ws)
+            if on_exit is not None:
+                on_exit()
+
+    def _close(self, loop, ws):
+        # 关掉 socket 并取消 SDK 的连接 / 重连任务, 不让它在后台继续重连
+        try:
+            conn = ws._conn if ws is not None else None
+            if conn is not None and conn._socket is not None:
+                conn._socket.transport.abort()
+            tasks = asyncio.all_tasks(loop)
+            for t in tasks:
+                t.cancel()
+            if tasks:
+                loop.run_until_complete(asyncio.wait(tasks, timeout=5))
+            loop.close()
+        except Exception as e:
+            logging.error(e)
+
+    def add_topic(self, topic):
+        # 在已有连接上追加订阅, 可在 start 前后调用
+        with self._lock:
+            if topic in self.topics:
+                return
+            self.topics.append(topic)
+            ws, loop = self._ws, self._loop
+        if ws is not None:
+            asyncio.run_coroutine_threadsafe(self._subscribe(ws, topic), loop)
+
+    def start(self, on_exit=None):
+        self._running = True
+        self._thread = threading.Thread(target=self._thread_main, args=(on_exit,), name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+
+
+class KumexMux(object):
+
+    # 多个合约共用一个 websocket 连接: 按消息的 topic 分发给订阅方, 连接在第一次订阅时建立;
+    # 同一 topic 可以有多个订阅方 (例如私有订单推送, 各合约自己按 symbol 过滤)
+    # 连接退出 (断线或看门狗判定断流) 时先通知所有订阅方, 再按指数退避重连并重新订阅全部 topic
+    def __init__(self, ws_client, private=False, name='kumex-ws', idle_timeout=None,
+                 reconnect_delay=c.KUMEX_WS_RECONNECT_MIN_DELAY, reconnect_max_delay=c.KUMEX_WS_RECONNECT_MAX_DELAY):
+        self.ws_client = ws_client
+        self.private = private
+        self.name = name
+        self.idle_timeout = idle_timeout
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.reconnects = 0
+        self._delay = reconnect_delay
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._stream = None
+        self._stop = threading.Event()
+
+    def _connect(self):
+        # 调用方持有锁; 新连接带上所有已登记的 topic
+        stream = KumexStream(self.ws_client, list(self._subscribers), self._dispatch, private=self.private,
+                             name=self.name, idle_timeout=self.idle_timeout)
+        self._stream = stream
+        stream.start(functools.partial(self._on_exit, stream))
+
+    def subscribe(self, topic, callback, on_exit=None):
+        # callback(msg) 在 websocket 线程里调用, 不要阻塞; 连接断开时调用 on_exit()
+        with self._lock:
+            self._subscribers.setdefault(topic, []).append((callback, on_exit))
+            stream = self._stream
+            if stream is None:
+                self._connect()
+                return self
+        stream.add_topic(topic)
+        return self
+
+    def unsubscribe(self, topic, callback):
+        # 只停止分发, 连接上的订阅保留到 stop
+        with self._lock:
+            subscribers = [s for s in self._subscribers.get(topic, ()) if s[0] != callback]
+            if subscribers:
+                self._subscribers[topic] = subscribers
+            else:
+                self._subscribers.pop(topic, None)
+
+    def _dispatch(self, msg):
+        with self._lock:
+            subscribers = list(self._subscribers.get(msg.get('topic'), ()))
+        for callback, _ in subscribers:
+            try:
+                callback(msg)
+            except Exception as e:
+                logging.error(e)
+
+    def _on_exit(self, stream):
+        # 在退出的连接线程里调用
+        with self._lock:
+            current = self._stream is stream
+            if current:
+                self._stream = None
+            subscribers = [s for topic in self._subscribers.values() for s in topic]
+            # 上一个连接收到过消息说明曾经正常, 退避从头开始
+            if stream.received:
+                self._delay = self.reconnect_delay
+            delay = self._delay
+            self._delay = min(self._delay * 2, self.reconnect_max_delay)
+        for _, on_exit in subscribers:
+            if on_exit is not None:
+                try:
+                    on_exit()
+                except Exception as e:
+                    logging.error(e)
+        if not current or self._stop.wait(delay):
+            return
+        with self._lock:
+            if self._stream is None and self._subscribers and not self._stop.is_set():
+                self.reconnects += 1
+                self._connect()
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            stream, self._stream = self._stream, None
+        if stream is not None:
+            stream.stop()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# 挂单梯子的差量计算: 输入当前盘口价格、档数和挂单快照, 输出最少的撤单 / 下单 / 改单集合
+# 纯计算, 不做任何网络请求, 可以单独测试和压测
+
+SELL = 'sell'
+BUY = 'buy'
+
+
+class LadderDiff(object):
+
+    def __init__(self):
+        # cancels / amends / done: [(order_id, price, side)], places: [(price, side)]
+        # amend 表示同一价位需要撤掉旧单再重新挂单 (KuMEX 不支持直接改单);
+        # done 为已结束 (成交或被撤) 的订单, 不用撤单, 去掉本地记录后其价位已计入 places
+        self.cancels = []
+        self.places = []
+        self.amends = []
+        self.done = []
+
+    def __len__(self):
+        return len(self.cancels) + len(self.places) + len(self.amends)
+
+    def __repr__(self):
+        return 'LadderDiff(cancels=%s, places=%s, amends=%s, done=%s)' % (
+            self.cancels, self.places, self.amends, self.done)
+
+
+def ask_range(market_price, maker_number):
+    # 卖单挂在 market_price + 1 ... market_price + maker_number - 1
+    return market_price + 1, market_price + maker_number - 1
+
+
+def bid_range(market_price, maker_number):
+    # 买单挂在 market_price - maker_number + 2 ... market_price
+    return market_price - maker_number + 2, market_price
+
+
+def needs_refresh(info, size_min, size_max):
+    # 订单已结束, 或剩余数量不在 [size_min, size_max) 内时需要重挂
+    if not info['isActive']:
+        return True
+    remain = info['size'] - info['dealSize']
+    return not size_min <= remain < size_max
+
+
+def _diff_side(diff, orders, side, lo, hi, size_min, size_max, order_info):
+    # 区间外的撤单只访问区间外的档位, 空缺档位按有序档位一次遍历得到
+    for o in orders.outside(lo, hi):
+        diff.cancels.append((o.order_id, o.level, side))
+    diff.places.extend((price, side) for price in orders.missing(lo, hi))
+    if order_info is None:
+        return
+    for o in orders.within(lo, hi):
+        info = order_info(o.order_id)
+        if not info:
+            continue
+        if not info['isActive']:
+            diff.done.append((o.order_id, o.level, side))
+            diff.places.append((o.level, side))
+        elif needs_refresh(info, size_min, size_max):
+            diff.amends.append((o.order_id, o.level, side))
+
+
+def diff_ladder(market_price, maker_number, sells, buys, size_min, size_max, order_info=None):
+    # sells / buys: price_levels.PriceLevels; order_info(order_id) 返回 isActive/size/dealSize,
+    # 不传时只按价位比较
+    diff = LadderDiff()
+    lo, hi = ask_range(market_price, maker_number)
+    _diff_side(diff, sells, SELL, lo, hi, size_min, size_max, order_info)
+    lo, hi = bid_range(market_price, maker_number)
+    _diff_side(diff, buys, BUY, lo, hi, size_min, size_max, order_info)
+    return diff
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# 异步日志: 调用线程只拼接消息并把 LogRecord 放进有界队列 (满了直接丢弃并计数, 不阻塞下单),
+# 按格式输出和写文件都在后台线程完成; 文件按大小轮转, 可选 JSON lines 格式
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import consts as c
+
+FORMAT = '%(asctime)s - %(levelname)s - %(module)s - %(lineno)d:  %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S %p'
+_formatter = logging.Formatter(FORMAT, DATE_FORMAT)
+
+
+class JsonFormatter(logging.Formatter):
+
+    # 每条日志一行 JSON
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record, DATE_FORMAT),
+            'ts': record.created,
+            'level': record.levelname,
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.processName,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exc_info'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+
+    # 调用线程只拼接消息 (msg % args), 时间格式化和写文件在后台线程; 队列满时丢弃并计数
+    def __init__(self, q):
+        logging.handlers.QueueHandler.__init__(self, q)
+        self.dropped = 0
+        self._reported = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        # 与标准库相同, 入队前固定消息内容, 避免 args 里的可变对象在写出前被修改;
+        # 只挂在 root 上, 其他 handler 已处理完, 不需要复制 record
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self.dropped != self._reported:
+            with self._lock:
+                dropped = self.dropped
+                if dropped != self._reported:
+                    # 有日志被丢弃过, 先补一条说明
+                    try:
+                        self.queue.put_nowait(logging.makeLogRecord({
+                            'name': record.name, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                            'msg': '日志队列已满, 累计丢弃 %s 条' % dropped, 'args': None}))
+                        self._reported = dropped
+                    except queue.Full:
+                        pass
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+_listener = None
+
+
+def setup(filename=c.LOG_FILE, level=logging.WARNING, max_bytes=c.LOG_MAX_BYTES, backup_count=c.LOG_BACKUP_COUNT,
+          json_lines=False, queue_size=c.LOG_QUEUE_SIZE, handler=None):
+    # 替换 root logger 的 handler, 返回后台写日志的 QueueListener;
+    # 传入 handler 时由后台线程交给它处理 (例如 supervisor 子进程转发到父进程), 不写文件
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    if handler is None:
+        handler = logging.handlers.RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count,
+                                                       encoding='utf-8')
+        handler.setFormatter(JsonFormatter() if json_lines else logging.Formatter(FORMAT, DATE_FORMAT))
+    q = queue.Queue(queue_size)
+    root = logging.getLogger()
+    for h in root.handlers[:]:
+        root.removeHandler(h)
+        h.close()
+    root.addHandler(QueueHandler(q))
+    root.setLevel(level)
+    _listener = logging.handlers.QueueListener(q, handler)
+    _listener.start()
+    return _listener
+
+
+def stop():
+    # 退出前把队列里剩余的日志写完
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop)
@@ -1,46 +1,47 @@
+import functools
 from .client import Client
 from .consts import *
 
 
 class AccountAPI(Client):
 
-    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False):
-        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first)
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False, **kwargs):
+        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first, **kwargs)
 
     # get all currencies list
-    def get_currencies(self):
-        return self._request_without_params(GET, CURRENCIES_INFO)
+    def get_currencies(self, timeout=None):
+        return self._request_without_params(GET, CURRENCIES_INFO, timeout=timeout)
 
     # get wallet info
-    def get_wallet(self):
-        return self._request_without_params(GET, WALLET_INFO)
+    def get_wallet(self, timeout=None):
+        return self._request_without_params(GET, WALLET_INFO, timeout=timeout)
 
     # get specific currency info
-    def get_currency(self, currency):
-        return self._request_without_params(GET, CURRENCY_INFO + str(currency))
+    def get_currency(self, currency, timeout=None):
+        return self._request_without_params(GET, CURRENCY_INFO + str(currency), timeout=timeout)
 
     # coin withdraw
-    def coin_withdraw(self, currency, amount, destination, to_address, trade_pwd, fee):
+    def coin_withdraw(self, currency, amount, destination, to_address, trade_pwd, fee, timeout=None):
         params = {'currency': currency, 'amount': amount, 'destination': destination, 'to_address': to_address, 'trade_pwd': trade_pwd, 'fee': fee}
-        return self._request_with_params(POST, COIN_WITHDRAW, params)
+        return self._request_with_params(POST, COIN_WITHDRAW, params, timeout=timeout)
 
     # query the fee of coin withdraw
-    def get_coin_fee(self, currency=''):
+    def get_coin_fee(self, currency='', timeout=None):
         params = {}
         if currency:
             params['currency'] = currency
-        return self._request_with_params(GET, COIN_FEE, params)
+        return self._request_with_params(GET, COIN_FEE, params, timeout=timeout)
 
     # query all recently coin withdraw record
-    def get_coins_withdraw_record(self):
-        return self._request_without_params(GET, COINS_WITHDRAW_RECORD)
+    def get_coins_withdraw_record(self, timeout=None):
+        return self._request_without_params(GET, COINS_WITHDRAW_RECORD, timeout=timeout)
 
     # query specific coin withdraw record
-    def get_coin_withdraw_record(self, currency):
-        return self._request_without_params(GET, COIN_WITHDRAW_RECORD + str(currency))
+    def get_coin_withdraw_record(self, currency, timeout=None):
+        return self._request_without_params(GET, COIN_WITHDRAW_RECORD + str(currency), timeout=timeout)
 
     # query ledger record
-    def get_ledger_record(self, currency='', after='', before='', limit='', type=''):
+    def get_ledger_record(self, currency='', after='', before='', limit='', type='', timeout=None):
         params = {}
         if currency:
             params['currency'] = currency
@@ -52,35 +53,40 @@ class AccountAPI(Client):
             params['limit'] = limit
         if type:
             params['type'] = type
-        return self._request_with_params(GET, LEDGER_RECORD, params, cursor=True)
+        return self._request_with_params(GET, LEDGER_RECORD, params, cursor=True, timeout=timeout)
+
+    # 按游标逐条遍历账单, 后台预取下一页
+    def iter_ledger_record(self, currency='', after='', limit='', type='', prefetch=1, timeout=None):
+        return self._paginate(functools.partial(self.get_ledger_record, currency, limit=limit, type=type,
+                                                timeout=timeout), after, prefetch)
 
     # query top up address
-    def get_top_up_address(self, currency):
+    def get_top_up_address(self, currency, timeout=None):
         params = {'currency': currency}
-        return self._request_with_params(GET, TOP_UP_ADDRESS, params)
+        return self._request_with_params(GET, TOP_UP_ADDRESS, params, timeout=timeout)
 
-    def get_asset_valuation(self, account_type='', valuation_currency=''):
+    def get_asset_valuation(self, account_type='', valuation_currency='', timeout=None):
         params = {}
         if account_type:
             params['account_type'] = account_type
         if valuation_currency:
             params['valuation_currency'] = valuation_currency
-        return self._request_with_params(GET, ASSET_VALUATION, params)
+        return self._request_with_params(GET, ASSET_VALUATION, params, timeout=timeout)
 
-    def get_sub_account(self, sub_account):
+    def get_sub_account(self, sub_account, timeout=None):
         params = {'sub-account': sub_account}
-        return self._request_with_params(GET, SUB_ACCOUNT, params)
+        return self._request_with_params(GET, SUB_ACCOUNT, params, timeout=timeout)
 
     # query top up records
-    def get_top_up_records(self):
-        return self._request_without_params(GET, COIN_TOP_UP_RECORDS)
+    def get_top_up_records(self, timeout=None):
+        return self._request_without_params(GET, COIN_TOP_UP_RECORDS, timeout=timeout)
 
     # query top up record
-    def get_top_up_record(self, currency):
-        return self._request_without_params(GET, COIN_TOP_UP_RECORD + str(currency))
+    def get_top_up_record(self, currency, timeout=None):
+        return self._request_without_params(GET, COIN_TOP_UP_RECORD + str(currency), timeout=timeout)
 
     # coin transfer
-    def coin_transfer(self, currency, amount, type, account_from, account_to, sub_account='', instrument_id='', to_instrument_id=''):
+    def coin_transfer(self, currency, amount, type, account_from, account_to, sub_account='', instrument_id='', to_instrument_id='', timeout=None):
         params = {'currency': currency, 'amount': amount, 'type': type, 'from': account_from, 'to': account_to}
         if sub_account:
             params['sub_account'] = sub_account
@@ -88,4 +94,4 @@ class AccountAPI(Client):
             params['instrument_id'] = instrument_id
         if to_instrument_id:
             params['to_instrument_id'] = to_instrument_id
-        return self._request_with_params('POST', COIN_TRANSFER, params)
+        return self._request_with_params('POST', COIN_TRANSFER, params, timeout=timeout)
@@ -0,0 +1,58 @@
+from .async_client import AsyncClient
+from .account_api import AccountAPI
+from .futures_api import FutureAPI
+from .index_api import IndexAPI
+from .lever_api import LeverAPI
+from .option_api import OptionAPI
+from .spot_api import SpotAPI
+from .swap_api import SwapAPI
+from .system_api import SystemAPI
+from .consts import *
+
+
+# 异步版本沿用同步 API 的方法定义: AsyncClient._request 是协程, 因此每个方法直接返回可 await 的对象
+# 例如 await AsyncSwapAPI(...).get_specific_ticker('BTC-USD-SWAP')
+
+class AsyncAccountAPI(AsyncClient, AccountAPI):
+    pass
+
+
+class AsyncFutureAPI(AsyncClient, FutureAPI):
+    pass
+
+
+class AsyncIndexAPI(AsyncClient, IndexAPI):
+    pass
+
+
+class AsyncLeverAPI(AsyncClient, LeverAPI):
+    pass
+
+
+class AsyncOptionAPI(AsyncClient, OptionAPI):
+
+    # 同步版本会对结果做 reversed, 这里需要先 await
+    async def get_kline(self, instrument_id, start='', end='', granularity='', timeout=None):
+        params = {}
+        if start:
+            params['start'] = start
+        if end:
+            params['end'] = end
+        if granularity:
+            params['granularity'] = granularity
+        # 按时间正序 即由开始时间到结束时间
+        data = await self._request_with_params(GET, OPTION_INSTRUMENTS + str(instrument_id) + '/candles', params,
+                                              timeout=timeout)
+        return list(reversed(data))
+
+
+class AsyncSpotAPI(AsyncClient, SpotAPI):
+    pass
+
+
+class AsyncSwapAPI(AsyncClient, SwapAPI):
+    pass
+
+
+class AsyncSystemAPI(AsyncClient, SystemAPI):
+    pass
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import time
+from . import consts as c, utils, exceptions
+from .client import Client
+from .clock import start_clock
+from . import ratelimit, retry, paginate
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+class AsyncResponse(object):
+
+    # 把 aiohttp 的响应包装成 requests.Response 的形状, 以便复用 Client._handle_response 与 OkexAPIException
+    def __init__(self, status_code, headers, text, request=None, content=b'', sent_bytes=0):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+        self.request = request
+        self.content = content
+        self.sent_bytes = sent_bytes
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncClient(Client):
+
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False, session=None,
+                 pool_connections=c.POOL_CONNECTIONS, pool_maxsize=c.POOL_MAXSIZE,
+                 idle_timeout=c.POOL_IDLE_TIMEOUT, rate_limiter=None, retry_policy=None, breakers=None,
+                 metrics=None, codec=None, cache=None, timeout=c.REQUEST_TIMEOUT, connect_timeout=c.CONNECT_TIMEOUT,
+                 read_timeout=c.READ_TIMEOUT, api_url=c.API_URL):
+        if aiohttp is None:
+            raise exceptions.OkexRequestException('aiohttp is required for the asyncio client')
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time=use_server_time, first=first,
+                        session=session, rate_limiter=rate_limiter, retry_policy=retry_policy, breakers=breakers,
+                        metrics=metrics, codec=codec, cache=cache, timeout=timeout, connect_timeout=connect_timeout,
+                        read_timeout=read_timeout, api_url=api_url)
+
+    def _open_session(self, session):
+        # aiohttp.ClientSession 必须在事件循环内创建, 未传入时在第一次请求时再建
+        self.session = session
+        self._own_session = session is None
+        # 首次同步也在后台线程里做, 不阻塞事件循环
+        self.clock = start_clock(api_url=self.api_url, wait=False) if self.use_server_time else None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_connections * self.pool_maxsize,
+                                             limit_per_host=self.pool_maxsize,
+                                             keepalive_timeout=self.idle_timeout)
+            self.session = aiohttp.ClientSession(connector=connector)
+            self._own_session = True
+        return self.session
+
+    async def close(self):
+        if self._own_session and self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    def _paginate(self, fetch, after='', prefetch=1):
+        # 返回 async generator: async for item in api.iter_fills(...)
+        return paginate.aiter_items(fetch, after, prefetch)
+
+    async def _request(self, method, request_path, params, cursor=False, timeout=None):
+        ttl = self._cache_ttl(method, request_path, cursor)
+        if ttl is None:
+            return await self._call(method, request_path, params, cursor, timeout)
+        key = self.api_url + request_path + utils.parse_params_to_str(params)
+        return await self.cache.aget(key, ttl, lambda: self._call(method, request_path, params, cursor, timeout),
+                                     timeout if timeout is not None else self.timeout)
+
+    async def _call(self, method, request_path, params, cursor=False, timeout=None):
+        # 按接口族限速排队, 撤单优先
+        bucket = self.rate_limiter.bucket(method, request_path)
+        priority = ratelimit.priority_of(method, request_path, params)
+        breaker = self.breakers.get(bucket.name)
+        start = time.monotonic()
+        deadline_at = start + (timeout if timeout is not None else self.timeout)
+        retry_deadline_at = min(deadline_at, start + self.retry_policy.deadline)
+        attempt = 0
+        while True:
+            # 熔断期间直接失败, 不再等待超时
+            breaker.check()
+            try:
+                try:
+                    await asyncio.wait_for(bucket.acquire_async(priority),
+                                           self._remaining(deadline_at, request_path))
+                except asyncio.TimeoutError:
+                    raise exceptions.OkexTimeoutException(request_path)
+                remaining = self._remaining(deadline_at, request_path)
+            except BaseException:
+                # 请求没有发出 (排队超时或被取消), 不计入熔断, 让出 half-open 的探测名额
+                breaker.release()
+                raise
+            key = self.metrics.begin('okex', method, request_path)
+            sent_at = time.perf_counter()
+            response = None
+            try:
+                response = await self._send(method, request_path, params,
+                                            aiohttp.ClientTimeout(total=remaining, connect=self.connect_timeout,
+                                                                  sock_read=self.read_timeout))
+                if response.status_code == 429:
+                    bucket.throttle()
+                result = self._handle_response(response, cursor)
+            except asyncio.CancelledError as e:
+                self._observe(key, sent_at, response, e)
+                breaker.release()
+                raise
+            except Exception as e:
+                self._observe(key, sent_at, response, e)
+                if retry.is_failure(e):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                delay = self.retry_policy.next_delay(attempt, retry_deadline_at) \
+                    if retry.is_retryable(e, method) else None
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self._observe(key, sent_at, response)
+            breaker.record_success()
+            return result
+
+    async def _send(self, method, request_path, params, timeout):
+        # 获取本地时间, use_server_time 时已由 ClockSync 校正为服务器时间
+        timestamp = utils.get_timestamp(self.clock.offset if self.clock is not None else None)
+
+        url, body, header = self._prepare_request(method, request_path, params, timestamp)
+
+        # send request
+        session = self._get_session()
+        data = body if method == c.POST else None
+        async with session.request(method, url, data=data, headers=header, timeout=timeout) as resp:
+            text = await resp.text()
+            return AsyncResponse(resp.status, resp.headers, text, resp.request_info, await resp.read(),
+                                 len(url) + len(body))
@@ -0,0 +1,56 @@
+from . import consts as c
+
+
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _map_results(batch, result, key):
+    # order_info 与请求顺序一致, 有 client_oid 时按 client_oid 对应, 否则按下标
+    infos = result.get('order_info', []) if isinstance(result, dict) else []
+    by_oid = dict((i.get('client_oid'), i) for i in infos if i.get('client_oid'))
+    mapped = []
+    for n, item in enumerate(batch):
+        info = by_oid.get(item.get(key)) if item.get(key) else None
+        if info is None and n < len(infos):
+            info = infos[n]
+        mapped.append(info)
+    return mapped
+
+
+def place_orders(api, instrument_id, orders, limit=c.BATCH_ORDER_LIMIT):
+    # api: SwapAPI / FutureAPI; orders: [{'type', 'price', 'size', 'client_oid'(可选), ...}]
+    # 返回与 orders 一一对应的结果 (order_id / error_code / error_message), 请求失败的那一批为异常对象
+    results = []
+    for batch in chunks(list(orders), limit):
+        try:
+            result = api.take_orders(instrument_id, batch)
+        except Exception as e:
+            results.extend([e] * len(batch))
+            continue
+        results.extend(_map_results(batch, result, 'client_oid'))
+    return results
+
+
+def cancel_orders(api, instrument_id, order_ids, limit=c.BATCH_CANCEL_LIMIT):
+    # 返回 {order_id: 结果}, 请求失败的那一批为异常对象
+    results = {}
+    order_ids = list(order_ids)
+    for batch in chunks(order_ids, limit):
+        try:
+            result = api.revoke_orders(instrument_id, batch)
+        except Exception as e:
+            for order_id in batch:
+                results[order_id] = e
+            continue
+        # 永续返回 ids, 交割返回 order_ids
+        ids = (result.get('ids') or result.get('order_ids') or []) if isinstance(result, dict) else []
+        errors = dict((str(i.get('order_id')), i) for i in result.get('order_info', [])) \
+            if isinstance(result, dict) else {}
+        for order_id in batch:
+            if str(order_id) in errors:
+                results[order_id] = errors[str(order_id)]
+            else:
+                results[order_id] = {'order_id': order_id, 'result': str(order_id) in map(str, ids)}
+    return results
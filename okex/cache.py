@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from . import consts as c, exceptions
+
+
+class _Flight(object):
+
+    # 正在进行中的一次请求, 同一 key 的并发调用等待它的结果
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+def copy_error(e):
+    # 等待方各自抛出一份异常, 不共享同一个对象 (及其 __traceback__ / __context__)
+    error = e.__class__.__new__(e.__class__, *e.args)
+    error.__dict__.update(e.__dict__)
+    return error
+
+
+class ResponseCache(object):
+
+    # 公共 GET 接口的响应缓存: 按接口设置 TTL, 同一时刻相同的请求只发一次 (single-flight),
+    # 超过 max_entries 时按 LRU 淘汰; 命中时返回同一个对象, 调用方不要修改
+    def __init__(self, ttls=None, max_entries=c.CACHE_MAX_ENTRIES):
+        # ttls: {路径最后一段: 秒}, 例如 {'ticker': 0.1}; 不在表里的接口不缓存
+        self.ttls = dict(c.CACHE_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._flights = {}
+        # 异步版本的进行中请求: key -> asyncio.Future, 只在同一个事件循环内合并
+        self._async_flights = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def ttl_for(self, request_path):
+        return self.ttls.get(request_path.rstrip('/').rsplit('/', 1)[-1])
+
+    def _lookup(self, key):
+        # 调用方持有锁; 返回 (是否命中, 值)
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() < entry[0]:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+        return False, None
+
+    def _store(self, key, ttl, value):
+        # 调用方持有锁
+        if ttl > 0:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key, ttl, fetch, timeout=None):
+        with self._lock:
+            hit, value = self._lookup(key)
+            if hit:
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if not flight.done.wait(timeout):
+                raise exceptions.OkexTimeoutException(key)
+            if flight.error is not None:
+                raise copy_error(flight.error) from flight.error
+            return flight.value
+
+        try:
+            flight.value = fetch()
+        except BaseException as e:
+            # 失败不缓存, 等待中的调用一起失败
+            flight.error = e if isinstance(e, Exception) else exceptions.OkexRequestException('request aborted: %s' % key)
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.error is None:
+                    self._store(key, ttl, flight.value)
+            flight.done.set()
+        return flight.value
+
+    async def aget(self, key, ttl, fetch, timeout=None):
+        # fetch() 返回协程; 同一事件循环内并发的相同请求只 await 一次
+        with self._lock:
+            hit, value = self._lookup(key)
+            if hit:
+                return value
+            future = self._async_flights.get(key)
+            leader = future is None
+            if leader:
+                future = self._async_flights[key] = asyncio.get_running_loop().create_future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            try:
+                value, error = await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                raise exceptions.OkexTimeoutException(key)
+            if error is not None:
+                raise copy_error(error) from error
+            return value
+
+        value, error = None, None
+        try:
+            value = await fetch()
+        except BaseException as e:
+            # 取消等也通知等待方, 不缓存
+            error = e if isinstance(e, Exception) else exceptions.OkexRequestException('request aborted: %s' % key)
+            raise
+        finally:
+            with self._lock:
+                del self._async_flights[key]
+                if error is None:
+                    self._store(key, ttl, value)
+            future.set_result((value, error))
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'coalesced': self.coalesced,
+                    'evictions': self.evictions, 'entries': len(self._entries)}
+
@@ -1,34 +1,150 @@
-import requests
-import json
+import time
 from . import consts as c, utils, exceptions
+from .session import HttpSession
+from .clock import start_clock
+from . import ratelimit, retry, paginate, metrics as m, codec as jc
 
 
 class Client(object):
 
-    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False):
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False, session=None,
+                 rate_limiter=None, retry_policy=None, breakers=None, metrics=None, codec=None, cache=None,
+                 timeout=c.REQUEST_TIMEOUT, connect_timeout=c.CONNECT_TIMEOUT, read_timeout=c.READ_TIMEOUT, api_url=c.API_URL):
 
         self.API_KEY = api_key
         self.API_SECRET_KEY = api_secret_key
         self.PASSPHRASE = passphrase
+        self.api_url = api_url
         self.use_server_time = use_server_time
         self.first = first
+        self.signer = utils.Signer(api_secret_key)
+        self._open_session(session)
+        # 默认所有 Client 共用进程内的限速器
+        self.rate_limiter = rate_limiter if rate_limiter is not None else ratelimit.default_limiter()
+        self.retry_policy = retry_policy if retry_policy is not None else retry.RetryPolicy()
+        # 熔断按接口族划分, 与限速桶一致
+        self.breakers = breakers if breakers is not None else retry.default_breakers()
+        self.metrics = metrics if metrics is not None else m.default_metrics()
+        # 请求 body 与响应的 JSON 编解码, 默认使用已安装的最快实现
+        self.codec = codec if codec is not None else jc.default_codec()
+        # 公共行情 GET 的 TTL 缓存与并发合并 (cache.ResponseCache), 默认不缓存
+        self.cache = cache
+        # timeout: 单次调用的总时限 (含限速排队与重试), 每个 API 方法可以用 timeout 参数覆盖
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+    def _open_session(self, session):
+        # 传入同一个 session 即可让多个 API 实例复用连接池
+        self.session = session if session is not None else HttpSession()
+        self.clock = start_clock(self.session, self.api_url) if self.use_server_time else None
+
+    def _remaining(self, deadline_at, request_path):
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise exceptions.OkexTimeoutException(request_path)
+        return remaining
+
+    def _cache_ttl(self, method, request_path, cursor):
+        # 只缓存配置了 TTL 的公共 GET, 返回 None 表示不走缓存
+        if not self.cache or method != c.GET or cursor:
+            return None
+        return self.cache.ttl_for(request_path)
+
+    def _request(self, method, request_path, params, cursor=False, timeout=None):
+        ttl = self._cache_ttl(method, request_path, cursor)
+        if ttl is None:
+            return self._call(method, request_path, params, cursor, timeout)
+        key = self.api_url + request_path + utils.parse_params_to_str(params)
+        return self.cache.get(key, ttl, lambda: self._call(method, request_path, params, cursor, timeout),
+                              timeout if timeout is not None else self.timeout)
+
+    def _call(self, method, request_path, params, cursor=False, timeout=None):
+        # 按接口族限速排队, 撤单优先
+        bucket = self.rate_limiter.bucket(method, request_path)
+        priority = ratelimit.priority_of(method, request_path, params)
+        breaker = self.breakers.get(bucket.name)
+        start = time.monotonic()
+        deadline_at = start + (timeout if timeout is not None else self.timeout)
+        retry_deadline_at = min(deadline_at, start + self.retry_policy.deadline)
+        attempt = 0
+        while True:
+            # 熔断期间直接失败, 不再等待超时
+            breaker.check()
+            try:
+                if not bucket.acquire(priority, timeout=self._remaining(deadline_at, request_path)):
+                    raise exceptions.OkexTimeoutException(request_path)
+                remaining = self._remaining(deadline_at, request_path)
+            except BaseException:
+                # 请求没有发出, 不计入熔断, 让出 half-open 的探测名额
+                breaker.release()
+                raise
+            key = self.metrics.begin('okex', method, request_path)
+            sent_at = time.perf_counter()
+            response = None
+            try:
+                response = self._send(method, request_path, params,
+                                       (min(self.connect_timeout, remaining), min(self.read_timeout, remaining)))
+                if response.status_code == 429:
+                    bucket.throttle()
+                result = self._handle_response(response, cursor)
+            except Exception as e:
+                self._observe(key, sent_at, response, e)
+                if retry.is_failure(e):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                delay = self.retry_policy.next_delay(attempt, retry_deadline_at) \
+                    if retry.is_retryable(e, method) else None
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException as e:
+                # KeyboardInterrupt 等, 结果未知, 只让出探测名额
+                self._observe(key, sent_at, response, e)
+                breaker.release()
+                raise
+            self._observe(key, sent_at, response)
+            breaker.record_success()
+            return result
+
+    def _observe(self, key, sent_at, response, error=None):
+        sent = received = 0
+        if response is not None:
+            sent = getattr(response, 'sent_bytes', 0)
+            received = len(response.content)
+        self.metrics.end(key, time.perf_counter() - sent_at, sent, received, error)
+
+    def _send(self, method, request_path, params, timeout):
+        # 获取本地时间, use_server_time 时已由 ClockSync 校正为服务器时间
+        timestamp = utils.get_timestamp(self.clock.offset if self.clock is not None else None)
+
+        url, body, header = self._prepare_request(method, request_path, params, timestamp)
 
-    def _request(self, method, request_path, params, cursor=False):
+        # send request
+        response = None
+        if method == c.GET:
+            response = self.session.get(url, headers=header, timeout=timeout)
+        elif method == c.POST:
+            response = self.session.post(url, data=body, headers=header, timeout=timeout)
+            #response = self.session.post(url, json=body, headers=header)
+        elif method == c.DELETE:
+            response = self.session.delete(url, headers=header, timeout=timeout)
+        # 请求行 + body 的字节数, 供 metrics 统计
+        response.sent_bytes = len(url) + len(body)
+        return response
+
+    def _prepare_request(self, method, request_path, params, timestamp):
         if method == c.GET:
             request_path = request_path + utils.parse_params_to_str(params)
         # url
-        url = c.API_URL + request_path
-
-        # 获取本地时间
-        timestamp = utils.get_timestamp()
+        url = self.api_url + request_path
 
-        # sign & header
-        if self.use_server_time:
-            # 获取服务器时间接口
-            timestamp = self._get_timestamp()
-
-        body = json.dumps(params) if method == c.POST else ""
-        sign = utils.sign(utils.pre_hash(timestamp, method, request_path, str(body)), self.API_SECRET_KEY)
+        # body 只序列化一次, 签名和发送使用同一份 bytes
+        body = self.codec.dumps(params) if method == c.POST else b''
+        sign = self.signer.sign(timestamp, method, request_path, body)
         header = utils.get_header(self.API_KEY, sign, timestamp, self.PASSPHRASE)
 
         if self.first:
@@ -38,17 +154,9 @@ class Client(object):
         # print("url:", url)
         # print("headers:", header)
         # print("body:", body)
+        return url, body, header
 
-        # send request
-        response = None
-        if method == c.GET:
-            response = requests.get(url, headers=header)
-        elif method == c.POST:
-            response = requests.post(url, data=body, headers=header)
-            #response = requests.post(url, json=body, headers=header)
-        elif method == c.DELETE:
-            response = requests.delete(url, headers=header)
-
+    def _handle_response(self, response, cursor=False):
         # exception handle
         if not str(response.status_code).startswith('2'):
             raise exceptions.OkexAPIException(response)
@@ -61,23 +169,19 @@ class Client(object):
                     r['after'] = res_header['OK-AFTER']
                 except:
                     pass
-                return response.json(), r
+                return self.codec.loads(response.content), r
             else:
-                return response.json()
+                return self.codec.loads(response.content)
 
         except ValueError:
             raise exceptions.OkexRequestException('Invalid Response: %s' % response.text)
 
-    def _request_without_params(self, method, request_path):
-        return self._request(method, request_path, {})
+    def _request_without_params(self, method, request_path, timeout=None):
+        return self._request(method, request_path, {}, timeout=timeout)
 
-    def _request_with_params(self, method, request_path, params, cursor=False):
-        return self._request(method, request_path, params, cursor)
+    def _request_with_params(self, method, request_path, params, cursor=False, timeout=None):
+        return self._request(method, request_path, params, cursor, timeout)
 
-    def _get_timestamp(self):
-        url = c.API_URL + c.SERVER_TIMESTAMP_URL
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.json()['iso']
-        else:
-            return ""
+    def _paginate(self, fetch, after='', prefetch=1):
+        # fetch 为带 cursor=True 的查询方法 (已绑定除 after 外的参数), 逐条返回记录
+        return paginate.iter_items(fetch, after, prefetch)
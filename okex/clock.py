@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+from . import consts as c
+from .session import HttpSession
+
+
+class ClockSync(object):
+
+    # 定时测量本地与服务器的时钟偏移 (NTP 方式, 取往返时间最短的样本并按 RTT/2 补偿),
+    # Client 签名时把 offset 传给 utils.get_timestamp, 热路径上不再请求服务器时间
+    def __init__(self, session=None, interval=c.CLOCK_SYNC_INTERVAL, samples=c.CLOCK_SYNC_SAMPLES,
+                 api_url=c.API_URL):
+        self.session = session if session is not None else HttpSession()
+        self.api_url = api_url
+        self.interval = interval
+        self.samples = samples
+        self.offset = 0.0
+        self.rtt = None
+        self.last_sync = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        # 首次同步只做一次: 后台线程和 start(wait=True) 的调用方谁先拿到锁谁做, 其余的等它完成
+        self._first_lock = threading.Lock()
+
+    def _sample(self):
+        t0 = time.time()
+        response = self.session.get(self.api_url + c.SERVER_TIMESTAMP_URL, timeout=(c.CONNECT_TIMEOUT, c.READ_TIMEOUT))
+        t1 = time.time()
+        if response.status_code != 200:
+            return None
+        server = float(response.json()['epoch'])
+        return server - (t0 + t1) / 2, t1 - t0
+
+    def sync(self):
+        best = None
+        for _ in range(self.samples):
+            try:
+                s = self._sample()
+            except Exception as e:
+                logging.warning('clock sync failed: %s', e)
+                continue
+            if s is not None and (best is None or s[1] < best[1]):
+                best = s
+        if best is None:
+            return False
+        self.offset, self.rtt = best
+        self.last_sync = time.time()
+        return True
+
+    def _first_sync(self):
+        with self._first_lock:
+            if self.last_sync is None:
+                self.sync()
+
+    def _run(self):
+        self._first_sync()
+        while not self._stop.wait(self.interval):
+            self.sync()
+
+    def start(self, wait=True):
+        # wait: 等首次同步完成再返回, 保证第一笔签名请求就带上偏移 (线程已由别的 Client 启动时也一样);
+        # 在事件循环里调用时传 False, 由后台线程完成首次同步
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='okex-clock-sync', daemon=True)
+                self._thread.start()
+        if wait:
+            self._first_sync()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+_clocks = {}
+_clock_lock = threading.Lock()
+
+
+def start_clock(session=None, api_url=c.API_URL, wait=True):
+    # 每个 api_url 共享一个时钟同步线程, session 只在第一次创建时使用;
+    # 首次同步 (网络请求) 在锁外等待, 不阻塞其他 api_url 的 Client 创建
+    with _clock_lock:
+        clock = _clocks.get(api_url)
+        if clock is None:
+            clock = _clocks[api_url] = ClockSync(session, api_url=api_url)
+    return clock.start(wait)
@@ -0,0 +1,54 @@
+import json
+import threading
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class JsonCodec(object):
+
+    # 标准库实现: dumps 返回 bytes, 同一份 bytes 既用于签名又作为请求 body 发送
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+
+    name = 'orjson'
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+CODECS = {'json': JsonCodec}
+if orjson is not None:
+    CODECS['orjson'] = OrjsonCodec
+
+
+def get_codec(name=None):
+    # 不指定时优先使用已安装的快速实现
+    if name is None:
+        name = 'orjson' if 'orjson' in CODECS else 'json'
+    return CODECS[name]()
+
+
+_codec = None
+_codec_lock = threading.Lock()
+
+
+def default_codec():
+    global _codec
+    with _codec_lock:
+        if _codec is None:
+            _codec = get_codec()
+        return _codec
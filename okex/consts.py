@@ -20,6 +20,79 @@ DELETE = "DELETE"
 
 SERVER_TIMESTAMP_URL = '/api/general/v3/time'
 
+# timeout (秒): REQUEST_TIMEOUT 为一次调用的总时限, 包含排队与重试
+CONNECT_TIMEOUT = 3
+READ_TIMEOUT = 5
+REQUEST_TIMEOUT = 10
+
+# connection pool
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 10
+POOL_IDLE_TIMEOUT = 60
+
+# batch endpoints: 每个请求最多 10 笔
+BATCH_ORDER_LIMIT = 10
+BATCH_CANCEL_LIMIT = 10
+
+# rate limit: (接口族, 方法, path 前缀, 每秒请求数, 突发容量), 按顺序匹配
+RATE_LIMITS = [
+    ('swap_cancel', POST, '/api/swap/v3/cancel', 20, 40),
+    ('swap_order', POST, '/api/swap/v3/order', 20, 40),
+    ('swap_market', GET, '/api/swap/v3/instruments', 10, 20),
+    ('futures_cancel', POST, '/api/futures/v3/cancel', 20, 40),
+    ('futures_order', POST, '/api/futures/v3/order', 20, 40),
+    ('futures_market', GET, '/api/futures/v3/instruments', 10, 20),
+    ('spot_cancel', POST, '/api/spot/v3/cancel', 50, 100),
+    ('spot_order', POST, '/api/spot/v3/', 50, 100),
+    ('spot_market', GET, '/api/spot/v3/instruments', 10, 20),
+]
+DEFAULT_RATE_LIMIT = (10, 20)
+
+# retry & circuit breaker
+RETRY_MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.1
+RETRY_MAX_DELAY = 1
+RETRY_DEADLINE = 3
+# 30014/30026: 请求太频繁; 30030: 请求接口失败, 请重试
+RETRY_THROTTLE_CODES = ('30014', '30026')
+RETRY_ERROR_CODES = ('30030',)
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 10
+
+# server clock sync
+CLOCK_SYNC_INTERVAL = 60
+CLOCK_SYNC_SAMPLES = 5
+
+# websocket
+WS_URL = 'wss://real.okex.com:8443/ws/v3'
+WS_PING_INTERVAL = 25
+WS_RECONNECT_WAIT = 1
+WS_SWAP_TICKER = 'swap/ticker'
+WS_FUTURE_TICKER = 'futures/ticker'
+
+# kline 下载: v3 candles 接口每次最多返回 200 根, 本地缓存目录与并发数
+KLINE_LIMIT = 200
+KLINE_CACHE_DIR = 'klines'
+KLINE_WORKERS = 4
+
+# metrics: 延迟直方图的桶 (秒) 和本地导出端口
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 9108
+
+# 公共行情 GET 的响应缓存, 按路径最后一段设置 TTL (秒), 不在表里的接口不缓存
+CACHE_TTLS = {
+    'ticker': 0.1,
+    'mark_price': 1,
+    'index': 1,
+    'price_limit': 1,
+    'estimated_price': 1,
+    'open_interest': 1,
+    'funding_time': 30,
+    'instruments': 3600,
+}
+CACHE_MAX_ENTRIES = 1024
+
 # account
 WALLET_INFO = '/api/account/v3/wallet'
 CURRENCY_INFO = '/api/account/v3/wallet/'
@@ -0,0 +1,118 @@
+from array import array
+from itertools import accumulate
+from operator import mul
+
+
+class DepthSide(object):
+
+    # 一侧盘口的连续数组: 价格、数量, 以及累计数量和累计成交额 (前缀和), 由近到远排列
+    __slots__ = ('prices', 'sizes', 'cum_sizes', 'cum_notional', 'ascending')
+
+    def __init__(self, levels, ascending):
+        self.prices = array('d', [float(l[0]) for l in levels])
+        self.sizes = array('d', [float(l[1]) for l in levels])
+        self.cum_sizes = array('d', accumulate(self.sizes))
+        self.cum_notional = array('d', accumulate(map(mul, self.prices, self.sizes)))
+        self.ascending = ascending
+
+    def __len__(self):
+        return len(self.prices)
+
+    def best(self):
+        return self.prices[0] if self.prices else None
+
+    def total(self):
+        return self.cum_sizes[-1] if self.cum_sizes else 0.0
+
+    def _levels_for_size(self, size):
+        # 累计数量第一次达到 size 的档位下标
+        cum = self.cum_sizes
+        lo, hi = 0, len(cum)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if cum[mid] < size:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _levels_within(self, limit):
+        # 价格不差于 limit 的档位个数
+        prices = self.prices
+        lo, hi = 0, len(prices)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if (prices[mid] <= limit) if self.ascending else (prices[mid] >= limit):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def vwap(self, size):
+        # 吃掉 size 数量的成交均价, 深度不够时返回 None
+        if size <= 0 or not self.prices:
+            return None
+        i = self._levels_for_size(size)
+        if i >= len(self.prices):
+            return None
+        before_size = self.cum_sizes[i - 1] if i else 0.0
+        before_notional = self.cum_notional[i - 1] if i else 0.0
+        return (before_notional + (size - before_size) * self.prices[i]) / size
+
+    def size_within(self, limit):
+        # 价格不差于 limit 的累计数量
+        n = self._levels_within(limit)
+        return self.cum_sizes[n - 1] if n else 0.0
+
+    def size_within_bps(self, bps):
+        best = self.best()
+        if best is None:
+            return 0.0
+        limit = best * (1 + bps / 10000.0) if self.ascending else best * (1 - bps / 10000.0)
+        return self.size_within(limit)
+
+    def size_at_levels(self, levels):
+        n = min(levels, len(self.cum_sizes))
+        return self.cum_sizes[n - 1] if n else 0.0
+
+
+class Depth(object):
+
+    # get_depth 返回值的数组形式, asks 价格升序, bids 价格降序
+    __slots__ = ('asks', 'bids', 'time')
+
+    def __init__(self, data):
+        self.asks = DepthSide(data.get('asks', ()), True)
+        self.bids = DepthSide(data.get('bids', ()), False)
+        self.time = data.get('time') or data.get('timestamp')
+
+    def mid(self):
+        if not self.asks.prices or not self.bids.prices:
+            return None
+        return (self.asks.prices[0] + self.bids.prices[0]) / 2
+
+    def microprice(self):
+        # 按买一/卖一数量加权的公允价
+        if not self.asks.prices or not self.bids.prices:
+            return None
+        ask, bid = self.asks.prices[0], self.bids.prices[0]
+        ask_size, bid_size = self.asks.sizes[0], self.bids.sizes[0]
+        if ask_size + bid_size <= 0:
+            return (ask + bid) / 2
+        return (bid * ask_size + ask * bid_size) / (ask_size + bid_size)
+
+    def imbalance(self, levels=None, bps=None):
+        # (买量 - 卖量) / (买量 + 卖量), 取前 levels 档或距最优价 bps 以内, 都不传时取全部
+        if bps is not None:
+            bid, ask = self.bids.size_within_bps(bps), self.asks.size_within_bps(bps)
+        elif levels is not None:
+            bid, ask = self.bids.size_at_levels(levels), self.asks.size_at_levels(levels)
+        else:
+            bid, ask = self.bids.total(), self.asks.total()
+        if bid + ask <= 0:
+            return 0.0
+        return (bid - ask) / (bid + ask)
+
+
+def parse_depth(data):
+    return Depth(data)
@@ -44,3 +44,17 @@ class OkexParamsException(Exception):
 
     def __str__(self):
         return 'OkexParamsException: %s' % self.message
+
+
+class OkexCircuitOpenException(OkexRequestException):
+
+    def __init__(self, name):
+        OkexRequestException.__init__(self, 'circuit open for %s' % name)
+        self.name = name
+
+
+class OkexTimeoutException(OkexRequestException):
+
+    def __init__(self, request_path):
+        OkexRequestException.__init__(self, 'deadline exceeded for %s' % request_path)
+        self.request_path = request_path
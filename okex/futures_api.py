@@ -1,43 +1,44 @@
+import functools
 from .client import Client
 from .consts import *
 
 
 class FutureAPI(Client):
 
-    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False):
-        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first)
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False, **kwargs):
+        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first, **kwargs)
 
     # query position
-    def get_position(self):
-        return self._request_without_params(GET, FUTURE_POSITION)
+    def get_position(self, timeout=None):
+        return self._request_without_params(GET, FUTURE_POSITION, timeout=timeout)
 
     # query specific position
-    def get_specific_position(self, instrument_id):
-        return self._request_without_params(GET, FUTURE_SPECIFIC_POSITION + str(instrument_id) + '/position')
+    def get_specific_position(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, FUTURE_SPECIFIC_POSITION + str(instrument_id) + '/position', timeout=timeout)
 
     # query accounts info
-    def get_accounts(self):
-        return self._request_without_params(GET, FUTURE_ACCOUNTS)
+    def get_accounts(self, timeout=None):
+        return self._request_without_params(GET, FUTURE_ACCOUNTS, timeout=timeout)
 
     # query coin account info
-    def get_coin_account(self, underlying):
-        return self._request_without_params(GET, FUTURE_COIN_ACCOUNT + str(underlying))
+    def get_coin_account(self, underlying, timeout=None):
+        return self._request_without_params(GET, FUTURE_COIN_ACCOUNT + str(underlying), timeout=timeout)
 
     # query leverage
-    def get_leverage(self, underlying):
-        return self._request_without_params(GET, FUTURE_GET_LEVERAGE + str(underlying) + '/leverage')
+    def get_leverage(self, underlying, timeout=None):
+        return self._request_without_params(GET, FUTURE_GET_LEVERAGE + str(underlying) + '/leverage', timeout=timeout)
 
     # set leverage
-    def set_leverage(self, underlying, leverage, instrument_id='', direction=''):
+    def set_leverage(self, underlying, leverage, instrument_id='', direction='', timeout=None):
         params = {'leverage': leverage}
         if instrument_id:
             params['instrument_id'] = instrument_id
         if direction:
             params['direction'] = direction
-        return self._request_with_params(POST, FUTURE_SET_LEVERAGE + str(underlying) + '/leverage', params)
+        return self._request_with_params(POST, FUTURE_SET_LEVERAGE + str(underlying) + '/leverage', params, timeout=timeout)
 
     # query ledger
-    def get_ledger(self, underlying, after='', before='', limit='', type=''):
+    def get_ledger(self, underlying, after='', before='', limit='', type='', timeout=None):
         params = {}
         if after:
             params['after'] = after
@@ -47,37 +48,42 @@ class FutureAPI(Client):
             params['limit'] = limit
         if type:
             params['type'] = type
-        return self._request_with_params(GET, FUTURE_LEDGER + str(underlying) + '/ledger', params, cursor=True)
+        return self._request_with_params(GET, FUTURE_LEDGER + str(underlying) + '/ledger', params, cursor=True, timeout=timeout)
+
+    # 按游标逐条遍历账单, 后台预取下一页
+    def iter_ledger(self, underlying, after='', limit='', type='', prefetch=1, timeout=None):
+        return self._paginate(functools.partial(self.get_ledger, underlying, limit=limit, type=type, timeout=timeout),
+                              after, prefetch)
 
     # take order
-    def take_order(self, instrument_id, type, price, size, client_oid='', order_type='0', match_price='0'):
+    def take_order(self, instrument_id, type, price, size, client_oid='', order_type='0', match_price='0', timeout=None):
         params = {'client_oid': client_oid, 'instrument_id': instrument_id, 'type': type, 'order_type': order_type, 'price': price, 'size': size, 'match_price': match_price}
-        return self._request_with_params(POST, FUTURE_ORDER, params)
+        return self._request_with_params(POST, FUTURE_ORDER, params, timeout=timeout)
 
     # take orders
-    def take_orders(self, instrument_id, orders_data):
+    def take_orders(self, instrument_id, orders_data, timeout=None):
         params = {'instrument_id': instrument_id, 'orders_data': orders_data}
-        return self._request_with_params(POST, FUTURE_ORDERS, params)
+        return self._request_with_params(POST, FUTURE_ORDERS, params, timeout=timeout)
 
     # revoke order
-    def revoke_order(self, instrument_id, order_id='', client_oid=''):
+    def revoke_order(self, instrument_id, order_id='', client_oid='', timeout=None):
         if order_id:
-            return self._request_without_params(POST, FUTURE_REVOKE_ORDER + str(instrument_id) + '/' + str(order_id))
+            return self._request_without_params(POST, FUTURE_REVOKE_ORDER + str(instrument_id) + '/' + str(order_id), timeout=timeout)
         elif client_oid:
-            return self._request_without_params(POST, FUTURE_REVOKE_ORDER + str(instrument_id) + '/' + str(client_oid))
+            return self._request_without_params(POST, FUTURE_REVOKE_ORDER + str(instrument_id) + '/' + str(client_oid), timeout=timeout)
 
     # revoke orders
 
-    def revoke_orders(self, instrument_id, order_ids='', client_oids=''):
+    def revoke_orders(self, instrument_id, order_ids='', client_oids='', timeout=None):
         params = {}
         if order_ids:
             params = {'order_ids': order_ids}
         elif client_oids:
             params = {'client_oids': client_oids}
-        return self._request_with_params(POST, FUTURE_REVOKE_ORDERS + str(instrument_id), params)
+        return self._request_with_params(POST, FUTURE_REVOKE_ORDERS + str(instrument_id), params, timeout=timeout)
 
     # query order list
-    def get_order_list(self, instrument_id, state, after='', before='', limit=''):
+    def get_order_list(self, instrument_id, state, after='', before='', limit='', timeout=None):
         params = {'state': state}
         if after:
             params['after'] = after
@@ -85,17 +91,21 @@ class FutureAPI(Client):
             params['before'] = before
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, FUTURE_ORDERS_LIST + str(instrument_id), params, cursor=True)
+        return self._request_with_params(GET, FUTURE_ORDERS_LIST + str(instrument_id), params, cursor=True, timeout=timeout)
+
+    def iter_order_list(self, instrument_id, state, after='', limit='', prefetch=1, timeout=None):
+        return self._paginate(functools.partial(self.get_order_list, instrument_id, state, limit=limit, timeout=timeout),
+                              after, prefetch)
 
     # query order info
-    def get_order_info(self, instrument_id, order_id='', client_oid=''):
+    def get_order_info(self, instrument_id, order_id='', client_oid='', timeout=None):
         if order_id:
-            return self._request_without_params(GET, FUTURE_ORDER_INFO + str(instrument_id) + '/' + str(order_id))
+            return self._request_without_params(GET, FUTURE_ORDER_INFO + str(instrument_id) + '/' + str(order_id), timeout=timeout)
         elif client_oid:
-            return self._request_without_params(GET, FUTURE_ORDER_INFO + str(instrument_id) + '/' + str(client_oid))
+            return self._request_without_params(GET, FUTURE_ORDER_INFO + str(instrument_id) + '/' + str(client_oid), timeout=timeout)
 
     # query fills
-    def get_fills(self, instrument_id, order_id='', after='', before='', limit=''):
+    def get_fills(self, instrument_id, order_id='', after='', before='', limit='', timeout=None):
         params = {'instrument_id': instrument_id}
         if order_id:
             params['order_id'] = order_id
@@ -105,25 +115,29 @@ class FutureAPI(Client):
             params['before'] = before
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, FUTURE_FILLS, params, cursor=True)
+        return self._request_with_params(GET, FUTURE_FILLS, params, cursor=True, timeout=timeout)
+
+    def iter_fills(self, instrument_id, order_id='', after='', limit='', prefetch=1, timeout=None):
+        return self._paginate(functools.partial(self.get_fills, instrument_id, order_id, limit=limit, timeout=timeout),
+                              after, prefetch)
 
     # set margin_mode
-    def set_margin_mode(self, underlying, margin_mode):
+    def set_margin_mode(self, underlying, margin_mode, timeout=None):
         params = {'underlying': underlying, 'margin_mode': margin_mode}
-        return self._request_with_params(POST, FUTURE_MARGIN_MODE, params)
+        return self._request_with_params(POST, FUTURE_MARGIN_MODE, params, timeout=timeout)
 
     # close_position
-    def close_position(self, instrument_id, direction):
+    def close_position(self, instrument_id, direction, timeout=None):
         params = {'instrument_id': instrument_id, 'direction': direction}
-        return self._request_with_params(POST, FUTURE_CLOSE_POSITION, params)
+        return self._request_with_params(POST, FUTURE_CLOSE_POSITION, params, timeout=timeout)
 
     # cancel_all
-    def cancel_all(self, instrument_id, direction):
+    def cancel_all(self, instrument_id, direction, timeout=None):
         params = {'instrument_id': instrument_id, 'direction': direction}
-        return self._request_with_params(POST, FUTURE_CANCEL_ALL, params)
+        return self._request_with_params(POST, FUTURE_CANCEL_ALL, params, timeout=timeout)
 
     # take order_algo
-    def take_order_algo(self, instrument_id, type, order_type, size, trigger_price='', algo_price='', algo_type='', callback_rate='', algo_variance='', avg_amount='', price_limit='', sweep_range='', sweep_ratio='', single_limit='', time_interval=''):
+    def take_order_algo(self, instrument_id, type, order_type, size, trigger_price='', algo_price='', algo_type='', callback_rate='', algo_variance='', avg_amount='', price_limit='', sweep_range='', sweep_ratio='', single_limit='', time_interval='', timeout=None):
         params = {'instrument_id': instrument_id, 'type': type, 'order_type': order_type, 'size': size}
         if order_type == '1': # 止盈止损参数（最多同时存在10单）
             params['trigger_price'] = trigger_price
@@ -143,15 +157,15 @@ class FutureAPI(Client):
             params['single_limit'] = single_limit
             params['price_limit'] = price_limit
             params['time_interval'] = time_interval
-        return self._request_with_params(POST, FUTURE_ORDER_ALGO, params)
+        return self._request_with_params(POST, FUTURE_ORDER_ALGO, params, timeout=timeout)
 
     # cancel_algos
-    def cancel_algos(self, instrument_id, algo_ids, order_type):
+    def cancel_algos(self, instrument_id, algo_ids, order_type, timeout=None):
         params = {'instrument_id': instrument_id, 'algo_ids': algo_ids, 'order_type': order_type}
-        return self._request_with_params(POST, FUTURE_CANCEL_ALGOS, params)
+        return self._request_with_params(POST, FUTURE_CANCEL_ALGOS, params, timeout=timeout)
 
     # get order_algos
-    def get_order_algos(self, instrument_id, order_type, status='', algo_id='', before='', after='', limit=''):
+    def get_order_algos(self, instrument_id, order_type, status='', algo_id='', before='', after='', limit='', timeout=None):
         params = {'order_type': order_type}
         if status:
             params['status'] = status
@@ -163,30 +177,30 @@ class FutureAPI(Client):
             params['after'] = after
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, FUTURE_GET_ORDER_ALGOS + str(instrument_id), params)
+        return self._request_with_params(GET, FUTURE_GET_ORDER_ALGOS + str(instrument_id), params, timeout=timeout)
 
-    def get_trade_fee(self):
-        return self._request_without_params(GET, FUTURE_TRADE_FEE)
+    def get_trade_fee(self, timeout=None):
+        return self._request_without_params(GET, FUTURE_TRADE_FEE, timeout=timeout)
 
     # get products info
-    def get_products(self):
-        return self._request_without_params(GET, FUTURE_PRODUCTS_INFO)
+    def get_products(self, timeout=None):
+        return self._request_without_params(GET, FUTURE_PRODUCTS_INFO, timeout=timeout)
 
     # get depth
-    def get_depth(self, instrument_id, size='', depth=''):
+    def get_depth(self, instrument_id, size='', depth='', timeout=None):
         params = {'size': size, 'depth': depth}
-        return self._request_with_params(GET, FUTURE_DEPTH + str(instrument_id) + '/book', params)
+        return self._request_with_params(GET, FUTURE_DEPTH + str(instrument_id) + '/book', params, timeout=timeout)
 
     # get ticker
-    def get_ticker(self):
-        return self._request_without_params(GET, FUTURE_TICKER)
+    def get_ticker(self, timeout=None):
+        return self._request_without_params(GET, FUTURE_TICKER, timeout=timeout)
 
     # get specific ticker
-    def get_specific_ticker(self, instrument_id):
-        return self._request_without_params(GET, FUTURE_SPECIFIC_TICKER + str(instrument_id) + '/ticker')
+    def get_specific_ticker(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, FUTURE_SPECIFIC_TICKER + str(instrument_id) + '/ticker', timeout=timeout)
 
     # query trades
-    def get_trades(self, instrument_id, after='', before='', limit=''):
+    def get_trades(self, instrument_id, after='', before='', limit='', timeout=None):
         params = {}
         if after:
             params['after'] = after
@@ -194,40 +208,40 @@ class FutureAPI(Client):
             params['before'] = before
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, FUTURE_TRADES + str(instrument_id) + '/trades', params, cursor=True)
+        return self._request_with_params(GET, FUTURE_TRADES + str(instrument_id) + '/trades', params, cursor=True, timeout=timeout)
 
     # query k-line
-    def get_kline(self, instrument_id, granularity='', start='', end=''):
+    def get_kline(self, instrument_id, granularity='', start='', end='', timeout=None):
         params = {'granularity': granularity, 'start': start, 'end': end}
         # 按时间倒叙 即由结束时间到开始时间
-        return self._request_with_params(GET, FUTURE_KLINE + str(instrument_id) + '/candles', params)
+        return self._request_with_params(GET, FUTURE_KLINE + str(instrument_id) + '/candles', params, timeout=timeout)
 
         # 按时间正序 即由开始时间到结束时间
         # data = self._request_with_params(GET, FUTURE_KLINE + str(instrument_id) + '/candles', params)
         # return list(reversed(data))
 
     # query index
-    def get_index(self, instrument_id):
-        return self._request_without_params(GET, FUTURE_INDEX + str(instrument_id) + '/index')
+    def get_index(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, FUTURE_INDEX + str(instrument_id) + '/index', timeout=timeout)
 
     # query rate
-    def get_rate(self):
-        return self._request_without_params(GET, FUTURE_RATE)
+    def get_rate(self, timeout=None):
+        return self._request_without_params(GET, FUTURE_RATE, timeout=timeout)
 
     # query estimate price
-    def get_estimated_price(self, instrument_id):
-        return self._request_without_params(GET, FUTURE_ESTIMAT_PRICE + str(instrument_id) + '/estimated_price')
+    def get_estimated_price(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, FUTURE_ESTIMAT_PRICE + str(instrument_id) + '/estimated_price', timeout=timeout)
 
     # query the total platform of the platform
-    def get_holds(self, instrument_id):
-        return self._request_without_params(GET, FUTURE_HOLDS + str(instrument_id) + '/open_interest')
+    def get_holds(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, FUTURE_HOLDS + str(instrument_id) + '/open_interest', timeout=timeout)
 
     # query limit price
-    def get_limit(self, instrument_id):
-        return self._request_without_params(GET, FUTURE_LIMIT + str(instrument_id) + '/price_limit')
+    def get_limit(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, FUTURE_LIMIT + str(instrument_id) + '/price_limit', timeout=timeout)
 
     # query limit price
-    def get_liquidation(self, instrument_id, status, limit='', froms='', to=''):
+    def get_liquidation(self, instrument_id, status, limit='', froms='', to='', timeout=None):
         params = {'status': status}
         if limit:
             params['limit'] = limit
@@ -235,28 +249,28 @@ class FutureAPI(Client):
             params['from'] = froms
         if to:
             params['to'] = to
-        return self._request_with_params(GET, FUTURE_LIQUIDATION + str(instrument_id) + '/liquidation', params)
+        return self._request_with_params(GET, FUTURE_LIQUIDATION + str(instrument_id) + '/liquidation', params, timeout=timeout)
 
     # query holds amount
-    def get_holds_amount(self, instrument_id):
-        return self._request_without_params(GET, HOLD_AMOUNT + str(instrument_id) + '/holds')
+    def get_holds_amount(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, HOLD_AMOUNT + str(instrument_id) + '/holds', timeout=timeout)
 
     # query mark price
-    def get_mark_price(self, instrument_id):
-        return self._request_without_params(GET, FUTURE_MARK + str(instrument_id) + '/mark_price')
+    def get_mark_price(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, FUTURE_MARK + str(instrument_id) + '/mark_price', timeout=timeout)
 
     # set auto margin
-    def set_auto_margin(self, underlying, type):
+    def set_auto_margin(self, underlying, type, timeout=None):
         params = {'underlying': underlying, 'type': type}
-        return self._request_with_params(POST, FUTURE_AUTO_MARGIN, params)
+        return self._request_with_params(POST, FUTURE_AUTO_MARGIN, params, timeout=timeout)
 
     # change margin
-    def change_margin(self, instrument_id, direction, type, amount):
+    def change_margin(self, instrument_id, direction, type, amount, timeout=None):
         params = {'instrument_id': instrument_id, 'direction': direction, 'type': type, 'amount': amount}
-        return self._request_with_params(POST, FUTURE_CHANGE_MARGIN, params)
+        return self._request_with_params(POST, FUTURE_CHANGE_MARGIN, params, timeout=timeout)
 
     # get history settlement
-    def get_history_settlement(self, instrument_id, start='', limit='', end=''):
+    def get_history_settlement(self, instrument_id, start='', limit='', end='', timeout=None):
         params = {'instrument_id': instrument_id}
         if start:
             params['start'] = start
@@ -264,4 +278,4 @@ class FutureAPI(Client):
             params['limit'] = limit
         if end:
             params['end'] = end
-        return self._request_with_params(GET, FUTURE_HISTORY_SETTLEMENT, params)
+        return self._request_with_params(GET, FUTURE_HISTORY_SETTLEMENT, params, timeout=timeout)
@@ -0,0 +1,182 @@
+import bisect
+import datetime
+import json
+import logging
+import math
+import os
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from . import consts as c
+
+# 每列一个文件, 按时间升序存放; ts 为 UTC 秒
+COLUMNS = ('ts', 'open', 'high', 'low', 'close', 'volume', 'currency_volume')
+TYPECODES = {'ts': 'q'}
+
+
+def to_epoch(t):
+    # 支持 UTC 秒、datetime 和 ISO 8601 字符串
+    if isinstance(t, datetime.datetime):
+        if t.tzinfo is None:
+            t = t.replace(tzinfo=datetime.timezone.utc)
+        return int(t.timestamp())
+    if isinstance(t, str):
+        return to_epoch(datetime.datetime.fromisoformat(t.replace('Z', '+00:00')))
+    return int(t)
+
+
+def to_iso(ts):
+    return datetime.datetime.utcfromtimestamp(ts).isoformat('T', 'milliseconds') + 'Z'
+
+
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_ranges(covered, start, end):
+    # [start, end) 中不在 covered 里的区间
+    missing = []
+    for s, e in merge_ranges(covered):
+        if e <= start or s >= end:
+            continue
+        if s > start:
+            missing.append((start, s))
+        start = max(start, e)
+    if start < end:
+        missing.append((start, end))
+    return missing
+
+
+def windows(ranges, granularity, limit):
+    # 按每次请求最多 limit 根切分
+    step = granularity * limit
+    for start, end in ranges:
+        while start < end:
+            yield start, min(start + step, end)
+            start += step
+
+
+def returned_range(rows, granularity, window, closed):
+    # 按实际返回的 K 线记录已下载区间: 接口每次最多返回 limit 根, 且只保留最近一段历史,
+    # 截断或为空的部分不算已下载, 下次再请求; 返回 None 表示没有可记录的区间
+    if not rows:
+        return None
+    start, end = window
+    end = min(end, closed)
+    # 整个窗口都返回了时按窗口记录, 否则只记录返回的时间戳覆盖的范围
+    if len(rows) < -(-(end - start) // granularity):
+        start, end = max(start, min(rows)), min(end, max(rows) + granularity)
+    return (start, end) if start < end else None
+
+
+class KlineCache(object):
+
+    # 历史 K 线下载器: 缺失的时间段按窗口并发请求 (受 Client 的限速约束),
+    # 结果按合约和周期存成列式文件, 已下载过的区间不再请求
+    def __init__(self, api, cache_dir=c.KLINE_CACHE_DIR, max_workers=c.KLINE_WORKERS, limit=c.KLINE_LIMIT):
+        # api: 任意带 get_kline(instrument_id, granularity=, start=, end=) 的 API 实例
+        self.api = api
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.limit = limit
+        self._lock = threading.Lock()
+
+    def _dir(self, instrument_id, granularity):
+        return os.path.join(self.cache_dir, str(instrument_id), str(granularity))
+
+    def _ranges(self, instrument_id, granularity):
+        path = os.path.join(self._dir(instrument_id, granularity), 'ranges.json')
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return [tuple(r) for r in json.load(f)]
+
+    def load(self, instrument_id, granularity, start=None, end=None):
+        # 返回 {列名: array}, 可按 [start, end) 截取
+        d = self._dir(instrument_id, granularity)
+        columns = {}
+        for name in COLUMNS:
+            a = array(TYPECODES.get(name, 'd'))
+            path = os.path.join(d, name + '.bin')
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    a.frombytes(f.read())
+            columns[name] = a
+        if start is None and end is None:
+            return columns
+        ts = columns['ts']
+        lo = 0 if start is None else bisect.bisect_left(ts, to_epoch(start))
+        hi = len(ts) if end is None else bisect.bisect_left(ts, to_epoch(end))
+        return dict((name, a[lo:hi]) for name, a in columns.items())
+
+    def _save(self, instrument_id, granularity, rows, covered):
+        d = self._dir(instrument_id, granularity)
+        os.makedirs(d, exist_ok=True)
+        old = self.load(instrument_id, granularity)
+        merged = dict(zip(old['ts'], zip(*[old[name] for name in COLUMNS[1:]])))
+        merged.update(rows)
+        keys = sorted(merged)
+        for i, name in enumerate(COLUMNS):
+            a = array(TYPECODES.get(name, 'd'), keys if i == 0 else (merged[k][i - 1] for k in keys))
+            _write(os.path.join(d, name + '.bin'), a.tobytes())
+        ranges = merge_ranges(self._ranges(instrument_id, granularity) + list(covered))
+        _write(os.path.join(d, 'ranges.json'), json.dumps(ranges).encode('utf-8'))
+
+    def _fetch(self, instrument_id, granularity, start, end):
+        data = self.api.get_kline(instrument_id, granularity=granularity, start=to_iso(start), end=to_iso(end))
+        rows = {}
+        for candle in data:
+            ts = to_epoch(candle[0])
+            if start <= ts < end:
+                values = [float(v) for v in candle[1:7]]
+                values += [math.nan] * (len(COLUMNS) - 1 - len(values))
+                rows[ts] = tuple(values)
+        return rows
+
+    def download(self, instrument_id, granularity, start, end):
+        # 只请求缓存里没有的区间, 返回 [start, end) 的 K 线
+        granularity = int(granularity)
+        start = to_epoch(start) // granularity * granularity
+        end = to_epoch(end)
+        with self._lock:
+            todo = list(windows(missing_ranges(self._ranges(instrument_id, granularity), start, end),
+                                granularity, self.limit))
+            if todo:
+                rows = {}
+                covered = []
+                error = None
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    tasks = dict((executor.submit(self._fetch, instrument_id, granularity, s, e), (s, e))
+                                 for s, e in todo)
+                    # 还没走完的当前 K 线不算已下载, 下次会重新请求
+                    closed = int(time.time()) // granularity * granularity
+                    for task in as_completed(tasks):
+                        try:
+                            result = task.result()
+                            rows.update(result)
+                            span = returned_range(result, granularity, tasks[task], closed)
+                            if span is not None:
+                                covered.append(span)
+                        except Exception as e:
+                            logging.error('kline %s %s %s: %s', instrument_id, granularity, tasks[task], e)
+                            error = e
+                # 失败的窗口不记入已下载区间, 下次再补
+                self._save(instrument_id, granularity, rows, covered)
+                if error is not None:
+                    raise error
+        return self.load(instrument_id, granularity, start, end)
+
+
+def _write(path, data):
+    # 先写临时文件再替换, 中途退出不会留下半个文件
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
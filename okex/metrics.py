@@ -0,0 +1,249 @@
+import bisect
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from . import consts as c, exceptions
+
+
+_VERSION = re.compile(r'^v\d+$')
+
+
+def path_label(request_path):
+    # 去掉查询参数, 订单ID 之类带数字的段 (版本号 v1/v3 除外) 统一替换, 避免标签无限增长
+    path = request_path.split('?', 1)[0]
+    parts = []
+    for part in path.split('/'):
+        if part.isalnum() and not _VERSION.match(part) and any(ch.isdigit() for ch in part):
+            part = ':id'
+        parts.append(part)
+    return '/'.join(parts)
+
+
+def error_code(e):
+    if isinstance(e, str):
+        return e
+    if isinstance(e, exceptions.OkexAPIException):
+        return str(e.code)
+    return type(e).__name__
+
+
+class Histogram(object):
+
+    # 固定桶的累计直方图, 调用方负责加锁
+    def __init__(self, buckets=c.METRICS_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for le, n in zip(self.buckets + ('+Inf',), self.counts):
+            total += n
+            yield le, total
+
+
+class EndpointStats(object):
+
+    def __init__(self, buckets):
+        self.latency = Histogram(buckets)
+        self.errors = {}
+        self.sent = 0
+        self.received = 0
+        self.in_flight = 0
+
+
+class Metrics(object):
+
+    # 按 (交易所, method, path) 统计请求延迟、错误码、收发字节数和在途请求数, 另外记录主循环各阶段耗时;
+    # add_limiter 登记的限速器在导出时读取各桶的排队深度和等待时间
+    def __init__(self, buckets=c.METRICS_BUCKETS):
+        self.buckets = buckets
+        self.endpoints = {}
+        self.phases = {}
+        # 交易所 -> ratelimit.RateLimiter; 以及从其他进程汇总来的 (交易所, 桶) -> stats
+        self.limiters = {}
+        self.limiter_stats = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, key):
+        s = self.endpoints.get(key)
+        if s is None:
+            s = self.endpoints[key] = EndpointStats(self.buckets)
+        return s
+
+    def begin(self, exchange, method, path):
+        key = (exchange, method, path_label(path))
+        with self._lock:
+            self._endpoint(key).in_flight += 1
+        return key
+
+    def end(self, key, seconds, sent=0, received=0, error=None):
+        with self._lock:
+            s = self._endpoint(key)
+            s.in_flight -= 1
+            s.latency.observe(seconds)
+            s.sent += sent
+            s.received += received
+            if error is not None:
+                code = error_code(error)
+                s.errors[code] = s.errors.get(code, 0) + 1
+
+    def observe_phase(self, symbol, name, seconds):
+        key = (symbol, name)
+        with self._lock:
+            h = self.phases.get(key)
+            if h is None:
+                h = self.phases[key] = Histogram(self.buckets)
+            h.observe(seconds)
+
+    def add_limiter(self, exchange, limiter):
+        with self._lock:
+            self.limiters[exchange] = limiter
+
+    def _limiters(self):
+        # 调用方持有锁; 汇总来的统计加上本进程限速器的当前值
+        stats = dict((key, dict(s)) for key, s in self.limiter_stats.items())
+        for exchange, limiter in self.limiters.items():
+            for bucket, s in limiter.stats().items():
+                _merge_limiter(stats, (exchange, bucket), s)
+        return stats
+
+    def snapshot(self):
+        # 可 pickle 的当前状态, 用于跨进程汇总
+        with self._lock:
+            return {
+                'limiters': self._limiters(),
+                'endpoints': dict((key, (list(s.latency.counts), s.latency.sum, s.latency.count, dict(s.errors),
+                                         s.sent, s.received, s.in_flight))
+                                  for key, s in self.endpoints.items()),
+                'phases': dict((key, (list(h.counts), h.sum, h.count)) for key, h in self.phases.items())
+            }
+
+    def merge(self, snapshot):
+        with self._lock:
+            for key, (counts, total, count, errors, sent, received, in_flight) in snapshot['endpoints'].items():
+                s = self._endpoint(key)
+                _merge_histogram(s.latency, counts, total, count)
+                for code, n in errors.items():
+                    s.errors[code] = s.errors.get(code, 0) + n
+                s.sent += sent
+                s.received += received
+                s.in_flight += in_flight
+            for key, (counts, total, count) in snapshot['phases'].items():
+                h = self.phases.get(key)
+                if h is None:
+                    h = self.phases[key] = Histogram(self.buckets)
+                _merge_histogram(h, counts, total, count)
+            for key, stats in snapshot.get('limiters', {}).items():
+                _merge_limiter(self.limiter_stats, key, stats)
+
+    def render(self):
+        # Prometheus 文本格式
+        lines = []
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            lines.append('# TYPE http_request_duration_seconds histogram')
+            for (exchange, method, path), s in endpoints:
+                labels = 'exchange="%s",method="%s",path="%s"' % (exchange, method, path)
+                _histogram(lines, 'http_request_duration_seconds', labels, s.latency)
+            lines.append('# TYPE http_request_errors_total counter')
+            for (exchange, method, path), s in endpoints:
+                for code, n in sorted(s.errors.items()):
+                    lines.append('http_request_errors_total{exchange="%s",method="%s",path="%s",code="%s"} %d' %
+                                 (exchange, method, path, code, n))
+            for name, attr, kind in (('http_request_sent_bytes_total', 'sent', 'counter'),
+                                     ('http_request_received_bytes_total', 'received', 'counter'),
+                                     ('http_requests_in_flight', 'in_flight', 'gauge')):
+                lines.append('# TYPE %s %s' % (name, kind))
+                for (exchange, method, path), s in endpoints:
+                    lines.append('%s{exchange="%s",method="%s",path="%s"} %d' %
+                                 (name, exchange, method, path, getattr(s, attr)))
+            lines.append('# TYPE loop_phase_duration_seconds histogram')
+            for (symbol, name), h in sorted(self.phases.items()):
+                _histogram(lines, 'loop_phase_duration_seconds', 'symbol="%s",phase="%s"' % (symbol, name), h)
+            limiters = sorted(self._limiters().items())
+            for name, attr, kind in (('ratelimit_queue_depth', 'queued', 'gauge'),
+                                     ('ratelimit_tokens', 'tokens', 'gauge'),
+                                     ('ratelimit_granted_total', 'granted', 'counter'),
+                                     ('ratelimit_throttled_total', 'throttled', 'counter'),
+                                     ('ratelimit_wait_seconds_total', 'total_wait', 'counter'),
+                                     ('ratelimit_wait_seconds_max', 'max_wait', 'gauge')):
+                lines.append('# TYPE %s %s' % (name, kind))
+                for (exchange, bucket), stats in limiters:
+                    lines.append('%s{exchange="%s",bucket="%s"} %s' % (name, exchange, bucket, _number(stats[attr])))
+        return '\n'.join(lines) + '\n'
+
+
+def _merge_histogram(h, counts, total, count):
+    for i, n in enumerate(counts):
+        h.counts[i] += n
+    h.sum += total
+    h.count += count
+
+
+def _merge_limiter(stats, key, s):
+    # 多个进程的同名桶: 计数和排队相加, 最大等待取最大值
+    m = stats.get(key)
+    if m is None:
+        stats[key] = dict((k, s[k]) for k in ('queued', 'tokens', 'granted', 'throttled', 'total_wait', 'max_wait'))
+        return
+    for k in ('queued', 'tokens', 'granted', 'throttled', 'total_wait'):
+        m[k] += s[k]
+    m['max_wait'] = max(m['max_wait'], s['max_wait'])
+
+
+def _number(value):
+    return '%d' % value if isinstance(value, int) else '%f' % value
+
+
+def _histogram(lines, name, labels, h):
+    for le, n in h.cumulative():
+        lines.append('%s_bucket{%s,le="%s"} %d' % (name, labels, le, n))
+    lines.append('%s_sum{%s} %f' % (name, labels, h.sum))
+    lines.append('%s_count{%s} %d' % (name, labels, h.count))
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+
+    metrics = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(metrics=None, host=c.METRICS_HOST, port=c.METRICS_PORT):
+    # 在后台线程提供 /metrics
+    handler = type('Handler', (MetricsHandler,), {'metrics': metrics if metrics is not None else default_metrics()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def default_metrics():
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
@@ -4,10 +4,10 @@ from .consts import *
 
 class OptionAPI(Client):
 
-    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False):
-        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time)
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, **kwargs):
+        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time, **kwargs)
 
-    def take_order(self, instrument_id, side, price, size, client_oid='', order_type='', match_price=''):
+    def take_order(self, instrument_id, side, price, size, client_oid='', order_type='', match_price='', timeout=None):
         params = {'instrument_id': instrument_id, 'side': side, 'price': price, 'size': size}
         if client_oid:
             params['client_oid'] = client_oid
@@ -15,27 +15,27 @@ class OptionAPI(Client):
             params['order_type'] = order_type
         if match_price:
             params['match_price'] = match_price
-        return self._request_with_params(POST, OPTION_ORDER, params)
+        return self._request_with_params(POST, OPTION_ORDER, params, timeout=timeout)
 
-    def take_orders(self, underlying, order_data):
+    def take_orders(self, underlying, order_data, timeout=None):
         params = {'underlying': underlying, 'order_data': order_data}
-        return self._request_with_params(POST, OPTION_ORDERS, params)
+        return self._request_with_params(POST, OPTION_ORDERS, params, timeout=timeout)
 
-    def revoke_order(self, underlying, order_id='', client_oid=''):
+    def revoke_order(self, underlying, order_id='', client_oid='', timeout=None):
         if order_id:
-            return self._request_without_params(POST, OPTION_CANCEL_ORDER + str(underlying) + '/' + str(order_id))
+            return self._request_without_params(POST, OPTION_CANCEL_ORDER + str(underlying) + '/' + str(order_id), timeout=timeout)
         elif client_oid:
-            return self._request_without_params(POST, OPTION_CANCEL_ORDER + str(underlying) + '/' + str(client_oid))
+            return self._request_without_params(POST, OPTION_CANCEL_ORDER + str(underlying) + '/' + str(client_oid), timeout=timeout)
 
-    def revoke_orders(self, underlying, order_ids='', client_oids=''):
+    def revoke_orders(self, underlying, order_ids='', client_oids='', timeout=None):
         params = {}
         if order_ids:
             params = {'order_ids': order_ids}
         elif client_oids:
             params = {'client_oids': client_oids}
-        return self._request_with_params(POST, OPTION_CANCEL_ORDERS + str(underlying), params)
+        return self._request_with_params(POST, OPTION_CANCEL_ORDERS + str(underlying), params, timeout=timeout)
 
-    def amend_order(self, underlying, order_id='', client_oid='', request_id='', new_size='', new_price=''):
+    def amend_order(self, underlying, order_id='', client_oid='', request_id='', new_size='', new_price='', timeout=None):
         params = {}
         if order_id:
             params['order_id'] = order_id
@@ -47,19 +47,19 @@ class OptionAPI(Client):
             params['new_price'] = new_price
         if request_id:
             params['request_id'] = request_id
-        return self._request_with_params(POST, OPTION_AMEND_ORDER + str(underlying), params)
+        return self._request_with_params(POST, OPTION_AMEND_ORDER + str(underlying), params, timeout=timeout)
 
-    def amend_batch_orders(self, underlying, amend_data):
+    def amend_batch_orders(self, underlying, amend_data, timeout=None):
         params = {'amend_data': amend_data}
-        return self._request_with_params(POST, OPTION_AMEND_BATCH_ORDERS + str(underlying), params)
+        return self._request_with_params(POST, OPTION_AMEND_BATCH_ORDERS + str(underlying), params, timeout=timeout)
 
-    def get_order_info(self, underlying, order_id='', client_oid=''):
+    def get_order_info(self, underlying, order_id='', client_oid='', timeout=None):
         if order_id:
-            return self._request_without_params(GET, OPTION_ORDERS + '/' + str(underlying) + '/' + str(order_id))
+            return self._request_without_params(GET, OPTION_ORDERS + '/' + str(underlying) + '/' + str(order_id), timeout=timeout)
         elif client_oid:
-            return self._request_without_params(GET, OPTION_ORDERS + '/' + str(underlying) + '/' + str(client_oid))
+            return self._request_without_params(GET, OPTION_ORDERS + '/' + str(underlying) + '/' + str(client_oid), timeout=timeout)
 
-    def get_order_list(self, underlying, state, instrument_id='', after='', before='', limit=''):
+    def get_order_list(self, underlying, state, instrument_id='', after='', before='', limit='', timeout=None):
         params = {'state': state}
         if instrument_id:
             params['instrument_id'] = instrument_id
@@ -69,9 +69,9 @@ class OptionAPI(Client):
             params['before'] = before
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, OPTION_ORDERS + '/' + str(underlying), params, cursor=True)
+        return self._request_with_params(GET, OPTION_ORDERS + '/' + str(underlying), params, cursor=True, timeout=timeout)
 
-    def get_fills(self, underlying, order_id='', instrument_id='', after='', before='', limit=''):
+    def get_fills(self, underlying, order_id='', instrument_id='', after='', before='', limit='', timeout=None):
         params = {}
         if order_id:
             params['order_id'] = order_id
@@ -83,18 +83,18 @@ class OptionAPI(Client):
             params['before'] = before
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, OPTION_FILLS + str(underlying), params, cursor=True)
+        return self._request_with_params(GET, OPTION_FILLS + str(underlying), params, cursor=True, timeout=timeout)
 
-    def get_specific_position(self, underlying, instrument_id=''):
+    def get_specific_position(self, underlying, instrument_id='', timeout=None):
         params = {}
         if instrument_id:
             params['instrument_id'] = instrument_id
-        return self._request_with_params(GET, OPTION_POSITION + str(underlying) + '/position', params)
+        return self._request_with_params(GET, OPTION_POSITION + str(underlying) + '/position', params, timeout=timeout)
 
-    def get_underlying_account(self, underlying):
-        return self._request_without_params(GET, OPTION_ACCOUNT + str(underlying))
+    def get_underlying_account(self, underlying, timeout=None):
+        return self._request_without_params(GET, OPTION_ACCOUNT + str(underlying), timeout=timeout)
 
-    def get_ledger(self, underlying, after='', before='', limit=''):
+    def get_ledger(self, underlying, after='', before='', limit='', timeout=None):
         params = {}
         if after:
             params['after'] = after
@@ -102,38 +102,38 @@ class OptionAPI(Client):
             params['before'] = before
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, OPTION_ACCOUNT + str(underlying) + '/ledger', params, cursor=True)
+        return self._request_with_params(GET, OPTION_ACCOUNT + str(underlying) + '/ledger', params, cursor=True, timeout=timeout)
 
-    def get_trade_fee(self):
-        return self._request_without_params(GET, OPTION_TRADE_FEE)
+    def get_trade_fee(self, timeout=None):
+        return self._request_without_params(GET, OPTION_TRADE_FEE, timeout=timeout)
 
-    def get_index(self):
-        return self._request_without_params(GET, OPTION_INDEX)
+    def get_index(self, timeout=None):
+        return self._request_without_params(GET, OPTION_INDEX, timeout=timeout)
 
-    def get_instruments(self, underlying, delivery='', instrument_id=''):
+    def get_instruments(self, underlying, delivery='', instrument_id='', timeout=None):
         params = {}
         if delivery:
             params['delivery'] = delivery
         if instrument_id:
             params['instrument_id'] = instrument_id
-        return self._request_with_params(GET, OPTION_INSTRUMENTS + str(underlying), params)
+        return self._request_with_params(GET, OPTION_INSTRUMENTS + str(underlying), params, timeout=timeout)
 
-    def get_instruments_summary(self, underlying, delivery=''):
+    def get_instruments_summary(self, underlying, delivery='', timeout=None):
         params = {}
         if delivery:
             params['delivery'] = delivery
-        return self._request_with_params(GET, OPTION_INSTRUMENTS + str(underlying) + '/summary', params)
+        return self._request_with_params(GET, OPTION_INSTRUMENTS + str(underlying) + '/summary', params, timeout=timeout)
 
-    def get_option_instruments_summary(self, underlying, instrument_id):
-        return self._request_without_params(GET, OPTION_INSTRUMENTS + str(underlying) + '/summary/' + str(instrument_id))
+    def get_option_instruments_summary(self, underlying, instrument_id, timeout=None):
+        return self._request_without_params(GET, OPTION_INSTRUMENTS + str(underlying) + '/summary/' + str(instrument_id), timeout=timeout)
 
-    def get_depth(self, instrument_id, size=''):
+    def get_depth(self, instrument_id, size='', timeout=None):
         params = {}
         if size:
             params['size'] = size
-        return self._request_with_params(GET, OPTION_INSTRUMENTS + str(instrument_id) + '/book', params)
+        return self._request_with_params(GET, OPTION_INSTRUMENTS + str(instrument_id) + '/book', params, timeout=timeout)
 
-    def get_trades(self, instrument_id, after='', before='', limit=''):
+    def get_trades(self, instrument_id, after='', before='', limit='', timeout=None):
         params = {}
         if after:
             params['after'] = after
@@ -141,12 +141,12 @@ class OptionAPI(Client):
             params['before'] = before
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, OPTION_INSTRUMENTS + str(instrument_id) + '/trades', params, cursor=True)
+        return self._request_with_params(GET, OPTION_INSTRUMENTS + str(instrument_id) + '/trades', params, cursor=True, timeout=timeout)
 
-    def get_specific_ticker(self, instrument_id):
-        return self._request_without_params(GET, OPTION_INSTRUMENTS + str(instrument_id) + '/ticker')
+    def get_specific_ticker(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, OPTION_INSTRUMENTS + str(instrument_id) + '/ticker', timeout=timeout)
 
-    def get_kline(self, instrument_id, start='', end='', granularity=''):
+    def get_kline(self, instrument_id, start='', end='', granularity='', timeout=None):
         params = {}
         if start:
             params['start'] = start
@@ -158,5 +158,5 @@ class OptionAPI(Client):
         # return self._request_with_params(GET, OPTION_INSTRUMENTS + str(instrument_id) + '/candles', params)
 
         # 按时间正序 即由开始时间到结束时间
-        data = self._request_with_params(GET, OPTION_INSTRUMENTS + str(instrument_id) + '/candles', params)
+        data = self._request_with_params(GET, OPTION_INSTRUMENTS + str(instrument_id) + '/candles', params, timeout=timeout)
         return list(reversed(data))
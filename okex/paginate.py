@@ -0,0 +1,122 @@
+import asyncio
+import queue
+import threading
+
+_DONE = object()
+
+
+def items_of(data):
+    # 大部分分页接口直接返回列表, 订单列表返回 {'order_info': [...]}
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        for v in data.values():
+            if isinstance(v, list):
+                return v
+    return []
+
+
+def _next(page, cursor):
+    # 返回 (本页记录, 下一页游标); 空页、没有 OK-AFTER 或游标不再变化时结束
+    data, headers = page
+    items = items_of(data)
+    after = headers.get('after') if headers else None
+    if not items or not after or after == cursor:
+        return items, None
+    return items, after
+
+
+def iter_pages(fetch, after='', prefetch=1):
+    # fetch(after=cursor) 返回 (data, {'before': ..., 'after': ...});
+    # 后台线程最多提前取 prefetch 页, 调用方处理当前页时下一页已经在请求, 内存占用不超过 prefetch + 1 页
+    if prefetch <= 0:
+        cursor = after
+        while True:
+            items, cursor = _next(fetch(after=cursor), cursor)
+            if items:
+                yield items
+            if cursor is None:
+                return
+
+    pages = queue.Queue(prefetch)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        cursor = after
+        try:
+            while not stop.is_set():
+                items, cursor = _next(fetch(after=cursor), cursor)
+                if items and not put(items):
+                    return
+                if cursor is None:
+                    break
+        except Exception as e:
+            put(e)
+            return
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, name='okex-paginate', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = pages.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # 调用方提前退出时让后台线程停下
+        stop.set()
+
+
+def iter_items(fetch, after='', prefetch=1):
+    for items in iter_pages(fetch, after, prefetch):
+        for item in items:
+            yield item
+
+
+async def aiter_pages(fetch, after='', prefetch=1):
+    # 异步版本: fetch(after=cursor) 返回协程, 预取用一个后台 task
+    pages = asyncio.Queue(max(prefetch, 1))
+
+    async def produce():
+        cursor = after
+        try:
+            while True:
+                items, cursor = _next(await fetch(after=cursor), cursor)
+                if items:
+                    await pages.put(items)
+                if cursor is None:
+                    break
+        except Exception as e:
+            await pages.put(e)
+            return
+        await pages.put(_DONE)
+
+    task = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item = await pages.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        task.cancel()
+
+
+async def aiter_items(fetch, after='', prefetch=1):
+    async for items in aiter_pages(fetch, after, prefetch):
+        for item in items:
+            yield item
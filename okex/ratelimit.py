@@ -0,0 +1,174 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from . import consts as c
+
+# 优先级: 数值越小越先拿到令牌
+PRIORITY_CANCEL = 0
+PRIORITY_REDUCE = 1
+PRIORITY_NORMAL = 2
+
+
+def priority_of(method, request_path, params):
+    # 撤单 / 平仓优先于新挂单; 交割和永续的 type 3/4 为平多/平空
+    if 'cancel' in request_path or 'close_position' in request_path:
+        return PRIORITY_CANCEL
+    if method == c.POST and str(params.get('type', '')) in ('3', '4'):
+        return PRIORITY_REDUCE
+    return PRIORITY_NORMAL
+
+
+class TokenBucket(object):
+
+    # 令牌桶 + 按 (优先级, 到达顺序) 排队的等待者
+    def __init__(self, name, rate, capacity):
+        self.name = name
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+        self.cond = threading.Condition(self.lock)
+        self._waiters = []
+        self._seq = itertools.count()
+        # 统计
+        self.granted = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def _enter(self, priority):
+        ticket = (priority, next(self._seq))
+        heapq.heappush(self._waiters, ticket)
+        return ticket
+
+    def _leave(self, ticket):
+        try:
+            self._waiters.remove(ticket)
+            heapq.heapify(self._waiters)
+        except ValueError:
+            pass
+
+    def _poll(self, ticket):
+        # 轮到该等待者且有令牌时返回 0 并消耗令牌, 否则返回建议等待的秒数
+        now = time.monotonic()
+        self._refill(now)
+        if self._waiters[0] == ticket and self.tokens >= 1:
+            heapq.heappop(self._waiters)
+            self.tokens -= 1
+            return 0
+        return max((1 - self.tokens) / self.rate, 0.001)
+
+    def _record(self, waited):
+        self.granted += 1
+        self.total_wait += waited
+        if waited > self.max_wait:
+            self.max_wait = waited
+
+    def acquire(self, priority=PRIORITY_NORMAL, timeout=None):
+        start = time.monotonic()
+        with self.cond:
+            ticket = self._enter(priority)
+            try:
+                while True:
+                    wait = self._poll(ticket)
+                    if wait == 0:
+                        break
+                    if timeout is not None:
+                        left = start + timeout - time.monotonic()
+                        if left <= 0:
+                            self._leave(ticket)
+                            return False
+                        wait = min(wait, left)
+                    self.cond.wait(wait)
+            finally:
+                # 队首变化, 唤醒其余等待者重新检查
+                self.cond.notify_all()
+            self._record(time.monotonic() - start)
+        return True
+
+    async def acquire_async(self, priority=PRIORITY_NORMAL):
+        start = time.monotonic()
+        with self.lock:
+            ticket = self._enter(priority)
+        try:
+            while True:
+                with self.lock:
+                    wait = self._poll(ticket)
+                if wait == 0:
+                    break
+                await asyncio.sleep(wait)
+        except BaseException:
+            with self.lock:
+                self._leave(ticket)
+            raise
+        with self.cond:
+            self.cond.notify_all()
+            self._record(time.monotonic() - start)
+        return True
+
+    def throttle(self):
+        # 收到 429 时清空令牌, 让排队的请求按速率重新放行
+        with self.lock:
+            self.tokens = 0
+            self.last = time.monotonic()
+            self.throttled += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                'queued': len(self._waiters),
+                'tokens': self.tokens,
+                'granted': self.granted,
+                'throttled': self.throttled,
+                'total_wait': self.total_wait,
+                'avg_wait': self.total_wait / self.granted if self.granted else 0.0,
+                'max_wait': self.max_wait,
+            }
+
+
+class RateLimiter(object):
+
+    # 按接口族分桶, rules: [(name, method, path 前缀, 每秒请求数, 突发容量)], 按顺序匹配
+    def __init__(self, rules=c.RATE_LIMITS, default=c.DEFAULT_RATE_LIMIT):
+        self.rules = list(rules)
+        self.buckets = {}
+        for name, method, prefix, rate, capacity in self.rules:
+            if name not in self.buckets:
+                self.buckets[name] = TokenBucket(name, rate, capacity)
+        self.buckets['default'] = TokenBucket('default', default[0], default[1])
+
+    def bucket(self, method, request_path):
+        for name, m, prefix, rate, capacity in self.rules:
+            if (m is None or m == method) and request_path.startswith(prefix):
+                return self.buckets[name]
+        return self.buckets['default']
+
+    def stats(self):
+        return dict((name, b.stats()) for name, b in self.buckets.items())
+
+
+def split_rules(rules, default, parts):
+    # 多个进程共用一个 API key 时, 每个进程分到 1/parts 的速率和突发容量 (容量至少 1)
+    rules = [(name, method, prefix, float(rate) / parts, max(1.0, float(capacity) / parts))
+             for name, method, prefix, rate, capacity in rules]
+    return rules, (float(default[0]) / parts, max(1.0, float(default[1]) / parts))
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def default_limiter():
+    # 进程内共享, 同一个 API key 下所有 Client 共用一份额度
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
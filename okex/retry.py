@@ -0,0 +1,158 @@
+import asyncio
+import random
+import threading
+import time
+import requests
+import urllib3
+from . import consts as c, exceptions
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+# 请求还没发到服务器的网络错误 (建立连接阶段失败), 任何方法都可以安全重试
+CONNECT_ERRORS = (requests.exceptions.ConnectTimeout,)
+CONNECT_REASONS = (urllib3.exceptions.NewConnectionError, urllib3.exceptions.ConnectTimeoutError)
+# 请求可能已经被服务器处理的网络错误 (包括发送 body 之后连接被断开), 只对幂等的 GET 重试
+NETWORK_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                  requests.exceptions.ChunkedEncodingError)
+if aiohttp is not None:
+    CONNECT_ERRORS = CONNECT_ERRORS + (aiohttp.ClientConnectorError,)
+    NETWORK_ERRORS = NETWORK_ERRORS + (aiohttp.ClientError, asyncio.TimeoutError)
+
+
+def is_connect_error(e):
+    if isinstance(e, CONNECT_ERRORS):
+        return True
+    # requests 把建连失败包装成 ConnectionError(MaxRetryError(reason=NewConnectionError))
+    if isinstance(e, requests.exceptions.ConnectionError) and e.args:
+        reason = getattr(e.args[0], 'reason', e.args[0])
+        return isinstance(reason, CONNECT_REASONS)
+    return False
+
+
+def _is_throttled(e):
+    return e.status_code == 429 or str(e.code) in c.RETRY_THROTTLE_CODES
+
+
+def is_retryable(e, method):
+    if isinstance(e, (exceptions.OkexCircuitOpenException, exceptions.OkexTimeoutException)):
+        return False
+    if isinstance(e, exceptions.OkexAPIException):
+        # 限频和明确要求重试的错误码不会被执行, 任何方法都可以重试
+        if _is_throttled(e) or str(e.code) in c.RETRY_ERROR_CODES:
+            return True
+        # 5xx 时下单请求可能已生效, 只重试 GET
+        return e.status_code >= 500 and method == c.GET
+    if is_connect_error(e):
+        return True
+    if isinstance(e, NETWORK_ERRORS):
+        return method == c.GET
+    return False
+
+
+def is_failure(e):
+    # 计入熔断的错误: 服务端异常和网络错误; 限频与业务错误不算
+    if isinstance(e, exceptions.OkexAPIException):
+        return e.status_code >= 500 or str(e.code) in c.RETRY_ERROR_CODES
+    return isinstance(e, CONNECT_ERRORS + NETWORK_ERRORS)
+
+
+class RetryPolicy(object):
+
+    # 指数退避 + full jitter, 总耗时不超过 deadline 秒
+    def __init__(self, max_attempts=c.RETRY_MAX_ATTEMPTS, base=c.RETRY_BASE_DELAY, cap=c.RETRY_MAX_DELAY,
+                 deadline=c.RETRY_DEADLINE):
+        self.max_attempts = max_attempts
+        self.base = base
+        self.cap = cap
+        self.deadline = deadline
+
+    def next_delay(self, attempt, deadline_at):
+        # attempt 从 0 开始; 返回 None 表示不再重试
+        if attempt + 1 >= self.max_attempts:
+            return None
+        delay = random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+        if time.monotonic() + delay >= deadline_at:
+            return None
+        return delay
+
+
+class CircuitBreaker(object):
+
+    # 连续 failure_threshold 次失败后熔断 reset_timeout 秒, 之后放行一个探测请求 (half-open);
+    # 探测请求 reset_timeout 秒内没有结果 (或调用 release 放弃) 时允许下一个探测
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, name, failure_threshold=c.BREAKER_FAILURE_THRESHOLD, reset_timeout=c.BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_at = 0.0
+        self._lock = threading.Lock()
+
+    def check(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            now = time.monotonic()
+            if (self.state == self.OPEN and now - self.opened_at >= self.reset_timeout) or \
+                    (self.state == self.HALF_OPEN and now - self.probe_at >= self.reset_timeout):
+                self.state = self.HALF_OPEN
+                self.probe_at = now
+                return
+            raise exceptions.OkexCircuitOpenException(self.name)
+
+    def release(self):
+        # check 之后请求没有发出 (排队超时、被取消), 不记结果, 让出探测名额
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.probe_at = 0.0
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class CircuitBreakers(object):
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            b = self.breakers.get(name)
+            if b is None:
+                b = self.breakers[name] = CircuitBreaker(name, **self.kwargs)
+            return b
+
+    def stats(self):
+        return dict((name, {'state': b.state, 'failures': b.failures}) for name, b in self.breakers.items())
+
+
+_breakers = None
+_breakers_lock = threading.Lock()
+
+
+def default_breakers():
+    global _breakers
+    with _breakers_lock:
+        if _breakers is None:
+            _breakers = CircuitBreakers()
+        return _breakers
@@ -0,0 +1,66 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from . import consts as c
+
+
+class HttpSession(object):
+
+    # 线程安全的长连接池，多个 Client 可共享同一个实例
+    def __init__(self, pool_connections=c.POOL_CONNECTIONS, pool_maxsize=c.POOL_MAXSIZE,
+                 pool_block=False, idle_timeout=c.POOL_IDLE_TIMEOUT):
+        # pool_connections: 缓存的 host 连接池个数, pool_maxsize: 每个 host 保持的最大连接数
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._session = self._new_session()
+        self._last_used = time.monotonic()
+        self._in_flight = 0
+
+    def _new_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _acquire(self):
+        now = time.monotonic()
+        with self._lock:
+            # 空闲太久的连接大多已被服务端关闭, 没有请求在途时整体重建连接池
+            if self.idle_timeout and self._in_flight == 0 and now - self._last_used > self.idle_timeout:
+                old = self._session
+                self._session = self._new_session()
+                old.close()
+            self._last_used = now
+            self._in_flight += 1
+            return self._session
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._last_used = time.monotonic()
+
+    def request(self, method, url, **kwargs):
+        session = self._acquire()
+        try:
+            return session.request(method, url, **kwargs)
+        finally:
+            self._release()
+
+    def get(self, url, **kwargs):
+        return self.request(c.GET, url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request(c.POST, url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request(c.DELETE, url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            self._session.close()
@@ -1,22 +1,23 @@
+import functools
 from .client import Client
 from .consts import *
 import json
 
 class SpotAPI(Client):
 
-    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False):
-        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first)
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False, **kwargs):
+        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first, **kwargs)
 
     # query spot account info
-    def get_account_info(self):
-        return self._request_without_params(GET, SPOT_ACCOUNT_INFO)
+    def get_account_info(self, timeout=None):
+        return self._request_without_params(GET, SPOT_ACCOUNT_INFO, timeout=timeout)
 
     # query specific coin account info
-    def get_coin_account_info(self, currency):
-        return self._request_without_params(GET, SPOT_COIN_ACCOUNT_INFO + str(currency))
+    def get_coin_account_info(self, currency, timeout=None):
+        return self._request_without_params(GET, SPOT_COIN_ACCOUNT_INFO + str(currency), timeout=timeout)
 
     # query ledger record not paging
-    def get_ledger_record(self, currency, after='', before='', limit='', type=''):
+    def get_ledger_record(self, currency, after='', before='', limit='', type='', timeout=None):
         params = {}
         if after:
             params['after'] = after
@@ -26,29 +27,34 @@ class SpotAPI(Client):
             params['limit'] = limit
         if type:
             params['type'] = type
-        return self._request_with_params(GET, SPOT_LEDGER_RECORD + str(currency) + '/ledger', params, cursor=True)
+        return self._request_with_params(GET, SPOT_LEDGER_RECORD + str(currency) + '/ledger', params, cursor=True, timeout=timeout)
+
+    # 按游标逐条遍历账单, 后台预取下一页
+    def iter_ledger_record(self, currency, after='', limit='', type='', prefetch=1, timeout=None):
+        return self._paginate(functools.partial(self.get_ledger_record, currency, limit=limit, type=type,
+                                                timeout=timeout), after, prefetch)
 
     # take order
-    def take_order(self, instrument_id, side, client_oid='', type='', size='', price='', order_type='0', notional=''):
+    def take_order(self, instrument_id, side, client_oid='', type='', size='', price='', order_type='0', notional='', timeout=None):
         params = {'instrument_id': instrument_id, 'side': side, 'client_oid': client_oid, 'type': type, 'size': size, 'price': price, 'order_type': order_type, 'notional': notional}
-        return self._request_with_params(POST, SPOT_ORDER, params)
+        return self._request_with_params(POST, SPOT_ORDER, params, timeout=timeout)
 
-    def take_orders(self, params):
-        return self._request_with_params(POST, SPOT_ORDERS, params)
+    def take_orders(self, params, timeout=None):
+        return self._request_with_params(POST, SPOT_ORDERS, params, timeout=timeout)
 
     # revoke order
-    def revoke_order(self, instrument_id, order_id='', client_oid=''):
+    def revoke_order(self, instrument_id, order_id='', client_oid='', timeout=None):
         params = {'instrument_id': instrument_id}
         if order_id:
-            return self._request_with_params(POST, SPOT_REVOKE_ORDER + str(order_id), params)
+            return self._request_with_params(POST, SPOT_REVOKE_ORDER + str(order_id), params, timeout=timeout)
         elif client_oid:
-            return self._request_with_params(POST, SPOT_REVOKE_ORDER + str(client_oid), params)
+            return self._request_with_params(POST, SPOT_REVOKE_ORDER + str(client_oid), params, timeout=timeout)
 
-    def revoke_orders(self, params):
-        return self._request_with_params(POST, SPOT_REVOKE_ORDERS, params)
+    def revoke_orders(self, params, timeout=None):
+        return self._request_with_params(POST, SPOT_REVOKE_ORDERS, params, timeout=timeout)
 
     # query orders list v3
-    def get_orders_list(self, instrument_id, state, after='', before='', limit=''):
+    def get_orders_list(self, instrument_id, state, after='', before='', limit='', timeout=None):
         params = {'instrument_id': instrument_id, 'state': state}
         if after:
             params['after'] = after
@@ -56,17 +62,21 @@ class SpotAPI(Client):
             params['before'] = before
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, SPOT_ORDERS_LIST, params, cursor=True)
+        return self._request_with_params(GET, SPOT_ORDERS_LIST, params, cursor=True, timeout=timeout)
+
+    def iter_orders_list(self, instrument_id, state, after='', limit='', prefetch=1, timeout=None):
+        return self._paginate(functools.partial(self.get_orders_list, instrument_id, state, limit=limit,
+                                                timeout=timeout), after, prefetch)
 
     # query order info
-    def get_order_info(self, instrument_id, order_id='', client_oid=''):
+    def get_order_info(self, instrument_id, order_id='', client_oid='', timeout=None):
         params = {'instrument_id': instrument_id}
         if order_id:
-            return self._request_with_params(GET, SPOT_ORDER_INFO + str(order_id), params)
+            return self._request_with_params(GET, SPOT_ORDER_INFO + str(order_id), params, timeout=timeout)
         elif client_oid:
-            return self._request_with_params(GET, SPOT_ORDER_INFO + str(client_oid), params)
+            return self._request_with_params(GET, SPOT_ORDER_INFO + str(client_oid), params, timeout=timeout)
 
-    def get_orders_pending(self, instrument_id, after='', before='', limit=''):
+    def get_orders_pending(self, instrument_id, after='', before='', limit='', timeout=None):
         params = {'instrument_id': instrument_id}
         if after:
             params['after'] = after
@@ -74,9 +84,9 @@ class SpotAPI(Client):
             params['before'] = before
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, SPOT_ORDERS_PENDING, params, cursor=True)
+        return self._request_with_params(GET, SPOT_ORDERS_PENDING, params, cursor=True, timeout=timeout)
 
-    def get_fills(self, instrument_id, order_id='', after='', before='', limit=''):
+    def get_fills(self, instrument_id, order_id='', after='', before='', limit='', timeout=None):
         params = {'instrument_id': instrument_id}
         if order_id:
             params['order_id'] = order_id
@@ -86,12 +96,16 @@ class SpotAPI(Client):
             params['before'] = before
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, SPOT_FILLS, params, cursor=True)
+        return self._request_with_params(GET, SPOT_FILLS, params, cursor=True, timeout=timeout)
+
+    def iter_fills(self, instrument_id, order_id='', after='', limit='', prefetch=1, timeout=None):
+        return self._paginate(functools.partial(self.get_fills, instrument_id, order_id, limit=limit, timeout=timeout),
+                              after, prefetch)
 
     # take order_algo
     def take_order_algo(self, instrument_id, mode, order_type, size, side, trigger_price='', algo_price='', algo_type='',
                         callback_rate='', algo_variance='', avg_amount='', limit_price='', sweep_range='',
-                        sweep_ratio='', single_limit='', time_interval=''):
+                        sweep_ratio='', single_limit='', time_interval='', timeout=None):
         params = {'instrument_id': instrument_id, 'mode': mode, 'order_type': order_type, 'size': size, 'side': side}
         if order_type == '1':  # 止盈止损参数
             params['trigger_price'] = trigger_price
@@ -111,18 +125,18 @@ class SpotAPI(Client):
             params['single_limit'] = single_limit
             params['limit_price'] = limit_price
             params['time_interval'] = time_interval
-        return self._request_with_params(POST, SPOT_ORDER_ALGO, params)
+        return self._request_with_params(POST, SPOT_ORDER_ALGO, params, timeout=timeout)
 
     # cancel_algos
-    def cancel_algos(self, instrument_id, algo_ids, order_type):
+    def cancel_algos(self, instrument_id, algo_ids, order_type, timeout=None):
         params = {'instrument_id': instrument_id, 'algo_ids': algo_ids, 'order_type': order_type}
-        return self._request_with_params(POST, SPOT_CANCEL_ALGOS, params)
+        return self._request_with_params(POST, SPOT_CANCEL_ALGOS, params, timeout=timeout)
 
-    def get_trade_fee(self):
-        return self._request_without_params(GET, SPOT_TRADE_FEE)
+    def get_trade_fee(self, timeout=None):
+        return self._request_without_params(GET, SPOT_TRADE_FEE, timeout=timeout)
 
     # get order_algos
-    def get_order_algos(self, instrument_id, order_type, status='', algo_id='', before='', after='', limit=''):
+    def get_order_algos(self, instrument_id, order_type, status='', algo_id='', before='', after='', limit='', timeout=None):
         params = {'instrument_id': instrument_id, 'order_type': order_type}
         if status:
             params['status'] = status
@@ -134,37 +148,37 @@ class SpotAPI(Client):
             params['after'] = after
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, SPOT_GET_ORDER_ALGOS, params)
+        return self._request_with_params(GET, SPOT_GET_ORDER_ALGOS, params, timeout=timeout)
 
     # query spot coin info
-    def get_coin_info(self):
-        return self._request_without_params(GET, SPOT_COIN_INFO)
+    def get_coin_info(self, timeout=None):
+        return self._request_without_params(GET, SPOT_COIN_INFO, timeout=timeout)
 
     # query depth
-    def get_depth(self, instrument_id, size='', depth=''):
+    def get_depth(self, instrument_id, size='', depth='', timeout=None):
         params = {}
         if size:
             params['size'] = size
         if depth:
             params['depth'] = depth
-        return self._request_with_params(GET, SPOT_DEPTH + str(instrument_id) + '/book', params)
+        return self._request_with_params(GET, SPOT_DEPTH + str(instrument_id) + '/book', params, timeout=timeout)
 
     # query ticker info
-    def get_ticker(self):
-        return self._request_without_params(GET, SPOT_TICKER)
+    def get_ticker(self, timeout=None):
+        return self._request_without_params(GET, SPOT_TICKER, timeout=timeout)
 
     # query specific ticker
-    def get_specific_ticker(self, instrument_id):
-        return self._request_without_params(GET, SPOT_SPECIFIC_TICKER + str(instrument_id) + '/ticker')
+    def get_specific_ticker(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, SPOT_SPECIFIC_TICKER + str(instrument_id) + '/ticker', timeout=timeout)
 
-    def get_deal(self, instrument_id, limit=''):
+    def get_deal(self, instrument_id, limit='', timeout=None):
         params = {}
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, SPOT_DEAL + str(instrument_id) + '/trades', params)
+        return self._request_with_params(GET, SPOT_DEAL + str(instrument_id) + '/trades', params, timeout=timeout)
 
     # query k-line info
-    def get_kline(self, instrument_id, granularity='', start='', end=''):
+    def get_kline(self, instrument_id, granularity='', start='', end='', timeout=None):
         params = {}
         if start:
             params['start'] = start
@@ -174,7 +188,7 @@ class SpotAPI(Client):
             params['granularity'] = granularity
 
         # 按时间倒叙 即由结束时间到开始时间
-        return self._request_with_params(GET, SPOT_KLINE + str(instrument_id) + '/candles', params)
+        return self._request_with_params(GET, SPOT_KLINE + str(instrument_id) + '/candles', params, timeout=timeout)
 
         # 按时间正序 即由开始时间到结束时间
         # data = self._request_with_params(GET, SPOT_KLINE + str(instrument_id) + '/candles', params)
@@ -1,32 +1,33 @@
+import functools
 from .client import Client
 from .consts import *
 
 
 class SwapAPI(Client):
 
-    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False):
-        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first)
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False, **kwargs):
+        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first, **kwargs)
 
-    def get_position(self):
-        return self._request_without_params(GET, SWAP_POSITIONS)
+    def get_position(self, timeout=None):
+        return self._request_without_params(GET, SWAP_POSITIONS, timeout=timeout)
 
-    def get_specific_position(self, instrument_id):
-        return self._request_without_params(GET, SWAP_POSITION + str(instrument_id) + '/position')
+    def get_specific_position(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, SWAP_POSITION + str(instrument_id) + '/position', timeout=timeout)
 
-    def get_accounts(self):
-        return self._request_without_params(GET, SWAP_ACCOUNTS)
+    def get_accounts(self, timeout=None):
+        return self._request_without_params(GET, SWAP_ACCOUNTS, timeout=timeout)
 
-    def get_coin_account(self, instrument_id):
-        return self._request_without_params(GET, SWAP_ACCOUNT + str(instrument_id) + '/accounts')
+    def get_coin_account(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, SWAP_ACCOUNT + str(instrument_id) + '/accounts', timeout=timeout)
 
-    def get_settings(self, instrument_id):
-        return self._request_without_params(GET, SWAP_ACCOUNTS + '/' + str(instrument_id) + '/settings')
+    def get_settings(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, SWAP_ACCOUNTS + '/' + str(instrument_id) + '/settings', timeout=timeout)
 
-    def set_leverage(self, instrument_id, leverage, side):
+    def set_leverage(self, instrument_id, leverage, side, timeout=None):
         params = {'leverage': leverage, 'side': side}
-        return self._request_with_params(POST, SWAP_ACCOUNTS + '/' + str(instrument_id) + '/leverage', params)
+        return self._request_with_params(POST, SWAP_ACCOUNTS + '/' + str(instrument_id) + '/leverage', params, timeout=timeout)
 
-    def get_ledger(self, instrument_id, after='', before='', limit='', type=''):
+    def get_ledger(self, instrument_id, after='', before='', limit='', type='', timeout=None):
         params = {}
         if after:
             params['after'] = after
@@ -36,9 +37,14 @@ class SwapAPI(Client):
             params['limit'] = limit
         if type:
             params['type'] = type
-        return self._request_with_params(GET, SWAP_ACCOUNTS + '/' + str(instrument_id) + '/ledger', params, cursor=True)
+        return self._request_with_params(GET, SWAP_ACCOUNTS + '/' + str(instrument_id) + '/ledger', params, cursor=True, timeout=timeout)
 
-    def take_order(self, instrument_id, type, price, size, client_oid='', order_type='0', match_price=''):
+    # 按游标逐条遍历账单, 后台预取下一页
+    def iter_ledger(self, instrument_id, after='', limit='', type='', prefetch=1, timeout=None):
+        return self._paginate(functools.partial(self.get_ledger, instrument_id, limit=limit, type=type, timeout=timeout),
+                              after, prefetch)
+
+    def take_order(self, instrument_id, type, price, size, client_oid='', order_type='0', match_price='', timeout=None):
         params = {'instrument_id': instrument_id, 'type': type, 'size': size, 'price': price}
         if client_oid:
             params['client_oid'] = client_oid
@@ -46,27 +52,27 @@ class SwapAPI(Client):
             params['order_type'] = order_type
         if match_price:
             params['match_price'] = match_price
-        return self._request_with_params(POST, SWAP_ORDER, params)
+        return self._request_with_params(POST, SWAP_ORDER, params, timeout=timeout)
 
-    def take_orders(self, instrument_id, order_data):
+    def take_orders(self, instrument_id, order_data, timeout=None):
         params = {'instrument_id': instrument_id, 'order_data': order_data}
-        return self._request_with_params(POST, SWAP_ORDERS, params)
+        return self._request_with_params(POST, SWAP_ORDERS, params, timeout=timeout)
 
-    def revoke_order(self, instrument_id, order_id='', client_oid=''):
+    def revoke_order(self, instrument_id, order_id='', client_oid='', timeout=None):
         if order_id:
-            return self._request_without_params(POST, SWAP_CANCEL_ORDER + str(instrument_id) + '/' + str(order_id))
+            return self._request_without_params(POST, SWAP_CANCEL_ORDER + str(instrument_id) + '/' + str(order_id), timeout=timeout)
         elif client_oid:
-            return self._request_without_params(POST, SWAP_CANCEL_ORDER + str(instrument_id) + '/' + str(client_oid))
+            return self._request_without_params(POST, SWAP_CANCEL_ORDER + str(instrument_id) + '/' + str(client_oid), timeout=timeout)
 
-    def revoke_orders(self, instrument_id, ids='', client_oids=''):
+    def revoke_orders(self, instrument_id, ids='', client_oids='', timeout=None):
         params = {}
         if ids:
             params = {'ids': ids}
         elif client_oids:
             params = {'client_oids': client_oids}
-        return self._request_with_params(POST, SWAP_CANCEL_ORDERS + str(instrument_id), params)
+        return self._request_with_params(POST, SWAP_CANCEL_ORDERS + str(instrument_id), params, timeout=timeout)
 
-    def get_order_list(self, instrument_id, state, after='', before='', limit=''):
+    def get_order_list(self, instrument_id, state, after='', before='', limit='', timeout=None):
         params = {'state': state}
         if after:
             params['after'] = after
@@ -74,15 +80,19 @@ class SwapAPI(Client):
             params['before'] = before
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, SWAP_ORDERS + '/' + str(instrument_id), params, cursor=True)
+        return self._request_with_params(GET, SWAP_ORDERS + '/' + str(instrument_id), params, cursor=True, timeout=timeout)
+
+    def iter_order_list(self, instrument_id, state, after='', limit='', prefetch=1, timeout=None):
+        return self._paginate(functools.partial(self.get_order_list, instrument_id, state, limit=limit, timeout=timeout),
+                              after, prefetch)
 
-    def get_order_info(self, instrument_id, order_id='', client_oid=''):
+    def get_order_info(self, instrument_id, order_id='', client_oid='', timeout=None):
         if order_id:
-            return self._request_without_params(GET, SWAP_ORDERS + '/' + str(instrument_id) + '/' + str(order_id))
+            return self._request_without_params(GET, SWAP_ORDERS + '/' + str(instrument_id) + '/' + str(order_id), timeout=timeout)
         elif client_oid:
-            return self._request_without_params(GET, SWAP_ORDERS + '/' + str(instrument_id) + '/' + str(client_oid))
+            return self._request_without_params(GET, SWAP_ORDERS + '/' + str(instrument_id) + '/' + str(client_oid), timeout=timeout)
 
-    def get_fills(self, instrument_id, order_id='', after='', before='', limit=''):
+    def get_fills(self, instrument_id, order_id='', after='', before='', limit='', timeout=None):
         params = {'instrument_id': instrument_id}
         if order_id:
             params['order_id'] = order_id
@@ -92,34 +102,38 @@ class SwapAPI(Client):
             params['before'] = before
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, SWAP_FILLS, params, cursor=True)
+        return self._request_with_params(GET, SWAP_FILLS, params, cursor=True, timeout=timeout)
+
+    def iter_fills(self, instrument_id, order_id='', after='', limit='', prefetch=1, timeout=None):
+        return self._paginate(functools.partial(self.get_fills, instrument_id, order_id, limit=limit, timeout=timeout),
+                              after, prefetch)
 
-    def close_position(self, instrument_id, direction):
+    def close_position(self, instrument_id, direction, timeout=None):
         params = {'instrument_id': instrument_id, 'direction': direction}
-        return self._request_with_params(POST, SWAP_CLOSE_POSITION, params)
+        return self._request_with_params(POST, SWAP_CLOSE_POSITION, params, timeout=timeout)
 
-    def cancel_all(self, instrument_id, direction):
+    def cancel_all(self, instrument_id, direction, timeout=None):
         params = {'instrument_id': instrument_id, 'direction': direction}
-        return self._request_with_params(POST, SWAP_CANCEL_ALL, params)
+        return self._request_with_params(POST, SWAP_CANCEL_ALL, params, timeout=timeout)
 
-    def get_instruments(self):
-        return self._request_without_params(GET, SWAP_INSTRUMENTS)
+    def get_instruments(self, timeout=None):
+        return self._request_without_params(GET, SWAP_INSTRUMENTS, timeout=timeout)
 
-    def get_depth(self, instrument_id, size='', depth=''):
+    def get_depth(self, instrument_id, size='', depth='', timeout=None):
         params = {}
         if size:
             params['size'] = size
         if depth:
             params['depth'] = depth
-        return self._request_with_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/depth', params)
+        return self._request_with_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/depth', params, timeout=timeout)
 
-    def get_ticker(self):
-        return self._request_without_params(GET, SWAP_TICKETS)
+    def get_ticker(self, timeout=None):
+        return self._request_without_params(GET, SWAP_TICKETS, timeout=timeout)
 
-    def get_specific_ticker(self, instrument_id):
-        return self._request_without_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/ticker')
+    def get_specific_ticker(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/ticker', timeout=timeout)
 
-    def get_trades(self, instrument_id, after='', before='', limit=''):
+    def get_trades(self, instrument_id, after='', before='', limit='', timeout=None):
         params = {}
         if after:
             params['after'] = after
@@ -127,9 +141,9 @@ class SwapAPI(Client):
             params['before'] = before
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/trades', params, cursor=True)
+        return self._request_with_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/trades', params, cursor=True, timeout=timeout)
 
-    def get_kline(self, instrument_id, granularity='', start='', end=''):
+    def get_kline(self, instrument_id, granularity='', start='', end='', timeout=None):
         params = {}
         if granularity:
             params['granularity'] = granularity
@@ -138,25 +152,25 @@ class SwapAPI(Client):
         if end:
             params['end'] = end
         # 按时间倒叙 即由结束时间到开始时间
-        return self._request_with_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/candles', params)
+        return self._request_with_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/candles', params, timeout=timeout)
 
         # 按时间正序 即由开始时间到结束时间
         # data = self._request_with_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/candles', params)
         # return list(reversed(data))
 
-    def get_index(self, instrument_id):
-        return self._request_without_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/index')
+    def get_index(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/index', timeout=timeout)
 
-    def get_rate(self):
-        return self._request_without_params(GET, SWAP_RATE)
+    def get_rate(self, timeout=None):
+        return self._request_without_params(GET, SWAP_RATE, timeout=timeout)
 
-    def get_holds(self, instrument_id):
-        return self._request_without_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/open_interest')
+    def get_holds(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/open_interest', timeout=timeout)
 
-    def get_limit(self, instrument_id):
-        return self._request_without_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/price_limit')
+    def get_limit(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/price_limit', timeout=timeout)
 
-    def get_liquidation(self, instrument_id, status, froms='', to='', limit=''):
+    def get_liquidation(self, instrument_id, status, froms='', to='', limit='', timeout=None):
         params = {'status': status}
         if froms:
             params['from'] = froms
@@ -164,15 +178,15 @@ class SwapAPI(Client):
             params['to'] = to
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/liquidation', params)
+        return self._request_with_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/liquidation', params, timeout=timeout)
 
-    def get_holds_amount(self, instrument_id):
-        return self._request_without_params(GET, SWAP_ACCOUNTS + '/' + str(instrument_id) + '/holds')
+    def get_holds_amount(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, SWAP_ACCOUNTS + '/' + str(instrument_id) + '/holds', timeout=timeout)
 
     # take order_algo
     def take_order_algo(self, instrument_id, type, order_type, size, trigger_price='', algo_price='', algo_type='',
                         callback_rate='', algo_variance='', avg_amount='', price_limit='', sweep_range='',
-                        sweep_ratio='', single_limit='', time_interval=''):
+                        sweep_ratio='', single_limit='', time_interval='', timeout=None):
         params = {'instrument_id': instrument_id, 'type': type, 'order_type': order_type, 'size': size}
         if order_type == '1':  # 止盈止损参数（最多同时存在10单）
             params['trigger_price'] = trigger_price
@@ -192,15 +206,15 @@ class SwapAPI(Client):
             params['single_limit'] = single_limit
             params['price_limit'] = price_limit
             params['time_interval'] = time_interval
-        return self._request_with_params(POST, SWAP_ORDER_ALGO, params)
+        return self._request_with_params(POST, SWAP_ORDER_ALGO, params, timeout=timeout)
 
     # cancel_algos
-    def cancel_algos(self, instrument_id, algo_ids, order_type):
+    def cancel_algos(self, instrument_id, algo_ids, order_type, timeout=None):
         params = {'instrument_id': instrument_id, 'algo_ids': algo_ids, 'order_type': order_type}
-        return self._request_with_params(POST, SWAP_CANCEL_ALGOS, params)
+        return self._request_with_params(POST, SWAP_CANCEL_ALGOS, params, timeout=timeout)
 
     # get order_algos
-    def get_order_algos(self, instrument_id, order_type, status='', algo_id='', before='', after='', limit=''):
+    def get_order_algos(self, instrument_id, order_type, status='', algo_id='', before='', after='', limit='', timeout=None):
         params = {'order_type': order_type}
         if status:
             params['status'] = status
@@ -212,20 +226,20 @@ class SwapAPI(Client):
             params['after'] = after
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, SWAP_GET_ORDER_ALGOS + str(instrument_id), params)
+        return self._request_with_params(GET, SWAP_GET_ORDER_ALGOS + str(instrument_id), params, timeout=timeout)
 
     # get_trade_fee
-    def get_trade_fee(self):
-        return self._request_without_params(GET, SWAP_GET_TRADE_FEE)
+    def get_trade_fee(self, timeout=None):
+        return self._request_without_params(GET, SWAP_GET_TRADE_FEE, timeout=timeout)
 
-    def get_funding_time(self, instrument_id):
-        return self._request_without_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/funding_time')
+    def get_funding_time(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/funding_time', timeout=timeout)
 
-    def get_mark_price(self, instrument_id):
-        return self._request_without_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/mark_price')
+    def get_mark_price(self, instrument_id, timeout=None):
+        return self._request_without_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/mark_price', timeout=timeout)
 
-    def get_historical_funding_rate(self, instrument_id, limit=''):
+    def get_historical_funding_rate(self, instrument_id, limit='', timeout=None):
         params = {}
         if limit:
             params['limit'] = limit
-        return self._request_with_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/historical_funding_rate', params)
+        return self._request_with_params(GET, SWAP_INSTRUMENTS + '/' + str(instrument_id) + '/historical_funding_rate', params, timeout=timeout)
@@ -4,12 +4,12 @@ from .consts import *
 
 class SystemAPI(Client):
 
-    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False):
-        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time)
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, **kwargs):
+        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time, **kwargs)
 
     # get system status
-    def get_system_status(self, status=''):
+    def get_system_status(self, status='', timeout=None):
         params = {}
         if status:
             params['status'] = status
-        return self._request_with_params(GET, SYSTEM_STATUS, params)
+        return self._request_with_params(GET, SYSTEM_STATUS, params, timeout=timeout)
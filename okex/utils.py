@@ -1,8 +1,12 @@
 import hmac
+import hashlib
 import base64
 import datetime
 from . import consts as c
 
+# 本地与服务器的时钟偏移(秒), 可手动设置; use_server_time 的 Client 使用各自 ClockSync 的偏移
+_time_offset = 0.0
+
 
 def sign(message, secret_key):
     mac = hmac.new(bytes(secret_key, encoding='utf8'), bytes(message, encoding='utf-8'), digestmod='sha256')
@@ -10,6 +14,23 @@ def sign(message, secret_key):
     return base64.b64encode(d)
 
 
+class Signer(object):
+
+    # 每个 Client 创建一次: 预先用 secret key 初始化 HMAC 状态, 每条消息只 copy 一份再 update
+    def __init__(self, secret_key):
+        self._mac = hmac.new(secret_key.encode('utf-8'), digestmod=hashlib.sha256)
+
+    def sign(self, timestamp, method, request_path, body=b''):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        mac = self._mac.copy()
+        mac.update((timestamp + method + request_path).encode('utf-8'))
+        if body:
+            mac.update(body)
+        # 直接返回可放入 OK-ACCESS-SIGN 的字符串
+        return base64.b64encode(mac.digest()).decode('ascii')
+
+
 def pre_hash(timestamp, method, request_path, body):
     return str(timestamp) + str.upper(method) + request_path + body
 
@@ -33,8 +54,22 @@ def parse_params_to_str(params):
     return url[0:-1]
 
 
-def get_timestamp():
+def set_time_offset(offset):
+    global _time_offset
+    _time_offset = offset
+
+
+def get_time_offset():
+    return _time_offset
+
+
+def get_timestamp(offset=None):
+    # offset: 该 Client 对应服务器的时钟偏移 (ClockSync.offset), 不传时使用全局偏移
+    if offset is None:
+        offset = _time_offset
     now = datetime.datetime.utcnow()
+    if offset:
+        now += datetime.timedelta(seconds=offset)
     t = now.isoformat("T", "milliseconds")
     return t + "Z"
 
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import zlib
+from . import consts as c, codec
+
+try:
+    import websockets
+except ImportError:  # pragma: no cover
+    websockets = None
+
+
+def ticker_channel(table, instrument_id):
+    return '%s:%s' % (table, instrument_id)
+
+
+def inflate(message):
+    # OKEx v3 推送的是 raw deflate 压缩的二进制帧, 本地测试服务器可以直接发文本
+    if isinstance(message, bytes):
+        decompress = zlib.decompressobj(-zlib.MAX_WBITS)
+        message = decompress.decompress(message) + decompress.flush()
+        message = message.decode('utf-8')
+    return message
+
+
+class TickerFeed(object):
+
+    # 在后台线程订阅 ticker 推送, 内存里只保留每个合约的最新一条;
+    # 买一/卖一变化时 version 加一并唤醒 wait() 的调用方
+    def __init__(self, channels, url=c.WS_URL, ping_interval=c.WS_PING_INTERVAL,
+                 reconnect_wait=c.WS_RECONNECT_WAIT):
+        if websockets is None:
+            raise ImportError('websockets is required for TickerFeed')
+        self.channels = list(channels)
+        self.url = url
+        self.ping_interval = ping_interval
+        self.reconnect_wait = reconnect_wait
+        self.codec = codec.default_codec()
+        self.version = 0
+        self._tickers = {}
+        self._updated = {}
+        self._cond = threading.Condition()
+        self._loop = None
+        self._task = None
+        self._thread = None
+        self._running = False
+
+    def get(self, instrument_id):
+        return self._tickers.get(instrument_id)
+
+    def age(self, instrument_id):
+        t = self._updated.get(instrument_id)
+        if t is None:
+            return None
+        return time.monotonic() - t
+
+    def wait(self, version, timeout=None):
+        # 阻塞到 version 大于传入值或超时, 返回最新 version
+        with self._cond:
+            self._cond.wait_for(lambda: self.version > version or not self._running, timeout)
+            return self.version
+
+    def on_message(self, message):
+        if message == 'pong':
+            return
+        msg = self.codec.loads(message)
+        if 'event' in msg:
+            if msg['event'] == 'error':
+                logging.error('ws error: %s', msg)
+            return
+        for d in msg.get('data', ()):
+            instrument_id = d['instrument_id']
+            last = self._tickers.get(instrument_id)
+            changed = last is None or last['best_bid'] != d['best_bid'] or last['best_ask'] != d['best_ask']
+            self._tickers[instrument_id] = d
+            self._updated[instrument_id] = time.monotonic()
+            if changed:
+                with self._cond:
+                    self.version += 1
+                    self._cond.notify_all()
+
+    async def _ping(self, socket):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await socket.send('ping')
+
+    async def _session(self):
+        async with websockets.connect(self.url) as socket:
+            await socket.send(json.dumps({'op': 'subscribe', 'args': self.channels}))
+            ping = asyncio.ensure_future(self._ping(socket))
+            try:
+                while self._running:
+                    message = await asyncio.wait_for(socket.recv(), timeout=self.ping_interval * 2)
+                    self.on_message(inflate(message))
+            finally:
+                ping.cancel()
+
+    async def _run(self):
+        while self._running:
+            try:
+                await self._session()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logging.error('ws feed disconnected: %s', e)
+            if self._running:
+                await asyncio.sleep(self.reconnect_wait)
+
+    def _thread_main(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._task = self._loop.create_task(self._run())
+            self._loop.run_until_complete(self._task)
+        finally:
+            self._loop.close()
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._thread_main, name='okex-ws-feed', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._task is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
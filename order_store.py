@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+import time
+
+
+class OrderStore(object):
+
+    # 本地订单状态: 由私有频道的订单/成交推送更新, get_order_list 的结果做兜底对账
+    # get() 返回的字段与 trade.get_order_details 一致 (id, isActive, size, dealSize, price, side)
+    def __init__(self, symbol, stale_seconds=30):
+        self.symbol = symbol
+        self.stale_seconds = stale_seconds
+        self.orders = {}
+        self.updated = None
+        self._lock = threading.Lock()
+        self._mux = None
+
+    def is_fresh(self):
+        return self.updated is not None and time.monotonic() - self.updated < self.stale_seconds
+
+    def get(self, order_id):
+        with self._lock:
+            o = self.orders.get(order_id)
+            return dict(o) if o is not None else None
+
+    def add(self, order_id, side, price, size):
+        # 下单成功后立即登记, 不必等推送
+        with self._lock:
+            self.orders[order_id] = {
+                'id': order_id,
+                'side': side,
+                'price': price,
+                'size': size,
+                'dealSize': 0,
+                'isActive': True,
+                'ts': time.monotonic()
+            }
+
+    def update(self, order):
+        # order: get_order_details / get_order_list 返回的订单
+        with self._lock:
+            self.orders[order['id']] = {
+                'id': order['id'],
+                'side': order['side'],
+                'price': order['price'],
+                'size': order['size'],
+                'dealSize': order['dealSize'],
+                'isActive': order['isActive'],
+                'ts': time.monotonic()
+            }
+
+    def remove(self, order_id):
+        with self._lock:
+            self.orders.pop(order_id, None)
+
+    def reconcile(self, items, started):
+        # items: started 时刻发起的活动订单查询结果; 本地有而结果里没有的订单视为已结束,
+        # 但 started 之后才登记或更新过的订单不受影响
+        active = set()
+        for n in items:
+            self.update(n)
+            active.add(n['id'])
+        with self._lock:
+            for order_id, o in list(self.orders.items()):
+                if order_id in active or o['ts'] >= started:
+                    continue
+                if o['isActive']:
+                    o['isActive'] = False
+                else:
+                    del self.orders[order_id]
+            self.updated = time.monotonic()
+
+    def on_message(self, msg):
+        # /contractMarket/tradeOrders 推送, type: open / match / filled / canceled / update
+        if msg.get('subject') != 'orderChange':
+            return
+        data = msg['data']
+        if data.get('symbol') != self.symbol:
+            return
+        order_id = data['orderId']
+        with self._lock:
+            o = self.orders.get(order_id)
+            if o is None:
+                o = self.orders[order_id] = {
+                    'id': order_id,
+                    'side': data.get('side'),
+                    'price': data.get('price'),
+                    'size': 0,
+                    'dealSize': 0,
+                    'isActive': True,
+                }
+            if 'size' in data:
+                o['size'] = int(data['size'])
+            if 'filledSize' in data:
+                o['dealSize'] = int(data['filledSize'])
+            o['isActive'] = data.get('status') != 'done'
+            o['ts'] = time.monotonic()
+            self.updated = o['ts']
+
+    def _on_exit(self):
+        logging.warning('订单推送断开, 回退到 REST 查询')
+        self.updated = None
+
+    @property
+    def topic(self):
+        return '/contractMarket/tradeOrders'
+
+    def start(self, mux):
+        # mux: 私有 kumex_ws.KumexMux, 所有合约共用一个订单推送连接, on_message 按 symbol 过滤
+        self._mux = mux.subscribe(self.topic, self.on_message, self._on_exit)
+        return self
+
+    def stop(self):
+        if self._mux is not None:
+            self._mux.unsubscribe(self.topic, self.on_message)
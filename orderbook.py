@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import bisect
+import logging
+import threading
+import time
+import consts as c
+
+
+class BookSide(object):
+
+    # 价格 -> 数量, 另外维护一个有序价格列表, 最优价 O(1) 读取
+    def __init__(self, reverse=False):
+        self.reverse = reverse
+        self.levels = {}
+        self.prices = []
+
+    def clear(self):
+        self.levels.clear()
+        del self.prices[:]
+
+    def update(self, price, size):
+        if size:
+            if price not in self.levels:
+                bisect.insort(self.prices, price)
+            self.levels[price] = size
+        elif price in self.levels:
+            del self.levels[price]
+            del self.prices[bisect.bisect_left(self.prices, price)]
+
+    def best(self):
+        if not self.prices:
+            return None
+        price = self.prices[-1] if self.reverse else self.prices[0]
+        return price, self.levels[price]
+
+
+class OrderBook(object):
+
+    # KuMEX level2 本地盘口: REST 快照 + websocket 增量, 序号不连续时丢弃重建
+    # 重建 (REST 快照) 在单独的线程里做, 不阻塞 websocket 线程; 失败后按指数退避重试
+    def __init__(self, symbol, market, stale_seconds=c.FEED_STALE_SECONDS, resync_delay=c.BOOK_RESYNC_MIN_DELAY,
+                 resync_max_delay=c.BOOK_RESYNC_MAX_DELAY):
+        self.symbol = symbol
+        self.market = market
+        self.stale_seconds = stale_seconds
+        self.asks = BookSide()
+        self.bids = BookSide(reverse=True)
+        self.sequence = 0
+        self.updated = None
+        self.resync_delay = resync_delay
+        self.resync_max_delay = resync_max_delay
+        self._synced = False
+        self._pending = []
+        self._lock = threading.Lock()
+        self._mux = None
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._resync_thread = None
+
+    @property
+    def synced(self):
+        return self._synced
+
+    def is_fresh(self):
+        return self._synced and self.updated is not None and time.monotonic() - self.updated < self.stale_seconds
+
+    def best_ask(self):
+        with self._lock:
+            return self.asks.best()
+
+    def best_bid(self):
+        with self._lock:
+            return self.bids.best()
+
+    def _apply(self, sequence, change):
+        # change 格式: "price,side,size", size 为 0 表示删除该档
+        price, side, size = change.split(',')
+        book = self.asks if side == 'sell' else self.bids
+        book.update(float(price), int(size))
+        self.sequence = sequence
+        self.updated = time.monotonic()
+
+    def _load(self, snapshot):
+        self.asks.clear()
+        self.bids.clear()
+        for price, size in snapshot['asks']:
+            self.asks.update(float(price), int(size))
+        for price, size in snapshot['bids']:
+            self.bids.update(float(price), int(size))
+        self.sequence = snapshot['sequence']
+        self.updated = time.monotonic()
+
+    def resync(self):
+        try:
+            snapshot = self.market.l2_order_book(self.symbol)
+        except Exception as e:
+            logging.error(e)
+            return False
+        with self._lock:
+            self._load(snapshot)
+            ok = True
+            for sequence, change in sorted(self._pending):
+                if sequence <= self.sequence:
+                    continue
+                if sequence != self.sequence + 1:
+                    ok = False
+                    break
+                self._apply(sequence, change)
+            # 快照落后于缓存的增量且中间有缺口时, 保留缓存, 退避后再重建
+            self._pending = [p for p in self._pending if p[0] > self.sequence] if not ok else []
+            self._synced = ok
+        logging.info('盘口同步 %s, sequence = %s, synced = %s', self.symbol, self.sequence, ok)
+        return ok
+
+    def _resync_loop(self):
+        delay = self.resync_delay
+        while not self._stop.is_set():
+            self._wakeup.wait()
+            if self._stop.is_set():
+                return
+            self._wakeup.clear()
+            with self._lock:
+                synced = self._synced
+            # 重建期间到达的消息也会唤醒, 已经同步时忽略
+            if synced:
+                continue
+            if self.resync():
+                delay = self.resync_delay
+                continue
+            # 失败 (快照请求出错或仍有缺口) 时等待后重试, 期间的消息只缓存不触发请求
+            if self._stop.wait(delay):
+                return
+            delay = min(delay * 2, self.resync_max_delay)
+            with self._lock:
+                if not self._synced:
+                    self._wakeup.set()
+
+    def _request_resync(self):
+        # 调用方持有锁
+        if self._resync_thread is None:
+            self._resync_thread = threading.Thread(target=self._resync_loop, name='kumex-level2-resync',
+                                                   daemon=True)
+            self._resync_thread.start()
+        self._wakeup.set()
+
+    def on_change(self, sequence, change):
+        with self._lock:
+            if self._synced:
+                if sequence <= self.sequence:
+                    return
+                if sequence == self.sequence + 1:
+                    self._apply(sequence, change)
+                    return
+                logging.warning('盘口序号不连续 %s: %s -> %s, 重新同步', self.symbol, self.sequence, sequence)
+                self._synced = False
+                self._pending = []
+            self._pending.append((sequence, change))
+            self._request_resync()
+
+    def on_message(self, msg):
+        if msg.get('subject') == 'level2':
+            data = msg['data']
+            self.on_change(data['sequence'], data['change'])
+
+    def _on_exit(self):
+        self._synced = False
+
+    @property
+    def topic(self):
+        return '/contractMarket/level2:' + self.symbol
+
+    def start(self, mux):
+        # mux: kumex_ws.KumexMux, 多个合约的 level2 共用一个连接
+        self._mux = mux.subscribe(self.topic, self.on_message, self._on_exit)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._mux is not None:
+            self._mux.unsubscribe(self.topic, self.on_message)
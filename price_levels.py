@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# 挂单按价位 (tick 档位) 排序的索引: 有序档位数组 + 档位到订单的 dict,
+# 区间查询、最优/最差价位 O(log n), 区间外的订单按需切片, 代价与返回的档位数成正比
+
+import bisect
+import threading
+
+
+class OrderEntry(object):
+
+    # level 为 tick 档位, price 为实际下单价格
+    __slots__ = ('level', 'price', 'side', 'size', 'order_id')
+
+    def __init__(self, level, price, side, size, order_id):
+        self.level = level
+        self.price = price
+        self.side = side
+        self.size = size
+        self.order_id = order_id
+
+    def __repr__(self):
+        return 'OrderEntry(%s, %s, %s, %s, %s)' % (self.level, self.price, self.side, self.size, self.order_id)
+
+
+class PriceLevels(object):
+
+    # 一侧挂单, 每个档位最多一笔; side 决定最优价方向 (卖单最低价最优, 买单最高价最优)
+    # 撤单和下单在线程池里并发执行, 所有修改都在锁内完成
+    def __init__(self, side, entries=()):
+        self.side = side
+        self._levels = []
+        self._orders = {}
+        self._lock = threading.Lock()
+        self.replace(entries)
+
+    def __len__(self):
+        return len(self._levels)
+
+    def __contains__(self, level):
+        return level in self._orders
+
+    def __iter__(self):
+        return iter(list(self._levels))
+
+    def get(self, level, default=None):
+        return self._orders.get(level, default)
+
+    def entries(self):
+        with self._lock:
+            return [self._orders[level] for level in self._levels]
+
+    def put(self, entry):
+        # 同一档位已有订单时替换
+        with self._lock:
+            if entry.level not in self._orders:
+                bisect.insort(self._levels, entry.level)
+            self._orders[entry.level] = entry
+
+    def discard(self, level, order_id=None):
+        # 传入 order_id 时只删除仍指向该订单的记录, 避免删掉同价位刚重挂的新单
+        with self._lock:
+            entry = self._orders.get(level)
+            if entry is None or (order_id is not None and entry.order_id != order_id):
+                return None
+            del self._orders[level]
+            del self._levels[bisect.bisect_left(self._levels, level)]
+            return entry
+
+    def replace(self, entries):
+        # 整体替换 (对账后重建), 排序一次
+        orders = dict((e.level, e) for e in entries)
+        levels = sorted(orders)
+        with self._lock:
+            self._orders = orders
+            self._levels = levels
+
+    def clear(self):
+        self.replace(())
+
+    def lowest(self):
+        with self._lock:
+            return self._orders[self._levels[0]] if self._levels else None
+
+    def highest(self):
+        with self._lock:
+            return self._orders[self._levels[-1]] if self._levels else None
+
+    def best(self):
+        return self.lowest() if self.side == 'sell' else self.highest()
+
+    def worst(self):
+        return self.highest() if self.side == 'sell' else self.lowest()
+
+    def _bounds(self, lo, hi):
+        return bisect.bisect_left(self._levels, lo), bisect.bisect_right(self._levels, hi)
+
+    def within(self, lo, hi):
+        # [lo, hi] 内的订单, 按档位升序
+        with self._lock:
+            i, j = self._bounds(lo, hi)
+            return [self._orders[level] for level in self._levels[i:j]]
+
+    def outside(self, lo, hi):
+        # [lo, hi] 之外的订单, 只访问区间外的档位
+        with self._lock:
+            i, j = self._bounds(lo, hi)
+            return [self._orders[level] for level in self._levels[:i] + self._levels[j:]]
+
+    def evict_outside(self, lo, hi):
+        # 删除并返回 [lo, hi] 之外的订单
+        with self._lock:
+            i, j = self._bounds(lo, hi)
+            evicted = self._levels[:i] + self._levels[j:]
+            del self._levels[j:]
+            del self._levels[:i]
+            return [self._orders.pop(level) for level in evicted]
+
+    def missing(self, lo, hi):
+        # [lo, hi] 内没有挂单的档位
+        with self._lock:
+            i, j = self._bounds(lo, hi)
+            present = self._levels[i:j]
+        result = []
+        level = lo
+        for p in present:
+            result.extend(range(level, p))
+            level = p + 1
+        result.extend(range(level, hi + 1))
+        return result
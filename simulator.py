@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# 本地模拟撮合: 提供 trade.py 用到的 KuMEX 下单/行情接口和 OKEx 永续/交割 ticker 接口,
+# 价格路径、延迟和成交行为均可配置且由 seed 决定, 用于离线压测主循环
+# 用法: python simulator.py [--ticks N] [--seed S] [--latency 秒] [--path random_walk|sine|file.json]
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class PricePath(object):
+
+    # 每次 OKEx ticker 请求走一步, 与运行速度无关, 同一 seed 下结果完全一致
+    def __init__(self, kind='random_walk', start=10000, step=2, seed=1, amplitude=50, period=200, prices=None):
+        self.kind = kind
+        self.start = start
+        self.step = step
+        self.amplitude = amplitude
+        self.period = period
+        self.prices = prices
+        self.rand = random.Random(seed)
+        self.n = 0
+        self.price = float(start)
+
+    def next(self):
+        self.n += 1
+        if self.kind == 'sine':
+            self.price = self.start + self.amplitude * math.sin(2 * math.pi * self.n / self.period)
+        elif self.kind == 'file':
+            self.price = float(self.prices[(self.n - 1) % len(self.prices)])
+        else:
+            self.price += self.rand.randint(-self.step, self.step)
+        return self.price
+
+
+class Exchange(object):
+
+    # 极简撮合: 参考价穿过挂单价即成交 (可按 fill_prob 随机、按 fill_ratio 部分成交),
+    # 市价单按 taker_size 直接成交; 同时统计下单速率和 tick-to-quote 延迟
+    def __init__(self, path, seed=1, latency=0.0, jitter=0.0, fill_prob=1.0, fill_ratio=1.0,
+                 taker_size=0, depth=50, depth_size=1000, symbols=('XBTUSDM',), tick_size=1, lot_size=1):
+        self.path = path
+        self.rand = random.Random(seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.fill_prob = fill_prob
+        self.fill_ratio = fill_ratio
+        self.taker_size = taker_size
+        self.depth = depth
+        self.depth_size = depth_size
+        self.symbols = symbols
+        self.tick_size = tick_size
+        self.lot_size = lot_size
+        self.lock = threading.Lock()
+        self.orders = {}
+        self.sequence = 0
+        self.next_id = 0
+        self.mid = path.price
+        # 统计
+        self.started = time.monotonic()
+        self.placed = 0
+        self.market_orders = 0
+        self.cancelled = 0
+        self.filled = 0
+        self.requests = 0
+        self.tick_at = None
+        self.quote_latency = []
+
+    def delay(self):
+        if self.latency or self.jitter:
+            with self.lock:
+                d = self.latency + self.rand.uniform(0, self.jitter)
+            time.sleep(d)
+
+    # okex
+    def okex_ticker(self, instrument_id):
+        with self.lock:
+            last = self.mid
+            self.mid = self.path.next()
+            self._match()
+            if int(self.mid) != int(last):
+                self.tick_at = time.monotonic()
+            return {
+                'instrument_id': instrument_id,
+                'best_bid': '%.1f' % (self.mid - 0.5),
+                'best_ask': '%.1f' % (self.mid + 0.5),
+                'last': '%.1f' % self.mid,
+                'timestamp': '%.3f' % time.time()
+            }
+
+    def _match(self):
+        for o in self.orders.values():
+            if not o['isActive']:
+                continue
+            crossed = o['price'] <= self.mid if o['side'] == 'sell' else o['price'] >= self.mid
+            if crossed and self.rand.random() < self.fill_prob:
+                fill = max(1, int((o['size'] - o['dealSize']) * self.fill_ratio))
+                o['dealSize'] += fill
+                self.filled += fill
+                if o['dealSize'] >= o['size']:
+                    o['isActive'] = False
+                    o['status'] = 'done'
+                self.sequence += 1
+
+    # kumex
+    def contracts(self):
+        return [{
+            'symbol': symbol,
+            'tickSize': self.tick_size,
+            'lotSize': self.lot_size,
+            'multiplier': 1,
+            'maxOrderQty': 1000000,
+            'status': 'Open'
+        } for symbol in self.symbols]
+
+    def create_order(self, params):
+        with self.lock:
+            self.next_id += 1
+            order_id = 'sim%d' % self.next_id
+            size = int(params.get('size', 0))
+            if params.get('type') == 'market':
+                self.market_orders += 1
+                self.filled += size
+                return {'orderId': order_id}
+            self.placed += 1
+            if self.tick_at is not None:
+                self.quote_latency.append(time.monotonic() - self.tick_at)
+                self.tick_at = None
+            self.orders[order_id] = {
+                'id': order_id,
+                'symbol': params['symbol'],
+                'type': 'limit',
+                'side': params['side'],
+                'price': float(params['price']),
+                'size': size,
+                'dealSize': 0,
+                'isActive': True,
+                'status': 'open',
+                'clientOid': params.get('clientOid', ''),
+                'createdAt': int(time.time() * 1000)
+            }
+            self.sequence += 1
+            return {'orderId': order_id}
+
+    def cancel_order(self, order_id):
+        with self.lock:
+            o = self.orders.get(order_id)
+            if o is None or not o['isActive']:
+                return None
+            o['isActive'] = False
+            o['status'] = 'done'
+            self.cancelled += 1
+            self.sequence += 1
+            return {'cancelledOrderIds': [order_id]}
+
+    def cancel_all(self, symbol):
+        with self.lock:
+            ids = [o['id'] for o in self.orders.values() if o['isActive'] and o['symbol'] == symbol]
+        for order_id in ids:
+            self.cancel_order(order_id)
+        return {'cancelledOrderIds': ids}
+
+    def _public(self, o):
+        o = dict(o)
+        o['price'] = '%g' % o['price']
+        return o
+
+    def order_list(self, symbol, status):
+        with self.lock:
+            items = [self._public(o) for o in self.orders.values()
+                     if o['symbol'] == symbol and o['isActive'] == (status == 'active')]
+        return {'currentPage': 1, 'pageSize': len(items), 'totalNum': len(items), 'totalPage': 1, 'items': items}
+
+    def order_details(self, order_id):
+        with self.lock:
+            o = self.orders.get(order_id)
+            return self._public(o) if o is not None else None
+
+    def ticker(self, symbol):
+        with self.lock:
+            return {
+                'sequence': self.sequence,
+                'symbol': symbol,
+                'bestBidPrice': '%g' % (int(self.mid) - 1),
+                'bestBidSize': self.taker_size,
+                'bestAskPrice': '%g' % (int(self.mid) + 1),
+                'bestAskSize': self.taker_size,
+                'price': '%g' % self.mid,
+                'ts': time.time_ns()
+            }
+
+    def snapshot(self, symbol):
+        with self.lock:
+            mid = int(self.mid)
+            return {
+                'symbol': symbol,
+                'sequence': self.sequence,
+                'asks': [['%g' % (mid + i), self.depth_size] for i in range(1, self.depth + 1)],
+                'bids': [['%g' % (mid - i), self.depth_size] for i in range(1, self.depth + 1)]
+            }
+
+    def report(self):
+        elapsed = time.monotonic() - self.started
+        lat = sorted(self.quote_latency)
+
+        def pct(p):
+            return lat[min(len(lat) - 1, int(len(lat) * p))] * 1000 if lat else None
+
+        return {
+            'elapsed': elapsed,
+            'requests': self.requests,
+            'orders_placed': self.placed,
+            'market_orders': self.market_orders,
+            'orders_cancelled': self.cancelled,
+            'filled_size': self.filled,
+            'orders_per_sec': (self.placed + self.cancelled) / elapsed if elapsed else 0,
+            'tick_to_quote_ms': {'p50': pct(0.5), 'p99': pct(0.99), 'max': lat[-1] * 1000 if lat else None,
+                                 'count': len(lat)}
+        }
+
+
+def kumex_ok(data):
+    return {'code': '200000', 'data': data}
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    exchange = None
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, data, status=200):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self, method):
+        ex = self.exchange
+        ex.requests += 1
+        ex.delay()
+        url = urlparse(self.path)
+        path = url.path
+        query = dict((k, v[0]) for k, v in parse_qs(url.query).items())
+        parts = path.strip('/').split('/')
+
+        # okex
+        if path == '/api/general/v3/time':
+            return self._reply({'iso': '', 'epoch': '%.3f' % time.time()})
+        if path.startswith(('/api/swap/v3/instruments/', '/api/futures/v3/instruments/')) and parts[-1] == 'ticker':
+            return self._reply(ex.okex_ticker(parts[-2]))
+
+        # kumex
+        if path == '/api/v1/timestamp':
+            return self._reply(kumex_ok(int(time.time() * 1000)))
+        if path == '/api/v1/contracts/active':
+            return self._reply(kumex_ok(ex.contracts()))
+        if path == '/api/v1/ticker':
+            return self._reply(kumex_ok(ex.ticker(query['symbol'])))
+        if path == '/api/v1/level2/snapshot':
+            return self._reply(kumex_ok(ex.snapshot(query['symbol'])))
+        if path == '/api/v1/orders':
+            if method == 'POST':
+                length = int(self.headers.get('Content-Length', 0))
+                params = json.loads(self.rfile.read(length) or b'{}')
+                return self._reply(kumex_ok(ex.create_order(params)))
+            if method == 'DELETE':
+                return self._reply(kumex_ok(ex.cancel_all(query['symbol'])))
+            return self._reply(kumex_ok(ex.order_list(query.get('symbol'), query.get('status', 'active'))))
+        if path.startswith('/api/v1/orders/'):
+            order_id = parts[-1]
+            r = ex.cancel_order(order_id) if method == 'DELETE' else ex.order_details(order_id)
+            if r is None:
+                return self._reply({'code': '100004', 'msg': 'order not exist'}, 404)
+            return self._reply(kumex_ok(r))
+        self._reply({'code': '404', 'msg': 'not found: %s' % path}, 404)
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_POST(self):
+        self._route('POST')
+
+    def do_DELETE(self):
+        self._route('DELETE')
+
+
+class Server(ThreadingHTTPServer):
+
+    # 默认 listen backlog 只有 5, 压测并发下会溢出, 导致 SYN 重传 (约 1 秒) 和连接重置
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def serve(exchange, host='127.0.0.1', port=0):
+    handler = type('SimHandler', (Handler,), {'exchange': exchange})
+    server = Server((host, port), handler)
+    threading.Thread(target=server.serve_forever, name='simulator', daemon=True).start()
+    return server
+
+
+def sim_config(url, **kwargs):
+    # trade.Kumex 使用的配置, 两个交易所都指向模拟撮合
+    config = {
+        'ok_api_key': 'sim', 'ok_secret_key': 'sim', 'ok_pass_phrase': 'sim',
+        'kumex_api_key': 'sim', 'kumex_secret_key': 'sim', 'kumex_pass_phrase': 'sim',
+        'is_sandbox': True,
+        'ok_symbol': 'BTC-USD-SWAP', 'kumex_symbol': 'XBTUSDM', 'category': 'SWAP', 'side': '',
+        'interval': 0, 'maker_number': 20, 'taker_number': 5,
+        'ok_api_url': url, 'kumex_api_url': url,
+    }
+    config.update(kwargs)
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description='run the quoting loop against a local simulated exchange')
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--path', default='random_walk')
+    parser.add_argument('--fill-prob', type=float, default=1.0)
+    parser.add_argument('--fill-ratio', type=float, default=1.0)
+    parser.add_argument('--taker-size', type=int, default=0)
+    parser.add_argument('--maker-number', type=int, default=20)
+    parser.add_argument('--tick-size', type=float, default=1)
+    args = parser.parse_args()
+
+    if args.path.endswith('.json'):
+        with open(args.path) as f:
+            path = PricePath('file', prices=json.load(f))
+    else:
+        path = PricePath(args.path, seed=args.seed)
+    exchange = Exchange(path, seed=args.seed, latency=args.latency, jitter=args.jitter, fill_prob=args.fill_prob,
+                        fill_ratio=args.fill_ratio, taker_size=args.taker_size, tick_size=args.tick_size)
+    server = serve(exchange)
+    url = 'http://%s:%s' % server.server_address
+
+    import trade
+    service = trade.Kumex(sim_config(url, maker_number=args.maker_number))
+    trade.run(service, ticks=args.ticks)
+    print(json.dumps(exchange.report(), indent=2))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# 多进程模式: 把 config.json 中的 markets 按进程数分片, 每个子进程跑自己那部分合约的主循环;
+# 参考价由 supervisor 统一获取后写入共享内存, 子进程的日志和 metrics 汇总到 supervisor 输出,
+# 子进程异常退出时只重启该分片
+# 用法: python supervisor.py [--processes N]
+
+import argparse
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import consts as c
+import log
+import trade
+from okex import metrics, ratelimit
+import okex.consts as okc
+
+
+class PriceBoard(object):
+
+    # 共享内存里的参考价, 每个 OK 合约占 [best_bid, best_ask, 更新时间] 三个 double;
+    # 接口与 TickerFeed 相同 (get / age / wait), 可以直接作为 Shared 的 feed
+    def __init__(self, symbols, ctx=multiprocessing):
+        self.symbols = dict((s, i) for i, s in enumerate(symbols))
+        self.values = ctx.RawArray('d', len(self.symbols) * 3)
+        self.version = ctx.RawValue('q', 0)
+        self.cond = ctx.Condition()
+
+    def set(self, symbol, best_bid, best_ask):
+        i = self.symbols[symbol] * 3
+        with self.cond:
+            self.values[i] = best_bid
+            self.values[i + 1] = best_ask
+            self.values[i + 2] = time.time()
+            self.version.value += 1
+            self.cond.notify_all()
+
+    def get(self, symbol):
+        i = self.symbols.get(symbol)
+        if i is None:
+            return None
+        with self.cond:
+            best_bid, best_ask, ts = self.values[i * 3:i * 3 + 3]
+        if not ts:
+            return None
+        return {'best_bid': best_bid, 'best_ask': best_ask}
+
+    def age(self, symbol):
+        i = self.symbols.get(symbol)
+        if i is None:
+            return None
+        ts = self.values[i * 3 + 2]
+        return time.time() - ts if ts else None
+
+    def wait(self, version, timeout=None):
+        with self.cond:
+            self.cond.wait_for(lambda: self.version.value > version, timeout)
+            return self.version.value
+
+
+def worker_main(index, config, markets, board, log_queue, metrics_queue, metrics_interval):
+    # 子进程: 日志交给 supervisor 写, 参考价读共享内存, 定期上报 metrics
+    log.setup(level=config.get('log_level', 'WARNING'), handler=logging.handlers.QueueHandler(log_queue))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    config = dict(config, ws_feed=False, metrics_port=None)
+    shared = trade.Shared(config, markets, feed=board)
+    services = [trade.Kumex(m, shared) for m in markets]
+
+    def report():
+        while True:
+            time.sleep(metrics_interval)
+            metrics_queue.put((index, shared.metrics.snapshot()))
+
+    threading.Thread(target=report, name='metrics-report', daemon=True).start()
+    logging.warning('worker %s started: %s', index, ', '.join(m['kumex_symbol'] for m in markets))
+    trade.run_all(services, on_phase=shared.metrics.observe_phase)
+
+
+def split_limits(config, parts):
+    # 同一个 API key 的限速额度按进程数平分, 返回覆盖到各进程配置里的限速项
+    kumex_rules, kumex_default = ratelimit.split_rules(
+        config.get('kumex_rate_limits', c.KUMEX_RATE_LIMITS),
+        config.get('kumex_default_rate_limit', c.KUMEX_DEFAULT_RATE_LIMIT), parts)
+    ok_rules, ok_default = ratelimit.split_rules(
+        config.get('ok_rate_limits', okc.RATE_LIMITS),
+        config.get('ok_default_rate_limit', okc.DEFAULT_RATE_LIMIT), parts)
+    return {'kumex_rate_limits': kumex_rules, 'kumex_default_rate_limit': kumex_default,
+            'ok_rate_limits': ok_rules, 'ok_default_rate_limit': ok_default}
+
+
+class Supervisor(object):
+
+    def __init__(self, config, processes=None):
+        self.markets = trade.market_configs(config)
+        processes = processes or config.get('processes') or os.cpu_count() or 1
+        n = min(processes, len(self.markets))
+        self.shards = [self.markets[i::n] for i in range(n)]
+        # supervisor (取参考价) 和每个子进程各持有 1/(n + 1) 的限速额度, 合计不超过一个 API key 的额度
+        self.config = dict(config, **split_limits(config, n + 1))
+        self.publish_interval = config.get('publish_interval', 0.1)
+        self.metrics_interval = config.get('metrics_interval', 5)
+        self.restart_wait = config.get('restart_wait', 1)
+        self.ctx = multiprocessing.get_context('spawn')
+        # 不同合约可能参考同一个 OK 合约, 只取一次
+        self.references = sorted(set((m['category'], m['ok_symbol']) for m in self.markets))
+        self.board = PriceBoard([s for _, s in self.references], self.ctx)
+        self.log_queue = self.ctx.Queue()
+        self.metrics_queue = self.ctx.Queue()
+        self.snapshots = {}
+        self.processes = {}
+        self.restarts = {}
+        self._stop = threading.Event()
+        # supervisor 自己只请求 OK 参考价, 不单独开 metrics 端口, 由 render 汇总后统一导出
+        self.shared = trade.Shared(dict(self.config, metrics_port=None), self.markets)
+
+    def publish(self):
+        feed = self.shared.feed
+        version = 0
+        while not self._stop.is_set():
+            if feed is not None:
+                version = feed.wait(version, self.publish_interval)
+            for category, ok_symbol in self.references:
+                r = None
+                if feed is not None:
+                    age = feed.age(ok_symbol)
+                    if age is not None and age < c.FEED_STALE_SECONDS:
+                        r = feed.get(ok_symbol)
+                if not r:
+                    try:
+                        r = self.shared.get_ticker(category, ok_symbol, self.config.get('request_timeout', 2))
+                    except Exception as e:
+                        logging.error(e)
+                if r:
+                    self.board.set(ok_symbol, float(r['best_bid']), float(r['best_ask']))
+            if feed is None:
+                self._stop.wait(self.publish_interval)
+
+    def collect(self):
+        while not self._stop.is_set():
+            try:
+                index, snapshot = self.metrics_queue.get(timeout=1)
+            except Exception:
+                continue
+            self.snapshots[index] = snapshot
+
+    def render(self):
+        # 汇总 supervisor 和各子进程的 metrics
+        merged = metrics.Metrics()
+        merged.merge(self.shared.metrics.snapshot())
+        for snapshot in list(self.snapshots.values()):
+            merged.merge(snapshot)
+        return merged.render()
+
+    def spawn(self, index):
+        p = self.ctx.Process(target=worker_main, name='worker-%s' % index,
+                             args=(index, self.config, self.shards[index], self.board, self.log_queue,
+                                   self.metrics_queue, self.metrics_interval))
+        p.start()
+        self.processes[index] = p
+        return p
+
+    def stop(self, *args):
+        self._stop.set()
+
+    def run(self):
+        listener = logging.handlers.QueueListener(self.log_queue, *logging.getLogger().handlers,
+                                                  respect_handler_level=True)
+        listener.start()
+        threading.Thread(target=self.publish, name='publish', daemon=True).start()
+        threading.Thread(target=self.collect, name='metrics-collect', daemon=True).start()
+        server = None
+        if self.config.get('metrics_port'):
+            server = metrics.serve(self, port=self.config['metrics_port'])
+        for index in range(len(self.shards)):
+            self.spawn(index)
+        died = {}
+        try:
+            while not self._stop.wait(1):
+                now = time.monotonic()
+                for index, p in list(self.processes.items()):
+                    if p.is_alive():
+                        continue
+                    # 只重启退出的分片, 其余子进程不受影响
+                    if index not in died:
+                        died[index] = now
+                        logging.error('worker %s exited with code %s', index, p.exitcode)
+                    elif now - died[index] >= self.restart_wait:
+                        del died[index]
+                        self.restarts[index] = self.restarts.get(index, 0) + 1
+                        logging.warning('restarting worker %s (%s)', index, self.restarts[index])
+                        self.spawn(index)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            for p in self.processes.values():
+                p.terminate()
+            for p in self.processes.values():
+                p.join()
+            if server is not None:
+                server.shutdown()
+            listener.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='shard the configured markets across worker processes')
+    parser.add_argument('--processes', type=int, help='number of worker processes, defaults to the cpu count')
+    args = parser.parse_args()
+    config = trade.load_config()
+    trade.log_setting(config)
+    supervisor = Supervisor(config, args.processes)
+    signal.signal(signal.SIGTERM, supervisor.stop)
+    supervisor.run()
+
+
+if __name__ == '__main__':
+    main()
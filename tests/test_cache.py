@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+from okex.cache import ResponseCache
+
+
+def test_concurrent_gets_share_one_fetch():
+    cache = ResponseCache()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return {'best_bid': '1'}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('k', 0, fetch))) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert len(results) == 10
+    assert cache.stats()['coalesced'] == 9
+    # ttl 为 0 时只合并, 不缓存
+    cache.get('k', 0, fetch)
+    assert len(calls) == 2
+
+
+def test_ttl_and_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    assert cache.get('a', 10, lambda: 1) == 1
+    assert cache.get('a', 10, lambda: 2) == 1
+    cache.get('b', 10, lambda: 2)
+    cache.get('c', 10, lambda: 3)
+    assert cache.stats()['evictions'] == 1
+    assert cache.get('a', 10, lambda: 4) == 4
+
+
+def test_followers_raise_their_own_error():
+    cache = ResponseCache()
+    errors = []
+
+    def fetch():
+        time.sleep(0.05)
+        raise ValueError('boom')
+
+    def call():
+        try:
+            cache.get('k', 10, fetch)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(errors) == 4
+    assert len(set(map(id, errors))) == 4
+    assert cache.stats()['entries'] == 0
+
+
+def test_async_gets_share_one_fetch():
+    cache = ResponseCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 1
+
+    async def main():
+        return await asyncio.gather(*[cache.aget('k', 10, fetch) for _ in range(5)])
+
+    assert asyncio.run(main()) == [1] * 5
+    assert len(calls) == 1
+
+
+def test_async_follower_errors_are_copies():
+    cache = ResponseCache()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        raise ValueError('boom')
+
+    async def main():
+        return await asyncio.gather(*[cache.aget('k', 10, fetch) for _ in range(3)], return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert len(set(map(id, errors))) == 3
@@ -0,0 +1,53 @@
+import threading
+import time
+from okex import clock
+
+
+class Response(object):
+
+    status_code = 200
+
+    def __init__(self, epoch):
+        self.epoch = epoch
+
+    def json(self):
+        return {'epoch': '%.3f' % self.epoch}
+
+
+class SlowServer(object):
+
+    # 服务器时间比本地快 offset 秒, 每次请求耗时 delay 秒
+    def __init__(self, offset=5.0, delay=0.0):
+        self.offset = offset
+        self.delay = delay
+        self.calls = 0
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        return Response(time.time() + self.offset)
+
+
+def test_sync_start_waits_for_first_sync_started_by_async_client():
+    server = SlowServer(delay=0.2)
+    # AsyncClient 先创建, 首次同步在后台线程
+    c = clock.start_clock(server, api_url='http://clock-a', wait=False)
+    # 同步 Client 随后创建, 返回时必须已经同步过
+    assert clock.start_clock(api_url='http://clock-a') is c
+    assert c.last_sync is not None and c.rtt is not None
+    assert abs(c.offset - 5.0) < 0.5
+    c.stop()
+
+
+def test_first_sync_does_not_block_other_api_urls():
+    slow = SlowServer(delay=0.5)
+    t = threading.Thread(target=clock.start_clock, args=(slow, 'http://clock-slow'))
+    t.start()
+    time.sleep(0.05)
+    started = time.monotonic()
+    fast = clock.start_clock(SlowServer(), api_url='http://clock-fast')
+    assert time.monotonic() - started < 0.3
+    assert fast.last_sync is not None
+    t.join()
+    fast.stop()
+    clock.start_clock(api_url='http://clock-slow').stop()
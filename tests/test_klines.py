@@ -0,0 +1,65 @@
+import json
+import os
+from okex import klines
+
+START = 1577836800  # 2020-01-01T00:00:00Z
+G = 60
+
+
+class FakeApi(object):
+
+    # 模拟 v3 candles: 新的在前, 每次最多返回 cap 根 (保留最近的), oldest 之前没有数据
+    def __init__(self, cap=200, oldest=START):
+        self.cap = cap
+        self.oldest = oldest
+        self.calls = []
+
+    def get_kline(self, instrument_id, granularity=None, start=None, end=None):
+        start, end = klines.to_epoch(start), klines.to_epoch(end)
+        self.calls.append((start, end))
+        ts = [t for t in range(start // granularity * granularity, end, granularity) if t >= self.oldest]
+        return [[klines.to_iso(t), '1', '2', '0.5', '1.5', '10', '0.1'] for t in reversed(ts)][:self.cap]
+
+
+def ranges(cache_dir):
+    with open(os.path.join(cache_dir, 'BTC-USD-SWAP', str(G), 'ranges.json')) as f:
+        return json.load(f)
+
+
+def test_full_download_is_not_requested_again(tmp_path):
+    api = FakeApi()
+    cache = klines.KlineCache(api, cache_dir=str(tmp_path))
+    data = cache.download('BTC-USD-SWAP', G, START, START + 500 * G)
+    assert len(data['ts']) == 500
+    assert len(api.calls) == 3
+    cache.download('BTC-USD-SWAP', G, START, START + 500 * G)
+    assert len(api.calls) == 3
+
+
+def test_truncated_replies_leave_holes_to_refetch(tmp_path):
+    # 窗口比接口上限大: 每个窗口只回来最近的 200 根, 没回来的部分不能记为已下载
+    api = FakeApi(cap=200)
+    cache = klines.KlineCache(api, cache_dir=str(tmp_path), limit=300)
+    data = cache.download('BTC-USD-SWAP', G, START, START + 600 * G)
+    assert len(data['ts']) == 400
+    assert ranges(str(tmp_path)) == [[START + 100 * G, START + 300 * G], [START + 400 * G, START + 600 * G]]
+    # 下次只补缺口
+    cache.limit = 200
+    api.calls[:] = []
+    data = cache.download('BTC-USD-SWAP', G, START, START + 600 * G)
+    assert sorted(api.calls) == [(START, START + 100 * G), (START + 300 * G, START + 400 * G)]
+    assert len(data['ts']) == 600
+    assert ranges(str(tmp_path)) == [[START, START + 600 * G]]
+
+
+def test_history_before_oldest_is_not_marked_covered(tmp_path):
+    api = FakeApi(oldest=START + 100 * G)
+    cache = klines.KlineCache(api, cache_dir=str(tmp_path))
+    data = cache.download('BTC-USD-SWAP', G, START, START + 150 * G)
+    assert len(data['ts']) == 50
+    assert ranges(str(tmp_path)) == [[START + 100 * G, START + 150 * G]]
+    # 空的回复同样不记录
+    api.calls[:] = []
+    cache.download('BTC-USD-SWAP', G, START, START + 100 * G)
+    assert api.calls == [(START, START + 100 * G)]
+    assert ranges(str(tmp_path)) == [[START + 100 * G, START + 150 * G]]
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import threading
+import time
+import websockets
+from kumex_ws import KumexMux
+
+TOPIC = '/contractMarket/level2:XBTUSDM'
+
+
+class StandIn(object):
+
+    # 本地 websocket 替身: 记录订阅, push 为真时对已订阅的 topic 持续推送 level2 消息; drop() 断开当前连接
+    def __init__(self):
+        self.subscribes = []
+        self.connections = 0
+        self.push = True
+        self._sockets = set()
+        self.loop = asyncio.new_event_loop()
+        self.port = None
+        ready = threading.Event()
+        threading.Thread(target=self._main, args=(ready,), daemon=True).start()
+        ready.wait(5)
+
+    async def _handler(self, ws):
+        self.connections += 1
+        self._sockets.add(ws)
+        topics = []
+
+        async def push():
+            sequence = 0
+            while True:
+                await asyncio.sleep(0.05)
+                for topic in topics if self.push else ():
+                    sequence += 1
+                    await ws.send(json.dumps({'type': 'message', 'topic': topic, 'subject': 'level2',
+                                              'data': {'sequence': sequence, 'change': '1,sell,1'}}))
+
+        pusher = asyncio.ensure_future(push())
+        try:
+            async for raw in ws:
+                msg = json.loads(raw)
+                if msg.get('type') == 'subscribe':
+                    self.subscribes.append(msg['topic'])
+                    topics.append(msg['topic'])
+                    await ws.send(json.dumps({'id': msg['id'], 'type': 'ack'}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            pusher.cancel()
+            self._sockets.discard(ws)
+
+    def _main(self, ready):
+        asyncio.set_event_loop(self.loop)
+
+        async def start():
+            server = await websockets.serve(self._handler, '127.0.0.1', 0)
+            self.port = server.sockets[0].getsockname()[1]
+            ready.set()
+            await asyncio.Event().wait()
+
+        self.loop.run_until_complete(start())
+
+    def drop(self):
+        async def close():
+            for ws in list(self._sockets):
+                await ws.close()
+        asyncio.run_coroutine_threadsafe(close(), self.loop).result(5)
+
+    def get_ws_token(self, private=False):
+        # kumex.client.WsToken 的替身
+        return {'token': 't', 'instanceServers': [
+            {'endpoint': 'ws://127.0.0.1:%d' % self.port, 'encrypt': None, 'pingTimeout': 50000}]}
+
+
+def wait_until(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_mux_resubscribes_after_server_drop():
+    server = StandIn()
+    messages = []
+    exits = []
+    mux = KumexMux(server, name='test-level2', idle_timeout=5, reconnect_delay=0.1)
+    mux.subscribe(TOPIC, messages.append, lambda: exits.append(1))
+    try:
+        assert wait_until(lambda: len(messages) > 3)
+        assert server.subscribes == [TOPIC]
+        server.drop()
+        # SDK 自己重连后不会重新订阅; 看门狗应关闭连接、通知订阅方, 由 mux 重连并重新订阅
+        assert wait_until(lambda: server.subscribes == [TOPIC, TOPIC])
+        assert exits
+        count = len(messages)
+        assert wait_until(lambda: len(messages) > count + 3)
+    finally:
+        mux.stop()
+
+
+def test_idle_topic_triggers_reconnect():
+    server = StandIn()
+    messages = []
+    exits = []
+    mux = KumexMux(server, name='test-idle', idle_timeout=1, reconnect_delay=0.1)
+    mux.subscribe(TOPIC, messages.append, lambda: exits.append(1))
+    try:
+        assert wait_until(lambda: messages)
+        # 连接还在但 topic 不再有消息 (例如订阅被丢弃), 超过 idle_timeout 后重连并重新订阅
+        server.push = False
+        assert wait_until(lambda: exits and server.subscribes == [TOPIC, TOPIC])
+        assert server.connections == 2
+    finally:
+        mux.stop()
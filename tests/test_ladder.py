@@ -0,0 +1,53 @@
+import ladder
+from price_levels import OrderEntry, PriceLevels
+
+
+def levels(side, prices):
+    return PriceLevels(side, [OrderEntry(p, p, side, 100, '%s-%s' % (side, p)) for p in prices])
+
+
+def test_unchanged_ladder_is_noop():
+    # market_price = 100, 4 档: 卖 101..103, 买 98..100
+    sells = levels('sell', [101, 102, 103])
+    buys = levels('buy', [98, 99, 100])
+    diff = ladder.diff_ladder(100, 4, sells, buys, 10, 1000)
+    assert len(diff) == 0
+
+
+def test_shifted_price_cancels_and_places():
+    sells = levels('sell', [101, 102, 103])
+    buys = levels('buy', [98, 99, 100])
+    # 价格上移 5 档, 原有挂单全部落在区间外
+    diff = ladder.diff_ladder(105, 4, sells, buys, 10, 1000)
+    assert sorted(diff.cancels) == sorted([('sell-101', 101, 'sell'), ('sell-102', 102, 'sell'),
+                                           ('sell-103', 103, 'sell'), ('buy-98', 98, 'buy'),
+                                           ('buy-99', 99, 'buy'), ('buy-100', 100, 'buy')])
+    assert sorted(diff.places) == sorted([(106, 'sell'), (107, 'sell'), (108, 'sell'),
+                                          (103, 'buy'), (104, 'buy'), (105, 'buy')])
+    assert diff.amends == []
+
+
+def test_partial_overlap_keeps_common_levels():
+    sells = levels('sell', [101, 102, 103])
+    buys = levels('buy', [98, 99, 100])
+    # 上移 1 档: 卖 102..104, 买 99..101
+    diff = ladder.diff_ladder(101, 4, sells, buys, 10, 1000)
+    assert sorted(diff.cancels) == [('buy-98', 98, 'buy'), ('sell-101', 101, 'sell')]
+    assert sorted(diff.places) == [(101, 'buy'), (104, 'sell')]
+    assert diff.amends == []
+
+
+def test_partly_filled_orders_are_amended_and_done_orders_replaced():
+    sells = levels('sell', [101, 102, 103])
+    buys = levels('buy', [98, 99, 100])
+    info = {
+        'sell-102': {'isActive': True, 'size': 100, 'dealSize': 95},
+        'buy-99': {'isActive': False, 'size': 100, 'dealSize': 100},
+    }
+    default = {'isActive': True, 'size': 100, 'dealSize': 0}
+    diff = ladder.diff_ladder(100, 4, sells, buys, 10, 1000, lambda order_id: info.get(order_id, default))
+    # 剩余数量不足的撤单重挂; 已结束的不撤单, 直接在原价位补单
+    assert diff.cancels == []
+    assert diff.amends == [('sell-102', 102, 'sell')]
+    assert diff.done == [('buy-99', 99, 'buy')]
+    assert diff.places == [(99, 'buy')]
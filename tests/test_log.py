@@ -0,0 +1,39 @@
+import logging
+import queue
+import threading
+import log
+
+
+def record(msg, *args):
+    return logging.LogRecord('test', logging.INFO, __file__, 1, msg, args, None)
+
+
+def test_message_is_formatted_when_logged():
+    q = queue.Queue()
+    handler = log.QueueHandler(q)
+    args = [1]
+    handler.handle(record('args = %s', args))
+    args.append(2)
+    r = q.get_nowait()
+    assert r.getMessage() == 'args = [1]'
+    assert r.args is None
+
+
+def test_drops_are_counted_across_threads():
+    q = queue.Queue(1)
+    handler = log.QueueHandler(q)
+
+    def emit():
+        for _ in range(1000):
+            handler.handle(record('x'))
+
+    threads = [threading.Thread(target=emit) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert handler.dropped == 8000 - 1
+    # 队列有空位后, 下一条日志前先补一条丢弃说明
+    q.get_nowait()
+    handler.handle(record('y'))
+    assert q.get_nowait().getMessage() == '日志队列已满, 累计丢弃 7999 条'
@@ -0,0 +1,32 @@
+import simulator
+import trade
+
+
+def start():
+    # 成交概率为 0, 挂单只会被外部撤掉
+    exchange = simulator.Exchange(simulator.PricePath(seed=1), fill_prob=0)
+    server = simulator.serve(exchange)
+    url = 'http://%s:%s' % server.server_address
+    return exchange, server, trade.Kumex(simulator.sim_config(url, maker_number=6))
+
+
+def active(exchange):
+    return len(exchange.order_list('XBTUSDM', 'active')['items'])
+
+
+def test_requotes_after_orders_cancelled_outside():
+    exchange, server, service = start()
+    try:
+        trade.run(service, ticks=3)
+        assert active(exchange) == 10
+        # 手工或其他进程撤掉全部挂单, 主循环应在下一轮补齐
+        exchange.cancel_all('XBTUSDM')
+        assert active(exchange) == 0
+        trade.run(service, ticks=2)
+        assert active(exchange) == 10
+        ids = set(o['id'] for o in exchange.order_list('XBTUSDM', 'active')['items'])
+        local = set(o.order_id for o in service.sell_list.entries() + service.buy_list.entries())
+        assert local == ids
+    finally:
+        server.shutdown()
+
@@ -0,0 +1,44 @@
+import threading
+from okex import metrics, ratelimit
+
+
+def limiter():
+    return ratelimit.RateLimiter([('orders', None, '/orders', 100, 1)], (10, 10))
+
+
+def line(text, prefix):
+    return [l for l in text.splitlines() if l.startswith(prefix)]
+
+
+def test_limiter_queue_and_wait_are_exported():
+    m = metrics.Metrics()
+    lim = limiter()
+    m.add_limiter('kumex', lim)
+    bucket = lim.bucket('POST', '/orders')
+    assert bucket.acquire()
+    # 令牌用完后第二个请求排队等待
+    waiter = threading.Thread(target=bucket.acquire)
+    waiter.start()
+    waiter.join()
+    text = m.render()
+    assert line(text, 'ratelimit_granted_total{exchange="kumex",bucket="orders"}') == \
+        ['ratelimit_granted_total{exchange="kumex",bucket="orders"} 2']
+    assert line(text, 'ratelimit_queue_depth{exchange="kumex",bucket="orders"}') == \
+        ['ratelimit_queue_depth{exchange="kumex",bucket="orders"} 0']
+    wait = float(line(text, 'ratelimit_wait_seconds_total{exchange="kumex",bucket="orders"}')[0].split()[-1])
+    assert wait > 0
+    assert line(text, 'ratelimit_granted_total{exchange="kumex",bucket="default"}')
+
+
+def test_limiter_stats_merge_across_processes():
+    workers = []
+    for _ in range(2):
+        m = metrics.Metrics()
+        lim = limiter()
+        m.add_limiter('okex', lim)
+        lim.bucket('GET', '/orders').acquire()
+        workers.append(m.snapshot())
+    merged = metrics.Metrics()
+    for snapshot in workers:
+        merged.merge(snapshot)
+    assert 'ratelimit_granted_total{exchange="okex",bucket="orders"} 2' in merged.render()
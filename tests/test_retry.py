@@ -0,0 +1,133 @@
+import socket
+import threading
+import time
+import pytest
+import requests
+from okex import consts as c, exceptions, retry
+from okex.client import Client
+
+
+class DropServer(object):
+
+    # 读完请求 (包括 body) 后不回复直接断开连接, 模拟请求已送达但响应丢失
+    def __init__(self):
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(16)
+        self.requests = []
+        self.url = 'http://127.0.0.1:%d' % self.sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            with conn:
+                data = b''
+                while b'\r\n\r\n' not in data:
+                    chunk = conn.recv(65536)
+                    if not chunk:
+                        break
+                    data += chunk
+                head, _, body = data.partition(b'\r\n\r\n')
+                length = 0
+                for line in head.split(b'\r\n')[1:]:
+                    name, _, value = line.partition(b':')
+                    if name.strip().lower() == b'content-length':
+                        length = int(value)
+                while len(body) < length:
+                    body += conn.recv(65536)
+                self.requests.append(head.split(b' ', 1)[0].decode())
+
+    def close(self):
+        self.sock.close()
+
+
+@pytest.fixture
+def server():
+    s = DropServer()
+    yield s
+    s.close()
+
+
+def client(url):
+    return Client('key', 'secret', 'pass', breakers=retry.CircuitBreakers(), cache=False,
+                  retry_policy=retry.RetryPolicy(max_attempts=3, base=0.01, cap=0.01), api_url=url)
+
+
+def test_post_is_not_resent_after_body_was_sent(server):
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client(server.url)._request_with_params(c.POST, '/api/swap/v3/order', {'instrument_id': 'BTC-USD-SWAP'})
+    assert server.requests == ['POST']
+
+
+def test_get_is_retried_after_connection_drop(server):
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client(server.url)._request_without_params(c.GET, '/api/swap/v3/position')
+    assert server.requests == ['GET'] * 3
+
+
+def test_connect_failure_is_retryable_for_post():
+    s = socket.socket()
+    s.bind(('127.0.0.1', 0))
+    port = s.getsockname()[1]
+    s.close()
+    with pytest.raises(requests.exceptions.ConnectionError) as info:
+        requests.post('http://127.0.0.1:%d/' % port, data=b'{}', timeout=1)
+    assert retry.is_connect_error(info.value)
+    assert retry.is_retryable(info.value, c.POST)
+
+
+def test_half_open_probe_expires():
+    breaker = retry.CircuitBreaker('test', failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    with pytest.raises(exceptions.OkexCircuitOpenException):
+        breaker.check()
+    time.sleep(0.06)
+    breaker.check()
+    # 探测请求没有记录结果, 期间其他调用仍被拒绝, 超时后放行新的探测
+    with pytest.raises(exceptions.OkexCircuitOpenException):
+        breaker.check()
+    time.sleep(0.06)
+    breaker.check()
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED
+
+
+def test_released_probe_allows_next_probe():
+    breaker = retry.CircuitBreaker('test', failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.check()
+    breaker.release()
+    breaker.check()
+
+
+class ClosedBucket(object):
+
+    # 限速排队一直拿不到额度
+    name = 'closed'
+
+    def acquire(self, priority, timeout=None):
+        time.sleep(timeout)
+        return False
+
+
+class ClosedLimiter(object):
+
+    def bucket(self, method, request_path):
+        return ClosedBucket()
+
+
+def test_queue_timeout_releases_half_open_probe():
+    breakers = retry.CircuitBreakers(failure_threshold=1, reset_timeout=0.05)
+    breaker = breakers.get(ClosedBucket.name)
+    breaker.record_failure()
+    time.sleep(0.06)
+    api = Client('key', 'secret', 'pass', rate_limiter=ClosedLimiter(), breakers=breakers, cache=False,
+                 timeout=0.01, api_url='http://127.0.0.1:1')
+    with pytest.raises(exceptions.OkexTimeoutException):
+        api._request_without_params(c.GET, '/api/swap/v3/position')
+    breaker.check()
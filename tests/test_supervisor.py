@@ -0,0 +1,15 @@
+import consts as c
+import okex.consts as okc
+import supervisor
+
+
+def test_shards_split_the_rate_budget():
+    config = {'markets': [{'kumex_symbol': 'XBTUSDM'}, {'kumex_symbol': 'ETHUSDM'}, {'kumex_symbol': 'XRPUSDM'}]}
+    limits = supervisor.split_limits(config, 4)
+    # 4 个进程 (supervisor + 3 个分片) 的额度合计等于单个 API key 的额度
+    for (name, method, prefix, rate, capacity), split in zip(c.KUMEX_RATE_LIMITS, limits['kumex_rate_limits']):
+        assert split == (name, method, prefix, rate / 4.0, capacity / 4.0)
+    assert limits['kumex_default_rate_limit'] == (c.KUMEX_DEFAULT_RATE_LIMIT[0] / 4.0,
+                                                  c.KUMEX_DEFAULT_RATE_LIMIT[1] / 4.0)
+    assert len(limits['ok_rate_limits']) == len(okc.RATE_LIMITS)
+    assert limits['ok_rate_limits'][0][3] == okc.RATE_LIMITS[0][3] / 4.0
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import threading
+import time
+import zlib
+import websockets
+from okex.ws_feed import TickerFeed, ticker_channel
+
+CHANNEL = ticker_channel('swap/ticker', 'BTC-USD-SWAP')
+
+
+def deflate(text):
+    # 与 OKEx v3 一样发 raw deflate 压缩的二进制帧
+    compress = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compress.compress(text.encode('utf-8')) + compress.flush()
+
+
+class StandIn(object):
+
+    # 本地 websocket 替身: 记录订阅, push() 向当前连接发 ticker, drop() 断开当前连接
+    def __init__(self):
+        self.subscribes = []
+        self.connections = 0
+        self._sockets = set()
+        self.loop = asyncio.new_event_loop()
+        self.port = None
+        ready = threading.Event()
+        threading.Thread(target=self._main, args=(ready,), daemon=True).start()
+        ready.wait(5)
+
+    @property
+    def url(self):
+        return 'ws://127.0.0.1:%d' % self.port
+
+    async def _handler(self, ws):
+        self.connections += 1
+        self._sockets.add(ws)
+        try:
+            async for message in ws:
+                if message == 'ping':
+                    await ws.send('pong')
+                    continue
+                msg = json.loads(message)
+                if msg.get('op') == 'subscribe':
+                    self.subscribes.append(msg['args'])
+                    for channel in msg['args']:
+                        await ws.send(json.dumps({'event': 'subscribe', 'channel': channel}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._sockets.discard(ws)
+
+    def _main(self, ready):
+        asyncio.set_event_loop(self.loop)
+
+        async def start():
+            server = await websockets.serve(self._handler, '127.0.0.1', 0)
+            self.port = server.sockets[0].getsockname()[1]
+            ready.set()
+            await asyncio.Event().wait()
+
+        self.loop.run_until_complete(start())
+
+    def _call(self, fn):
+        async def run():
+            for ws in list(self._sockets):
+                await fn(ws)
+        asyncio.run_coroutine_threadsafe(run(), self.loop).result(5)
+
+    def push(self, best_bid, best_ask, instrument_id='BTC-USD-SWAP'):
+        message = json.dumps({'table': 'swap/ticker', 'data': [
+            {'instrument_id': instrument_id, 'best_bid': best_bid, 'best_ask': best_ask, 'last': best_bid}]})
+        self._call(lambda ws: ws.send(deflate(message)))
+
+    def drop(self):
+        self._call(lambda ws: ws.close())
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def start_feed(server):
+    feed = TickerFeed([CHANNEL], url=server.url, ping_interval=5, reconnect_wait=0.1).start()
+    assert wait_until(lambda: server.subscribes)
+    return feed
+
+
+def test_subscribe():
+    server = StandIn()
+    feed = start_feed(server)
+    try:
+        assert server.subscribes == [[CHANNEL]]
+        assert feed.get('BTC-USD-SWAP') is None
+        assert feed.age('BTC-USD-SWAP') is None
+    finally:
+        feed.stop()
+
+
+def test_version_and_wait_wakeup():
+    server = StandIn()
+    feed = start_feed(server)
+    try:
+        started = time.monotonic()
+        threading.Timer(0.1, server.push, ('100.0', '100.5')).start()
+        version = feed.wait(0, timeout=5)
+        assert version == 1
+        assert time.monotonic() - started < 1
+        assert feed.get('BTC-USD-SWAP')['best_ask'] == '100.5'
+        # 买一/卖一不变的推送不加 version, wait 超时返回原值
+        server.push('100.0', '100.5')
+        assert feed.wait(version, timeout=0.3) == version
+        server.push('100.5', '101.0')
+        assert feed.wait(version, timeout=5) == version + 1
+    finally:
+        feed.stop()
+
+
+def test_age_staleness():
+    server = StandIn()
+    feed = start_feed(server)
+    try:
+        server.push('100.0', '100.5')
+        assert wait_until(lambda: feed.age('BTC-USD-SWAP') is not None)
+        assert feed.age('BTC-USD-SWAP') < 0.5
+        time.sleep(0.3)
+        assert feed.age('BTC-USD-SWAP') >= 0.3
+        # 再次推送 (即使价格不变) 刷新 age
+        server.push('100.0', '100.5')
+        assert wait_until(lambda: feed.age('BTC-USD-SWAP') < 0.1)
+        assert feed.age('ETH-USD-SWAP') is None
+    finally:
+        feed.stop()
+
+
+def test_reconnect_after_server_drop():
+    server = StandIn()
+    feed = start_feed(server)
+    try:
+        server.push('100.0', '100.5')
+        version = feed.wait(0, timeout=5)
+        server.drop()
+        # 断线后重新连接并重新订阅
+        assert wait_until(lambda: server.connections == 2 and len(server.subscribes) == 2)
+        assert server.subscribes == [[CHANNEL], [CHANNEL]]
+        server.push('101.0', '101.5')
+        assert feed.wait(version, timeout=5) == version + 1
+        assert feed.get('BTC-USD-SWAP')['best_bid'] == '101.0'
+    finally:
+        feed.stop()
@@ -2,30 +2,100 @@
 # -*- coding: utf-8 -*-
 
 import json
-from concurrent.futures import ThreadPoolExecutor, wait, ALL_COMPLETED
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import time
 import random
 import logging
 import consts as c
-from kumex.client import Trade, Market
+import log
+from kumex.client import Trade, Market, WsToken
 import okex.swap_api as swap
 import okex.futures_api as future
+from okex.session import HttpSession
+from okex.ws_feed import TickerFeed, ticker_channel
+from okex import metrics, ratelimit
+from okex.cache import ResponseCache
+import okex.consts as okc
+from orderbook import OrderBook
+from order_store import OrderStore
+from kumex_ws import KumexMux
+from price_levels import OrderEntry, PriceLevels
+from instruments import Instrument, InstrumentRegistry, kumex_instruments
+import ladder
+import kumex_batch
 
 
-def log_setting():
-    logging.basicConfig(filename=c.LOG_FILE,
-                        format='%(asctime)s - %(levelname)s - %(module)s - %(lineno)d:  %(message)s',
-                        datefmt='%Y-%m-%d %H:%M:%S %p',
-                        level=logging.WARNING)
+def log_setting(config=None):
+    # 日志在后台线程格式化并写文件, 主循环和下单线程只入队
+    config = config or {}
+    log.setup(config.get('log_file', c.LOG_FILE), config.get('log_level', 'WARNING'),
+              config.get('log_max_bytes', c.LOG_MAX_BYTES), config.get('log_backup_count', c.LOG_BACKUP_COUNT),
+              config.get('log_json', False))
 
 
-class Kumex(object):
+def instrument_kumex(api, registry):
+    # python-kumex 没有扩展点, 包一层实例上的 _request 统计 KuMEX 各接口耗时和错误
+    request = api._request
 
-    def __init__(self):
-        # read configuration from json file
-        with open(c.CONFIG_FILE, 'r') as file:
-            config = json.load(file)
+    def _request(method, uri, timeout=5, auth=True, params=None):
+        key = registry.begin('kumex', method, uri)
+        start = time.perf_counter()
+        try:
+            r = request(method, uri, timeout=timeout, auth=auth, params=params)
+        except Exception as e:
+            # SDK 的错误信息形如 '400-{...}', 取 HTTP 状态码作为错误码
+            code = str(e).split('-', 1)[0]
+            registry.end(key, time.perf_counter() - start, error=code if code.isdigit() else e)
+            raise
+        registry.end(key, time.perf_counter() - start)
+        return r
+
+    api._request = _request
+    return api
+
+
+def kumex_priority(method, uri, params):
+    # 撤单优先, 其次只减仓的单, 最后是普通挂单和查询
+    if method == 'DELETE':
+        return ratelimit.PRIORITY_CANCEL
+    if method == 'POST' and params and (params.get('reduceOnly') or params.get('closeOrder')):
+        return ratelimit.PRIORITY_REDUCE
+    return ratelimit.PRIORITY_NORMAL
+
+
+def throttle_kumex(api, limiter):
+    # 同样包一层 _request, KuMEX 请求按接口族的令牌桶排队; 排队时间不超过请求的 timeout
+    request = api._request
 
+    def _request(method, uri, timeout=5, auth=True, params=None):
+        bucket = limiter.bucket(method, uri)
+        if not bucket.acquire(kumex_priority(method, uri, params), timeout=timeout):
+            raise Exception('rate limit queue timeout: %s %s' % (method, uri))
+        return request(method, uri, timeout=timeout, auth=auth, params=params)
+
+    api._request = _request
+    return api
+
+
+def load_config():
+    with open(c.CONFIG_FILE, 'r') as file:
+        return json.load(file)
+
+
+def market_configs(config):
+    # markets 中每一项覆盖顶层配置; 没有 markets 时按顶层的 ok_symbol/kumex_symbol 单合约运行
+    return [dict(config, **m) for m in config.get('markets') or [{}]]
+
+
+class Shared(object):
+
+    # 同一进程内多个合约共用的连接池、API 实例 (因此共用限速额度和时钟同步)、OK 盘口推送和 metrics
+    def __init__(self, config, markets=None, feed=None):
+        # feed: 外部提供的参考价 (与 TickerFeed 接口相同), 例如 supervisor 的共享内存价格
+        if markets is None:
+            markets = market_configs(config)
         self.ok_api_key = config['ok_api_key']
         self.ok_secret_key = config['ok_secret_key']
         self.ok_pass_phrase = config['ok_pass_phrase']
@@ -33,45 +103,173 @@ class Kumex(object):
         self.kumex_secret_key = config['kumex_secret_key']
         self.kumex_pass_phrase = config['kumex_pass_phrase']
         self.is_sandbox = config['is_sandbox']
+        # OK 连接池, 永续与交割合约API共用
+        self.ok_session = HttpSession(pool_maxsize=config.get('pool_maxsize', 10))
+        ok_api_url = config.get('ok_api_url', okc.API_URL)
+        # 公共行情缓存: 多个合约参考同一个 OK 合约时, ticker_ttl 秒内共用一次请求, 并发的相同请求合并为一次;
+        # 单合约时不缓存, 每次都取最新盘口
+        self.ticker_ttl = config.get('ticker_ttl', 0.1)
+        self.ok_cache = None
+        if len(markets) > 1:
+            self.ok_cache = ResponseCache(dict(okc.CACHE_TTLS, ticker=self.ticker_ttl))
+        # OK 限速, 永续与交割合约API共用; 多进程时 supervisor 按进程数把额度分到 ok_rate_limits 里
+        self.ok_limiter = ratelimit.RateLimiter(config.get('ok_rate_limits', okc.RATE_LIMITS),
+                                                config.get('ok_default_rate_limit', okc.DEFAULT_RATE_LIMIT))
+        # OK 永续合约API
+        self.swapAPI = swap.SwapAPI(self.ok_api_key, self.ok_secret_key, self.ok_pass_phrase,
+                                    session=self.ok_session, rate_limiter=self.ok_limiter, cache=self.ok_cache,
+                                    api_url=ok_api_url)
+        # OK 交割合约
+        self.futureAPI = future.FutureAPI(self.ok_api_key, self.ok_secret_key, self.ok_pass_phrase,
+                                          session=self.ok_session, rate_limiter=self.ok_limiter, cache=self.ok_cache,
+                                          api_url=ok_api_url)
+
+        # OK 盘口推送, 一个连接订阅所有合约
+        self.feed = feed
+        if feed is None and config.get('ws_feed', False):
+            channels = []
+            for m in markets:
+                table = okc.WS_SWAP_TICKER if m['category'] == c.SWAP else okc.WS_FUTURE_TICKER
+                channels.append(ticker_channel(table, m['ok_symbol']))
+            self.feed = TickerFeed(channels, url=config.get('ws_url', okc.WS_URL)).start()
+
+        self.trade = Trade(self.kumex_api_key, self.kumex_secret_key, self.kumex_pass_phrase,
+                           is_sandbox=self.is_sandbox)
+        self.market = Market(self.kumex_api_key, self.kumex_secret_key, self.kumex_pass_phrase,
+                             is_sandbox=self.is_sandbox)
+        self.ws_token = WsToken(self.kumex_api_key, self.kumex_secret_key, self.kumex_pass_phrase,
+                                is_sandbox=self.is_sandbox)
+        # 可指向本地模拟撮合 (simulator.py)
+        if config.get('kumex_api_url'):
+            self.trade.url = self.market.url = self.ws_token.url = config['kumex_api_url']
+        # KuMEX 推送, 所有合约共用: 一个公共连接订阅各合约的 level2, 一个私有连接接收订单推送;
+        # 连接在第一个合约订阅时建立; level2 超过 kumex_ws_idle_timeout 秒没有消息即重连
+        # (订单推送没有挂单变化时本来就可能长时间无消息, 不做空闲检测)
+        self.kumex_public = KumexMux(self.ws_token, name='kumex-level2',
+                                     idle_timeout=config.get('kumex_ws_idle_timeout', c.KUMEX_WS_IDLE_TIMEOUT))
+        self.kumex_private = KumexMux(self.ws_token, private=True, name='kumex-orders')
+        # KuMEX 合约元数据, 启动时加载一次, 之后按 instrument_ttl 秒在后台刷新
+        self.instruments = InstrumentRegistry(functools.partial(kumex_instruments, self.market),
+                                              ttl=config.get('instrument_ttl', c.INSTRUMENT_TTL),
+                                              name='kumex-instruments').start()
+        # 请求与主循环各阶段的耗时统计, 配置 metrics_port 后以 Prometheus 格式导出
+        self.metrics = metrics.default_metrics()
+        instrument_kumex(self.trade, self.metrics)
+        instrument_kumex(self.market, self.metrics)
+        # KuMEX 下单 / 撤单 / 行情请求的限速, 同一进程内所有合约共用; 排队时间不计入上面的接口耗时
+        self.kumex_limiter = ratelimit.RateLimiter(config.get('kumex_rate_limits', c.KUMEX_RATE_LIMITS),
+                                                   config.get('kumex_default_rate_limit', c.KUMEX_DEFAULT_RATE_LIMIT))
+        throttle_kumex(self.trade, self.kumex_limiter)
+        throttle_kumex(self.market, self.kumex_limiter)
+        # 各限速桶的排队深度和等待时间随 metrics 一起导出
+        self.metrics.add_limiter('okex', self.ok_limiter)
+        self.metrics.add_limiter('kumex', self.kumex_limiter)
+        self.metrics_server = None
+        if config.get('metrics_port'):
+            self.metrics_server = metrics.serve(self.metrics, port=config['metrics_port'])
+
+    def get_ticker(self, category, ok_symbol, timeout):
+        # 多合约时缓存与并发合并由 ok_cache 完成
+        if category == c.SWAP:
+            return self.swapAPI.get_specific_ticker(ok_symbol, timeout=timeout)
+        if category == c.FUTURE:
+            return self.futureAPI.get_specific_ticker(ok_symbol, timeout=timeout)
+        return {}
+
+
+class Kumex(object):
+
+    def __init__(self, config=None, shared=None):
+        # read configuration from json file
+        if config is None:
+            config = load_config()
+        if shared is None:
+            shared = Shared(config, [config])
+
         self.ok_symbol = config['ok_symbol']
         self.kumex_symbol = config['kumex_symbol']
         self.category = config['category']
         self.maker_number = config['maker_number']
         self.taker_number = config['taker_number']
         self.side = config['side']
-        self.sizeMin = 100
-        self.sizeMax = 10000
-        # OK 永续合约API
-        self.swapAPI = swap.SwapAPI(self.ok_api_key, self.ok_secret_key, self.ok_pass_phrase)
-        # OK 交割合约
-        self.futureAPI = future.FutureAPI(self.ok_api_key, self.ok_secret_key, self.ok_pass_phrase)
+        self.interval = config.get('interval', 0.5)
+        # OK 单次请求总时限, 以及每一轮撤单/挂单阶段的等待时限 (秒)
+        self.request_timeout = config.get('request_timeout', 2)
+        self.tick_timeout = config.get('tick_timeout', 5)
+        self.max_workers = config.get('max_workers', 10)
+        self.sizeMin = config.get('size_min', c.SIZE_MIN)
+        self.sizeMax = config.get('size_max', c.SIZE_MAX)
+        self.shared = shared
+        self.swapAPI = shared.swapAPI
+        self.futureAPI = shared.futureAPI
 
-        self.buy_list = {}
-        self.sell_list = {}
+        # 价格统一按 tick 档位计算, buy_list / sell_list 按档位排序索引, market_price 也是档位;
+        # 注册表里没有该合约时按 tick = 1, lot = 1 处理
+        self.default_instrument = Instrument(self.kumex_symbol)
+        self.buy_list = PriceLevels('buy')
+        self.sell_list = PriceLevels('sell')
         self.best_ask = 0
         self.best_bid = 0
         self.market_price = 0
 
-        self.trade = Trade(self.kumex_api_key, self.kumex_secret_key, self.kumex_pass_phrase,
-                           is_sandbox=self.is_sandbox)
-        self.market = Market(self.kumex_api_key, self.kumex_secret_key, self.kumex_pass_phrase,
-                             is_sandbox=self.is_sandbox)
+        # OK 盘口推送, 开启后 get_market_price 直接读内存
+        self.feed = shared.feed
+        self.feed_version = 0
+
+        self.trade = shared.trade
+        self.market = shared.market
+        self.ws_token = shared.ws_token
+        self.metrics = shared.metrics
+        # KuMEX 本地 level2 盘口, taker 直接读内存
+        self.book = None
+        if config.get('kumex_book', False):
+            self.book = OrderBook(self.kumex_symbol, self.market).start(shared.kumex_public)
+        # 本地订单状态, 由私有推送和 get_active_orders 对账维护
+        self.orders = OrderStore(self.kumex_symbol)
+        if config.get('order_events', False):
+            self.orders.start(shared.kumex_private)
+
+    @property
+    def instrument(self):
+        return self.shared.instruments.get(self.kumex_symbol, self.default_instrument)
+
+    def get_best_size(self):
+        # 返回 (买一数量, 卖一数量), 本地盘口不可用时回退到 REST ticker
+        if self.book is not None and self.book.is_fresh():
+            bid = self.book.best_bid()
+            ask = self.book.best_ask()
+            return (bid[1] if bid else 0), (ask[1] if ask else 0)
+        t = self.market.get_ticker(self.kumex_symbol)
+        logging.info(t)
+        return t['bestBidSize'], t['bestAskSize']
+
+    def wait_market_price(self):
+        # 等待盘口推送变化, 最多等待 interval 秒
+        if self.feed is not None:
+            self.feed_version = self.feed.wait(self.feed_version, self.interval)
 
     def get_market_price(self):
         r = {}
-        # 根据类型调用对应的合约API
-        try:
-            if self.category == c.SWAP:
-                r = self.swapAPI.get_specific_ticker(self.ok_symbol)
-            elif self.category == c.FUTURE:
-                r = self.futureAPI.get_specific_ticker(self.ok_symbol)
-        except Exception as e:
-            logging.error(e)
-            time.sleep(5)
-        self.best_ask = int(float(r['best_ask']))
-        self.best_bid = int(float(r['best_bid']))
-        self.market_price = int((self.best_ask + self.best_bid) / 2)
-        logging.info('最新盘口价格 = %s' % self.market_price)
+        if self.feed is not None:
+            age = self.feed.age(self.ok_symbol)
+            if age is not None and age < c.FEED_STALE_SECONDS:
+                r = self.feed.get(self.ok_symbol)
+        # 推送不可用或已过期时回退到 REST, 根据类型调用对应的合约API
+        if not r:
+            try:
+                r = self.shared.get_ticker(self.category, self.ok_symbol, self.request_timeout)
+            except Exception as e:
+                # 重试和熔断已在 okex Client 内完成, 这里直接跳过本轮
+                logging.error(e)
+                return False
+        if not r:
+            return False
+        instrument = self.instrument
+        self.best_ask = instrument.to_ticks(r['best_ask'])
+        self.best_bid = instrument.to_ticks(r['best_bid'])
+        self.market_price = (self.best_ask + self.best_bid) // 2
+        logging.info('最新盘口价格 = %s', instrument.from_ticks(self.market_price))
+        return True
 
     def taker(self):
         best_bid_size = 0
@@ -80,189 +278,193 @@ class Kumex(object):
         # best_ask_price = 0
         best_flag = 0
         try:
-            t = self.market.get_ticker(self.kumex_symbol)
-            logging.info(t)
-            best_bid_size = t['bestBidSize']
-            best_ask_size = t['bestAskSize']
+            best_bid_size, best_ask_size = self.get_best_size()
             max_size = 100000
             if best_bid_size > max_size:
                 best_bid_size = max_size
             if best_ask_size > max_size:
                 best_ask_size = max_size
+            # 取整到 lot, 并受合约最大下单量限制
+            instrument = self.instrument
+            best_bid_size = instrument.round_size(best_bid_size)
+            best_ask_size = instrument.round_size(best_ask_size)
 
             if best_ask_size > 0:
                 try:
                     sell = self.trade.create_market_order(self.kumex_symbol, 'sell', '5', size=best_ask_size, type='market')
-                    logging.info('在合约 %s 以数量= %s, 吃卖单,订单ID = %s' %
-                                 (self.kumex_symbol, best_ask_size, sell['orderId']))
+                    logging.info('在合约 %s 以数量= %s, 吃卖单,订单ID = %s',
+                                 self.kumex_symbol, best_ask_size, sell['orderId'])
                 except Exception as e:
                     logging.error(e)
             if best_bid_size > 0:
                 try:
                     buy = self.trade.create_market_order(self.kumex_symbol, 'buy', '5', size=best_bid_size, type='market')
-                    logging.info('在合约 %s 以数量= %s, 吃买单,订单ID = %s' %
-                                 (self.kumex_symbol, best_bid_size, buy['orderId']))
+                    logging.info('在合约 %s 以数量= %s, 吃买单,订单ID = %s',
+                                 self.kumex_symbol, best_bid_size, buy['orderId'])
                 except Exception as e:
                     logging.error(e)
         except Exception as e:
             logging.error(e)
             return
 
-    def ask_maker(self, p):
-        try:
-            m = random.randint(self.sizeMin, self.sizeMax)
-            ask = self.trade.create_limit_order(self.kumex_symbol, 'sell', '5', m, p)
-            logging.info('当前盘口价格 = %s,在合约 %s 以数量= %s,价格= %s,创建了卖单,卖单ID = %s' %
-                         (self.market_price, self.kumex_symbol, m, p, ask['orderId']))
-            self.sell_list[p] = {
-                'price': p,
-                'side': 'sell',
-                'size': m,
-                'order_id': ask['orderId']
-            }
-        except Exception as e:
-            logging.error(e)
-
-    def bid_maker(self, p):
-        try:
-            m = random.randint(self.sizeMin, self.sizeMax)
-            bid = self.trade.create_limit_order(self.kumex_symbol, 'buy', '5', m, p)
-            logging.info('当前盘口价格 = %s,在合约 %s 以数量= %s,价格= %s,创建了买单,卖单ID = %s' %
-                         (self.market_price, self.kumex_symbol, m, p, bid['orderId']))
-            self.sell_list[p] = {
-                'price': p,
-                'side': 'buy',
-                'size': m,
-                'order_id': bid['orderId']
-            }
-        except Exception as e:
-            logging.error(e)
+    def place_orders(self, places, executor):
+        # places: [(tick 档位, side)], 按档位换算价格, 数量取整到 lot, 经 kumex_batch 分批下单
+        if not places:
+            return
+        instrument = self.instrument
+        orders = []
+        for p, side in places:
+            orders.append({'level': p, 'side': side, 'price': instrument.from_ticks(p), 'lever': '5',
+                           'size': instrument.round_size(random.randint(self.sizeMin, self.sizeMax))})
+        results = kumex_batch.place_orders(self.trade, self.kumex_symbol, orders, executor,
+                                           timeout=self.tick_timeout)
+        market_price = instrument.from_ticks(self.market_price)
+        for o, r in zip(orders, results):
+            if isinstance(r, Exception):
+                logging.error(r)
+                continue
+            logging.info('当前盘口价格 = %s,在合约 %s 以数量= %s,价格= %s,创建了%s单,订单ID = %s',
+                         market_price, self.kumex_symbol, o['size'], o['price'],
+                         '卖' if o['side'] == 'sell' else '买', r['orderId'])
+            orders_list = self.sell_list if o['side'] == 'sell' else self.buy_list
+            orders_list.put(OrderEntry(o['level'], o['price'], o['side'], o['size'], r['orderId']))
+            self.orders.add(r['orderId'], o['side'], o['price'], o['size'])
 
-    def cancel_order(self, order_id, key, side):
-        try:
-            self.trade.cancel_order(order_id)
-            logging.info('当前盘口价 = %s,撤单 id = %s, key = %s' % (self.market_price, order_id, key))
-            if side == 'sell':
-                del self.sell_list[key]
-            elif side == 'buy':
-                del self.buy_list[key]
-        except Exception as e:
-            logging.info('撤单时发生错误, order_id = %s, key = %s' % (order_id, key))
-            logging.error(e)
+    def cancel_orders(self, cancels, executor):
+        # cancels: [(order_id, tick 档位, side)], 只撤本地记录的订单; 返回撤单成功的订单ID
+        if not cancels:
+            return set()
+        results = kumex_batch.cancel_orders(self.trade, [o[0] for o in cancels], executor,
+                                            timeout=self.tick_timeout)
+        cancelled = set()
+        for order_id, key, side in cancels:
+            r = results.get(order_id)
+            if isinstance(r, Exception):
+                logging.info('撤单时发生错误, order_id = %s, key = %s', order_id, key)
+                logging.error(r)
+                continue
+            logging.info('当前盘口价 = %s,撤单 id = %s, key = %s', self.market_price, order_id, key)
+            self.orders.remove(order_id)
+            orders = self.sell_list if side == 'sell' else self.buy_list
+            orders.discard(key, order_id)
+            cancelled.add(order_id)
+        return cancelled
 
     def get_order_info(self, order_id):
+        # 优先读本地订单状态, 没有记录时再走 REST
+        if self.orders.is_fresh():
+            o = self.orders.get(order_id)
+            if o is not None:
+                return o
         try:
             o = self.trade.get_order_details(order_id)
+            self.orders.update(o)
         except Exception as e:
             logging.error(e)
             o = {}
         return o
 
     def get_active_orders(self):
+        started = time.monotonic()
         try:
             o = self.trade.get_order_list(symbol=self.kumex_symbol, status='active', type='limit')
             os = o['items']
+            self.orders.reconcile(os, started)
         except Exception as e:
+            # 查询失败时保留本地挂单, 下一轮再对账
             logging.error(e)
-            os = []
-        if len(os) > 0:
-            self.sell_list.clear()
-            self.buy_list.clear()
-            for n in os:
-                # print(json.dumps(n))
-                if n['side'] == 'sell':
-                    self.sell_list[int(n['price'])] = {
-                        'price': int(n['price']),
-                        'side': 'sell',
-                        'size': n['size'],
-                        'order_id': n['id']
-                    }
-                elif n['side'] == 'buy':
-                    self.buy_list[int(n['price'])] = {
-                        'price': int(n['price']),
-                        'side': 'buy',
-                        'size': n['size'],
-                        'order_id': n['id']
-                    }
+            return
+        # 查询成功时以交易所为准, 没有活动订单 (全部成交或被外部撤掉) 时清空本地挂单, 空缺价位下一步补单
+        instrument = self.instrument
+        sells, buys = [], []
+        for n in os:
+            # print(json.dumps(n))
+            o = OrderEntry(instrument.to_ticks(n['price']), float(n['price']), n['side'], n['size'], n['id'])
+            if n['side'] == 'sell':
+                sells.append(o)
+            elif n['side'] == 'buy':
+                buys.append(o)
+        self.sell_list.replace(sells)
+        self.buy_list.replace(buys)
 
+    def forget_orders(self, done):
+        # done: [(order_id, tick 档位, side)], 已结束的订单不用撤, 只从本地挂单里去掉
+        for order_id, key, side in done:
+            self.orders.remove(order_id)
+            orders = self.sell_list if side == 'sell' else self.buy_list
+            orders.discard(key, order_id)
 
-if __name__ == '__main__':
-    log_setting()
-    logging.info('---------------------------------------')
-    logging.info('Service Start ......')
-    service = Kumex()
-    executor = ThreadPoolExecutor(max_workers=10)
-    all_task = []
-    while 1:
-        service.get_market_price()
+def run(service, ticks=None, on_phase=None, max_workers=10):
+    # 主循环, ticks 为 None 时一直运行; on_phase(name, seconds) 用于统计各阶段耗时
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    n = 0
+    timer = time.perf_counter
+
+    def phase(name, since):
+        now = timer()
+        if on_phase is not None:
+            on_phase(name, now - since)
+        return now
+
+    while ticks is None or n < ticks:
+        n += 1
+        service.wait_market_price()
+        tick_start = t = timer()
+        if not service.get_market_price():
+            time.sleep(service.interval)
+            continue
+        t = phase('market_price', t)
         service.taker()
+        t = phase('taker', t)
         service.get_active_orders()
-        ask_rand = service.market_price + service.maker_number - 1
-        for k, v in list(service.sell_list.items()):
-            # 判断范围，不在范围内的单撤掉
-            if k not in range(service.market_price, ask_rand) and k in service.sell_list.keys():
-                task = executor.submit(service.cancel_order, v['order_id'], k, 'sell')
-                all_task.append(task)
-        wait(all_task, return_when=ALL_COMPLETED)
-        all_task.clear()
-
-        bid_rand = service.market_price - service.maker_number + 1
-        for k, v in list(service.buy_list.items()):
-            # 判断范围，不在范围内的单撤掉
-            if k not in range(bid_rand, service.market_price):
-                task = executor.submit(service.cancel_order, v['order_id'], k, 'buy')
-                all_task.append(task)
-        wait(all_task, return_when=ALL_COMPLETED)
-        all_task.clear()
-
-        for i in range(1, service.maker_number):
-            ask_price = service.market_price + i
-            if ask_price in service.sell_list.keys():
-                orderId = service.sell_list[ask_price]['order_id']
-                order_info = service.get_order_info(orderId)
-                if order_info:
-                    if not order_info['isActive']:
-                        task1 = executor.submit(service.cancel_order, orderId, ask_price, 'sell')
-                        all_task.append(task1)
-                        task2 = executor.submit(service.ask_maker, ask_price)
-                        all_task.append(task2)
-                    else:
-                        size_dff = order_info['size'] - order_info['dealSize']
-                        if size_dff not in range(service.sizeMin, service.sizeMax):
-                            if order_info['isActive']:
-                                task1 = executor.submit(service.cancel_order, order_info['id'], ask_price, 'sell')
-                                all_task.append(task1)
-
-                            task2 = executor.submit(service.ask_maker, ask_price)
-                            all_task.append(task2)
-
-            else:
-                task2 = executor.submit(service.ask_maker, ask_price)
-                all_task.append(task2)
-
-            bid_price = service.market_price - i + 1
-            if bid_price in service.buy_list.keys():
-                orderId = service.buy_list[bid_price]['order_id']
-                order_info = service.get_order_info(orderId)
-                if order_info:
-                    if not order_info['isActive']:
-                        task1 = executor.submit(service.cancel_order, orderId, bid_price, 'buy')
-                        all_task.append(task1)
-                        task2 = executor.submit(service.bid_maker, bid_price)
-                        all_task.append(task2)
-
-                    else:
-                        size_dff = order_info['size'] - order_info['dealSize']
-                        if size_dff not in range(service.sizeMin, service.sizeMax):
-                            if order_info['isActive']:
-                                task1 = executor.submit(service.cancel_order, orderId, bid_price, 'buy')
-                                all_task.append(task1)
-
-                            task2 = executor.submit(service.bid_maker, bid_price)
-                            all_task.append(task2)
-            else:
-                task2 = executor.submit(service.bid_maker, bid_price)
-                all_task.append(task2)
-        wait(all_task, return_when=ALL_COMPLETED)
-        all_task.clear()
+        t = phase('active_orders', t)
+        diff = ladder.diff_ladder(service.market_price, service.maker_number, service.sell_list, service.buy_list,
+                                  service.sizeMin, service.sizeMax, service.get_order_info)
+        t = phase('diff', t)
+
+        # 已结束的单直接去掉本地记录, 原价位在 diff.places 里重挂
+        service.forget_orders(diff.done)
+        # 不在范围内的单, 以及剩余数量不合适的单, 一起分批撤掉
+        cancelled = service.cancel_orders(diff.cancels + diff.amends, executor)
+        t = phase('cancel', t)
 
+        # 空缺的价位补单, 撤掉的单在原价位重挂
+        places = diff.places + [(price, side) for order_id, price, side in diff.amends if order_id in cancelled]
+        service.place_orders(places, executor)
+        t = phase('make', t)
+        phase('tick', tick_start)
+    executor.shutdown(wait=True)
+
+
+def create_services(config=None):
+    # 按配置为每个合约创建一个 Kumex, 共用同一个 Shared
+    if config is None:
+        config = load_config()
+    markets = market_configs(config)
+    shared = Shared(config, markets)
+    return [Kumex(m, shared) for m in markets]
+
+
+def run_all(services, ticks=None, on_phase=None):
+    # 每个合约一个主循环线程, 各自的撤单/挂单线程池大小取自该合约的 max_workers;
+    # on_phase(symbol, name, seconds)
+    threads = []
+    for service in services:
+        phase = None
+        if on_phase is not None:
+            phase = functools.partial(on_phase, service.kumex_symbol)
+        t = threading.Thread(target=run, args=(service, ticks, phase, service.max_workers),
+                             name='loop-%s' % service.kumex_symbol)
+        t.start()
+        threads.append(t)
+    for t in threads:
+        t.join()
+
+
+if __name__ == '__main__':
+    config = load_config()
+    log_setting(config)
+    logging.info('---------------------------------------')
+    logging.info('Service Start ......')
+    services = create_services(config)
+    run_all(services, on_phase=services[0].metrics.observe_phase)